@@ -1,18 +1,24 @@
 import os
+import argparse
 import json
-from whisper_transcriber import record_audio, transcribe
-from gpt_parser import parse_prompt_to_structure
-from midi_generator import make_music_midi
+import threading
+from config import DEFAULT_SAMPLE_RATE, OPENAI_PREWARM_CONNECTION, get_openai_key
+from pipeline import Pipeline
+
+# Each stage imports what it needs (Whisper/CTranslate2 and sounddevice for
+# voice, the OpenAI SDK only for prompts the fast path and cache can't
+# answer), so the menu and text mode come up without the speech stack
 
 def get_recording_duration():
-    """Get recording duration from user"""
+    """Get recording duration from user (None means stop on silence)"""
     print("⏱️  Choose recording duration:")
     print("1. Quick (5 seconds)")
     print("2. Standard (10 seconds)")
     print("3. Extended (15 seconds)")
     print("4. Custom duration")
+    print("5. Auto (stops when you stop talking)")
     
-    duration_choice = input("Enter choice (1-4): ").strip()
+    duration_choice = input("Enter choice (1-5): ").strip()
     
     if duration_choice == "1":
         return 5
@@ -31,14 +37,19 @@ def get_recording_duration():
         except ValueError:
             print("⚠️  Invalid input. Using 10 seconds.")
             return 10
+    elif duration_choice == "5":
+        return None
     else:
         print("⚠️  Invalid choice. Using 10 seconds.")
         return 10
 
-def get_filename(genre):
-    """Get filename from user"""
+def get_filename(genre, key=""):
+    """Get filename from user; auto names carry the structure hash so
+    different beats of the same genre don't overwrite each other"""
+    from music_schema import normalize_genre
+    genre = normalize_genre(genre)
     print("📁 Choose filename:")
-    print("1. Auto-generated (genre_beat.mid)")
+    print("1. Auto-generated (genre_beat_<hash>.mid)")
     print("2. Custom filename")
     
     filename_choice = input("Enter choice (1 or 2): ").strip()
@@ -49,44 +60,118 @@ def get_filename(genre):
             custom_name = f"{genre}_beat"
         return f"midi_output/{custom_name}.mid"
     else:
-        return f"midi_output/{genre}_beat.mid"
+        suffix = f"_{key[:8]}" if key else ""
+        return f"midi_output/{genre}_beat{suffix}.mid"
+
+def _prewarm_openai():
+    # Never prompt from a background thread; without a key the parse stage asks
+    api_key = get_openai_key(ask=False)
+    if api_key and OPENAI_PREWARM_CONNECTION:
+        from openai_client import warm_connection
+        warm_connection(api_key)
+    return bool(api_key)
+
+def _warm_whisper():
+    from whisper_transcriber import warm_up
+    return warm_up()
+
+def _open_caches():
+    from prompt_cache import get_prompt_cache
+    from render_cache import get_render_cache
+    return get_prompt_cache(), get_render_cache(persistent=True)
+
+def _load_text_stages():
+    """Import the parse and render stages and open the caches"""
+    import gpt_parser, midi_generator  # noqa: F401
+    _open_caches()
+
+def _record_stage(duration):
+    """Record for a fixed duration, or stream until the speaker stops"""
+    if duration is None:
+        from voice_stream import stream_transcribe
+        print("🎤 Recording until you stop talking...")
+        text = ""
+        for text, is_final in stream_transcribe():
+            if not is_final:
+                print(f"… {text}")
+        return text
+    from whisper_transcriber import capture_audio
+    print(f"🎤 Recording for {duration} seconds...")
+    return capture_audio(duration=duration)
+
+def _transcribe_stage(audio):
+    # The streaming path has already transcribed while recording
+    if isinstance(audio, str):
+        text = audio
+    else:
+        from whisper_transcriber import transcribe_array
+        text = transcribe_array(audio, DEFAULT_SAMPLE_RATE)
+    print(f"Transcribed: '{text}'")
+    return text
+
+def _parse_stage(text):
+    if not text.strip():
+        return None
+    from gpt_parser import stream_prompt_to_structure
+    from midi_generator import StreamingMidiRenderer
+    from render_cache import get_render_cache
+    print("🧠 Processing with AI...")
+    # The drum track is rendered while the rest of the response streams in
+    renderer = StreamingMidiRenderer(filename=None, cache=get_render_cache(persistent=True))
+    parsed = stream_prompt_to_structure(text, on_field=renderer.on_field)
+    if parsed is None:
+        return None
+    print(f"Parsed structure: {json.dumps(parsed, indent=2)}")
+    return parsed, renderer
+
+def _render_stage(parsed):
+    if parsed is None:
+        return None
+    parsed, renderer = parsed
+    print("🥁 Generating MIDI...")
+    # Lands in the render cache, so writing the chosen file later is a lookup
+    renderer.finish(parsed)
+    return parsed
 
 def run_assistant():
     """Main function to run the AI music assistant"""
     print("🎵 AI Music Assistant")
     print("=" * 30)
     
+    # Load the Whisper model, open the OpenAI connection and the caches while
+    # the user picks a duration and speaks; each stage hands off to the next
+    pipeline = Pipeline(
+        stages=[
+            ("record", _record_stage),
+            ("transcribe", _transcribe_stage),
+            ("parse", _parse_stage),
+            ("render", _render_stage),
+        ],
+        prefetch={
+            "whisper": _warm_whisper,
+            "openai": _prewarm_openai,
+            "caches": _open_caches,
+        },
+    ).start()
+    
     # Get recording duration from user
     duration = get_recording_duration()
-    print(f"🎤 Recording for {duration} seconds...")
     
     try:
-        # Step 1: Record audio
-        print("🎤 Recording your voice command...")
-        filename = record_audio(duration=duration)
-        
-        # Step 2: Transcribe audio
-        print("📝 Transcribing...")
-        text = transcribe(filename)
-        print(f"Transcribed: '{text}'")
-        
-        if not text.strip():
+        parsed = pipeline.run(duration)
+        if parsed is None:
             print("❌ No speech detected. Please try again.")
             return
         
-        # Step 3: Parse with GPT
-        print("🧠 Processing with AI...")
-        parsed = parse_prompt_to_structure(text)
-        print(f"Parsed structure: {json.dumps(parsed, indent=2)}")
-        
-        # Step 4: Generate MIDI
-        print("🥁 Generating MIDI...")
+        from midi_generator import make_music_midi
+        from render_cache import structure_key, get_render_cache
         
-        filename = get_filename(parsed['genre'])
+        filename = get_filename(parsed['genre'], structure_key(parsed))
         
         midi_file = make_music_midi(
             parsed, 
-            filename=filename
+            filename=filename,
+            cache=get_render_cache(persistent=True)
         )
         
         print("✅ Success! MIDI file created.")
@@ -97,18 +182,30 @@ def run_assistant():
     except Exception as e:
         print(f"❌ Error: {e}")
         print("Please check your OpenAI API key and try again.")
+    finally:
+        print("⏱️  Stage timings:")
+        for line in pipeline.timing_report():
+            print(f"   {line}")
 
 def run_with_text_input():
     """Alternative function to test with text input instead of voice"""
     print("🎵 AI Music Assistant (Text Mode)")
     print("=" * 40)
     
+    # Load the parser and renderer while the user types
+    loader = threading.Thread(target=_load_text_stages, name="load-text-stages", daemon=True)
+    loader.start()
     text = input("Enter your music request: ")
     if not text.strip():
         print("❌ No input provided.")
         return
     
     try:
+        loader.join()
+        from gpt_parser import parse_prompt_to_structure
+        from midi_generator import make_music_midi
+        from render_cache import structure_key, get_render_cache
+        
         # Parse with GPT
         print("🧠 Processing with AI...")
         parsed = parse_prompt_to_structure(text)
@@ -117,11 +214,12 @@ def run_with_text_input():
         # Generate MIDI
         print("🥁 Generating MIDI...")
         
-        filename = get_filename(parsed['genre'])
+        filename = get_filename(parsed['genre'], structure_key(parsed))
         
         midi_file = make_music_midi(
             parsed, 
-            filename=filename
+            filename=filename,
+            cache=get_render_cache(persistent=True)
         )
         
         print("✅ Success! MIDI file created.")
@@ -131,6 +229,17 @@ def run_with_text_input():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="AI Music Assistant")
+    arg_parser.add_argument("--profile-imports", action="store_true",
+                            help="report what each stage imports and how long it takes (-X importtime)")
+    arg_parser.add_argument("--top", type=int, default=10, help="modules listed per stage with --profile-imports")
+    args = arg_parser.parse_args()
+    if args.profile_imports:
+        from import_profile import profile_stages, format_report
+        for line in format_report(profile_stages(), top=args.top):
+            print(line)
+        raise SystemExit(0)
+    
     print("Choose mode:")
     print("1. Voice input (requires microphone)")
     print("2. Text input")
@@ -143,4 +252,9 @@ if __name__ == "__main__":
         run_with_text_input()
     else:
         print("Invalid choice. Running voice mode...")
-        run_assistant() 
\ No newline at end of file
+        run_assistant()
+    
+    from instrumentation import is_enabled as metrics_enabled, export as export_metrics
+    if metrics_enabled():
+        prom_file, trace_file = export_metrics()
+        print(f"📈 Metrics: {prom_file}, trace (chrome://tracing): {trace_file}")
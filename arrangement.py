@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from config import MIDI_PPQ, PROGRESSION_BARS, DEFAULT_BARS
+from music_schema import normalize_structure
+from midi_generator import piano_events, encode_midi, DRUM_NOTE_TICKS
+from smf_writer import NoteEvents, DRUM_CHANNEL
+from step_grid import StepPattern, BEATS_PER_BAR
+
+@dataclass(eq=False)
+class Progression:
+    """Chords and/or melody spread evenly across `bars` bars"""
+    chords: Optional[List[str]] = None
+    melody: Optional[List[str]] = None
+    bars: int = PROGRESSION_BARS
+
+    def to_events(self):
+        return piano_events(self.chords, self.melody, bars=self.bars)
+
+@dataclass
+class Section:
+    """`bars` bars of a song; drums and progression are shared by reference,
+    so sections that reuse the same objects reuse their rendered events"""
+    name: str
+    bars: int
+    drums: Optional[StepPattern] = None
+    progression: Optional[Progression] = None
+
+class Arrangement:
+    """A sequence of sections at one tempo, rendered by tiling per-loop events"""
+
+    def __init__(self, sections, bpm):
+        self.sections = list(sections)
+        self.bpm = bpm
+
+    @classmethod
+    def from_structure(cls, parsed_data, form=(("verse", DEFAULT_BARS),)):
+        """Sections from a parsed structure; every section references the same
+        pattern and progression, e.g. form=(("intro", 4), ("verse", 16), ...)"""
+        structure = normalize_structure(parsed_data)
+        music_type = structure.music_type
+        drums = None
+        if music_type in ("drums", "mixed"):
+            drums = StepPattern.from_pattern(structure.pattern)
+        progression = None
+        if music_type in ("chords", "melody", "mixed"):
+            progression = Progression(
+                chords=structure.chords if music_type in ("chords", "mixed") else None,
+                melody=structure.melody if music_type in ("melody", "mixed") else None,
+            )
+        return cls([Section(name, bars, drums, progression) for name, bars in form], structure.bpm)
+
+    @property
+    def bar_ticks(self):
+        return BEATS_PER_BAR * MIDI_PPQ
+
+    @property
+    def total_bars(self):
+        return sum(section.bars for section in self.sections)
+
+    @property
+    def total_ticks(self):
+        return self.total_bars * self.bar_ticks
+
+    @property
+    def duration_seconds(self):
+        """Length in real time at the arrangement's tempo"""
+        return self.total_bars * BEATS_PER_BAR * 60.0 / self.bpm
+
+    def section_starts(self):
+        """Start tick of each section"""
+        bars = np.array([section.bars for section in self.sections], dtype=np.int64)
+        return (np.cumsum(bars) - bars) * self.bar_ticks
+
+    def tracks(self):
+        """Drum and piano NoteEvents for the whole song.
+        
+        Each distinct pattern/progression object is rendered once; sections
+        then tile those arrays, so cost grows with the number of sections,
+        not with the number of bars.
+        """
+        rendered = {}  # id(object) -> (events, span in ticks)
+
+        def loop_events(part):
+            if id(part) not in rendered:
+                if isinstance(part, StepPattern):
+                    rendered[id(part)] = (part.to_events(MIDI_PPQ, DRUM_NOTE_TICKS), self.bar_ticks)
+                else:
+                    rendered[id(part)] = (part.to_events(), part.bars * self.bar_ticks)
+            return rendered[id(part)]
+
+        drum_parts, piano_parts = [], []
+        for section, start in zip(self.sections, self.section_starts()):
+            length = section.bars * self.bar_ticks
+            for part, out in ((section.drums, drum_parts), (section.progression, piano_parts)):
+                if part is not None:
+                    events, span = loop_events(part)
+                    out.append(events.tile(span, length, offset=int(start)))
+
+        tracks = []
+        for parts, name, channel in ((drum_parts, "Drums", DRUM_CHANNEL), (piano_parts, "Piano", 0)):
+            if parts:
+                tracks.append(_concat(parts, name, channel))
+        return tracks
+
+    def render(self, backend=None):
+        """Standard MIDI File bytes for the whole arrangement"""
+        return encode_midi(self.tracks(), self.bpm, backend)
+
+def _concat(parts, name, channel):
+    return NoteEvents(
+        np.concatenate([part.pitch for part in parts]),
+        np.concatenate([part.velocity for part in parts]),
+        np.concatenate([part.start for part in parts]),
+        np.concatenate([part.end for part in parts]),
+        channel=channel, name=name,
+    )
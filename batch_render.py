@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Offline batch mode: render MIDI for every line of a JSONL file.
+
+Each input line is an object with an optional "id" and either a "prompt"
+(parsed with the fast path / prompt cache / GPT) or a pre-parsed
+"structure". Input is streamed in chunks, prompts are parsed concurrently in
+this process, and rendering fans out over a process pool. Files go to a
+content-addressed store under --out-dir and one manifest line is appended
+per item, so an interrupted run picks up where it left off.
+
+Usage: python batch_render.py prompts.jsonl --out-dir midi_output/batch
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+from itertools import islice
+from config import MIDI_OUTPUT_DIR, DEFAULT_BARS, get_openai_key
+from gpt_parser import parse_prompts
+from midi_generator import make_music_midi
+from midi_store import MidiStore, midi_digest
+from render_cache import get_render_cache
+
+DEFAULT_CHUNK_SIZE = 256
+
+def read_items(path):
+    """Yield (line number, item id, item dict) without loading the file"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                item = {"error": f"invalid JSON: {e}"}
+            if not isinstance(item, dict):
+                item = {"prompt": item} if isinstance(item, str) else {"error": "expected an object"}
+            yield line_number, str(item.get("id", f"line-{line_number}")), item
+
+def completed_ids(manifest_path):
+    """Ids already rendered successfully according to the manifest"""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if row.get("status") == "ok":
+                done.add(row["id"])
+    return done
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def parse_chunk(chunk, api_key=""):
+    """Resolve prompts to structures; returns [(line, id, structure or None, error, parse_ms)].
+    Prompts the fast path and cache can't answer need `api_key`."""
+    prompts = [item["prompt"] for _, _, item in chunk
+               if isinstance(item.get("prompt"), str) and "structure" not in item]
+    parse_ms = 0.0
+    parsed = iter(())
+    if prompts:
+        start = time.perf_counter()
+        parsed = iter(parse_prompts(prompts, with_sources=True, api_key=api_key))
+        parse_ms = (time.perf_counter() - start) * 1000 / len(prompts)  # amortized over the chunk
+
+    resolved = []
+    for line_number, item_id, item in chunk:
+        if "structure" in item:
+            resolved.append((line_number, item_id, item["structure"], None, 0.0))
+        elif "prompt" in item and not isinstance(item["prompt"], str):
+            resolved.append((line_number, item_id, None, "prompt must be a string", 0.0))
+        elif "prompt" in item:
+            structure, source = next(parsed)
+            error = None
+            if source in ("malformed", "api_error"):
+                # A random default loop, not an answer: fail it so a resumed run retries it
+                structure, error = None, f"GPT fallback ({source})"
+            elif structure is None:
+                error = "could not parse prompt" if api_key else "needs GPT, but no OpenAI API key is set"
+            resolved.append((line_number, item_id, structure, error, parse_ms))
+        else:
+            resolved.append((line_number, item_id, None, item.get("error", "no prompt or structure"), 0.0))
+    return resolved
+
+def render_chunk(resolved, out_dir, bars):
+    """Worker: render one chunk into the store, returning manifest rows"""
+    store = MidiStore(out_dir)
+    rows = []
+    for line_number, item_id, structure, error, parse_ms in resolved:
+        row = {"id": item_id, "line": line_number, "parse_ms": round(parse_ms, 3)}
+        if error:
+            row.update(status="error", error=error)
+            rows.append(row)
+            continue
+        start = time.perf_counter()
+        try:
+            # The store is the output; the render cache stays in memory
+            data = make_music_midi(structure, filename=None, store=store, cache=get_render_cache(), bars=bars)
+        except Exception as e:
+            row.update(status="error", error=f"{type(e).__name__}: {e}")
+        else:
+            digest = midi_digest(data)
+            row.update(status="ok", path=store.path(digest), digest=digest, bytes=len(data))
+        row["render_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        rows.append(row)
+    return rows
+
+def run_batch(input_path, out_dir, manifest_path=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              bars=DEFAULT_BARS, resume=True):
+    """Render every item in `input_path`; returns {"ok", "errors", "skipped", "seconds"}"""
+    manifest_path = manifest_path or os.path.join(out_dir, "manifest.jsonl")
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    done = completed_ids(manifest_path) if resume else set()
+    if not resume and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    totals = {"ok": 0, "errors": 0, "skipped": 0}
+    start = time.perf_counter()
+    # Looked up once and never asked for: without a key, prompts only GPT
+    # could answer become error rows instead of prompting in every chunk
+    api_key = get_openai_key(ask=False)
+
+    def pending_items():
+        for line_number, item_id, item in read_items(input_path):
+            if item_id in done:
+                totals["skipped"] += 1
+                continue
+            yield line_number, item_id, item
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2  # bounds memory for huge inputs
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+
+        def drain(futures, return_when):
+            finished, still_pending = wait(futures, return_when=return_when)
+            for future in finished:
+                for row in future.result():
+                    manifest.write(json.dumps(row) + "\n")
+                    totals["ok" if row["status"] == "ok" else "errors"] += 1
+            manifest.flush()
+            return still_pending
+
+        in_flight = set()
+        for chunk in chunked(pending_items(), chunk_size):
+            in_flight.add(pool.submit(render_chunk, parse_chunk(chunk, api_key), out_dir, bars))
+            if len(in_flight) >= max_in_flight:
+                in_flight = drain(in_flight, FIRST_COMPLETED)
+                print(f"🎛️  {totals['ok']} rendered, {totals['errors']} errors, {totals['skipped']} skipped")
+        if in_flight:
+            drain(in_flight, ALL_COMPLETED)
+
+    totals["seconds"] = time.perf_counter() - start
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render MIDI for every prompt/structure in a JSONL file")
+    parser.add_argument("input", help="JSONL file: {\"id\": ..., \"prompt\": ...} or {\"id\": ..., \"structure\": {...}}")
+    parser.add_argument("--out-dir", default=os.path.join(MIDI_OUTPUT_DIR, "batch"))
+    parser.add_argument("--manifest", help="manifest path (default: <out-dir>/manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--bars", type=int, default=DEFAULT_BARS)
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of skipping finished ids")
+    args = parser.parse_args(argv)
+
+    print(f"🎵 Batch rendering {args.input} -> {args.out_dir}")
+    totals = run_batch(args.input, args.out_dir, args.manifest, args.workers, args.chunk_size,
+                       args.bars, resume=not args.no_resume)
+    rate = totals["ok"] / totals["seconds"] if totals["seconds"] else 0.0
+    print(f"✅ {totals['ok']} rendered, {totals['errors']} errors, {totals['skipped']} skipped "
+          f"in {totals['seconds']:.1f}s ({rate:.0f} items/s)")
+    return 1 if totals["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Offline batch mode: transcribe every audio file in a backlog.
+
+Paths are streamed (directories are walked lazily, "-" reads paths from
+stdin), audio is decoded to 16 kHz by a pool of reader threads, and
+decoding fans out over a fixed number of worker processes that each keep
+one Whisper model resident. At most a bounded number of files is in flight,
+so memory stays flat however long the backlog is. One JSONL line is
+appended per file, with its timing and real-time factor; an interrupted run
+skips files already transcribed.
+
+Usage: python batch_transcribe.py recordings/ --output transcripts.jsonl --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import BATCH_TRANSCRIBE_READERS, BATCH_TRANSCRIBE_OUTPUT
+import whisper_transcriber
+from whisper_transcriber import decode_options, to_whisper_audio, WHISPER_SAMPLE_RATE
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus", ".webm")
+
+def iter_audio_paths(inputs):
+    """Yield audio file paths from files, directories (walked in sorted
+    order) and "-" (one path per line on stdin) without listing them all first"""
+    for source in inputs:
+        if source == "-":
+            for line in sys.stdin:
+                if line.strip():
+                    yield line.strip()
+        elif os.path.isdir(source):
+            for directory, subdirectories, names in os.walk(source):
+                subdirectories.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        yield os.path.join(directory, name)
+        else:
+            yield source
+
+def read_audio(path):
+    """16 kHz mono float32 samples of an audio file"""
+    if path.lower().endswith(".wav"):
+        import scipy.io.wavfile
+        samplerate, audio = scipy.io.wavfile.read(path)
+        return to_whisper_audio(audio, samplerate)
+    from faster_whisper import decode_audio  # compressed formats go through PyAV
+    return decode_audio(path, sampling_rate=WHISPER_SAMPLE_RATE)
+
+def _read(index, path):
+    """Reader thread: (row so far, audio or None)"""
+    row = {"path": path, "index": index}
+    start = time.perf_counter()
+    try:
+        audio = read_audio(path)
+    except Exception as e:
+        audio = None
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    else:
+        row["audio_seconds"] = round(len(audio) / WHISPER_SAMPLE_RATE, 3)
+    row["read_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return row, audio
+
+def _load_worker_model(model_args):
+    """Process initializer: load this worker's resident model up front"""
+    try:
+        whisper_transcriber.get_model(*model_args)
+    except Exception:
+        pass  # reported on the first file instead of breaking the pool
+
+def _transcribe(row, audio, model_args, options):
+    """Worker: decode one file with the process's resident model"""
+    row = dict(row, worker=os.getpid())
+    start = time.perf_counter()
+    try:
+        model = whisper_transcriber.get_model(*model_args)
+        segments, _ = model.transcribe(audio, **options)
+        text = "".join(seg.text for seg in segments).strip()
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    else:
+        row.update(status="ok", text=text)
+    seconds = time.perf_counter() - start
+    row["transcribe_ms"] = round(seconds * 1000, 3)
+    if row.get("audio_seconds"):
+        row["rtf"] = round(seconds / row["audio_seconds"], 4)
+    return row
+
+def transcribe_many(paths, workers=None, readers=BATCH_TRANSCRIBE_READERS, model_size=None, compute_type=None,
+                    cpu_threads=None, max_in_flight=None, mp_context=None, **decode_overrides):
+    """Transcribe `paths` (any iterable, consumed lazily); yields one row per
+    file in completion order, with its input "index".
+
+    `workers` processes each hold one model (workers=0 decodes in this
+    process instead); by default there is one per CPU with one CTranslate2
+    thread each. Decoded audio for at most `max_in_flight` files is held
+    at a time.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if cpu_threads is None:
+        cpu_threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    max_in_flight = max_in_flight or 2 * max(1, workers) + readers
+    model_args = (model_size, compute_type, None, cpu_threads)
+    options = decode_options(**decode_overrides)
+
+    if workers:
+        # Spawned rather than forked: this process is running reader threads
+        decode_pool = ProcessPoolExecutor(
+            workers, mp_context=mp_context or multiprocessing.get_context("spawn"),
+            initializer=_load_worker_model, initargs=(model_args,),
+        )
+    else:
+        decode_pool = ThreadPoolExecutor(1, thread_name_prefix="transcribe")
+    paths = enumerate(paths)
+    pending = {}  # future -> "read" or "transcribe"
+    with ThreadPoolExecutor(readers, thread_name_prefix="audio-reader") as read_pool, decode_pool:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                item = next(paths, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    pending[read_pool.submit(_read, *item)] = "read"
+            if not pending:
+                return
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = pending.pop(future)
+                if stage == "transcribe":
+                    yield future.result()
+                    continue
+                row, audio = future.result()
+                if audio is None:
+                    yield row
+                else:
+                    pending[decode_pool.submit(_transcribe, row, audio, model_args, options)] = "transcribe"
+
+def completed_paths(output_path):
+    """Paths already transcribed successfully according to the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if row.get("status") == "ok":
+                done.add(row["path"])
+    return done
+
+def run_batch(inputs, output_path=BATCH_TRANSCRIBE_OUTPUT, resume=True, progress_every=50, **kwargs):
+    """Transcribe every audio file under `inputs` into `output_path` (JSONL);
+    returns {"ok", "errors", "skipped", "audio_seconds", "seconds", "rtf"}"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    done = completed_paths(output_path) if resume else set()
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+
+    totals = {"ok": 0, "errors": 0, "skipped": 0, "audio_seconds": 0.0}
+    start = time.perf_counter()
+
+    def pending_paths():
+        for path in iter_audio_paths(inputs):
+            if path in done:
+                totals["skipped"] += 1
+                continue
+            yield path
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        for count, row in enumerate(transcribe_many(pending_paths(), **kwargs), 1):
+            output.write(json.dumps(row) + "\n")
+            output.flush()
+            totals["ok" if row["status"] == "ok" else "errors"] += 1
+            totals["audio_seconds"] += row.get("audio_seconds", 0.0)
+            if progress_every and count % progress_every == 0:
+                print(f"🎙️  {totals['ok']} transcribed, {totals['errors']} errors, {totals['skipped']} skipped")
+
+    totals["seconds"] = time.perf_counter() - start
+    totals["rtf"] = totals["seconds"] / totals["audio_seconds"] if totals["audio_seconds"] else 0.0
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe every audio file in directories or path lists")
+    parser.add_argument("inputs", nargs="+", help="audio files, directories, or - to read paths from stdin")
+    parser.add_argument("--output", default=BATCH_TRANSCRIBE_OUTPUT, help="JSONL file, one line per audio file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes, each holding a model (default: CPU count; 0 = in this process)")
+    parser.add_argument("--readers", type=int, default=BATCH_TRANSCRIBE_READERS, help="audio decoding threads")
+    parser.add_argument("--threads", type=int, default=None, help="CTranslate2 threads per worker (default: CPUs / workers)")
+    parser.add_argument("--model", default=None, help="Whisper model size (default: config)")
+    parser.add_argument("--compute-type", default=None, help="e.g. int8, int8_float32 (default: config)")
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of skipping finished files")
+    args = parser.parse_args(argv)
+
+    print(f"🎙️  Batch transcribing {', '.join(args.inputs)} -> {args.output}")
+    totals = run_batch(args.inputs, args.output, resume=not args.no_resume, workers=args.workers,
+                       readers=args.readers, cpu_threads=args.threads, model_size=args.model,
+                       compute_type=args.compute_type)
+    print(f"✅ {totals['ok']} transcribed, {totals['errors']} errors, {totals['skipped']} skipped: "
+          f"{totals['audio_seconds']:.1f}s of audio in {totals['seconds']:.1f}s (RTF {totals['rtf']:.3f})")
+    return 1 if totals["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Timing harness: render cost of 1- to 128-bar arrangements built by tiling
+per-loop event arrays
+"""
+
+import time
+import numpy as np
+from arrangement import Arrangement
+
+RUNS = 50
+STRUCTURE = {
+    "genre": "lo-fi",
+    "bpm": 85,
+    "music_type": "mixed",
+    "pattern": {"kick": "1,2.3,3", "snare": "2,4", "hats": "1,1.3,2,2.3,3,3.3,4,4.3"},
+    "chords": ["Am", "F", "C", "G"],
+    "melody": ["A4", "C5", "E5", "F5"]
+}
+
+def measure(bars):
+    arrangement = Arrangement.from_structure(STRUCTURE, form=(("loop", bars),))
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        data = arrangement.render()
+        times.append(time.perf_counter() - start)
+    notes = sum(len(track) for track in arrangement.tracks())
+    return float(np.median(times)), notes, len(data)
+
+def main():
+    print("🎼 Arrangement render benchmark")
+    print("=" * 60)
+    base = None
+    for bars in (1, 4, 16, 64, 128):
+        median, notes, size = measure(bars)
+        base = base or median
+        print(f"{bars:4d} bars  {notes:6d} notes  {size:7d} bytes  {median * 1000:7.3f} ms  ({median / base:4.1f}x of 1 bar)")
+
+if __name__ == "__main__":
+    main()
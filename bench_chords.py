@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: chord-symbol parsing throughput over a large corpus, cold
+(parser only) and through the LRU-cached pitch lookup
+"""
+
+import random
+import time
+from chords import parse_chord, chord_pitches
+
+ROOTS = ["C", "C#", "Db", "D", "Eb", "E", "F", "F#", "Gb", "G", "Ab", "A", "Bb", "B"]
+QUALITIES = ["", "m", "7", "maj7", "m7", "dim", "dim7", "aug", "sus2", "sus4", "6", "m6",
+             "9", "maj9", "m9", "11", "m11", "13", "m7b5", "7b9", "7#9", "7#11", "add9",
+             "6/9", "7sus4", "mMaj7", "ø", "7b13"]
+CORPUS_SIZE = 200_000
+
+def corpus(size, seed=0):
+    rng = random.Random(seed)
+    symbols = [root + quality for root in ROOTS for quality in QUALITIES]
+    symbols += [symbol + "/" + rng.choice("CDEFGAB") for symbol in symbols[::7]]
+    return [rng.choice(symbols) for _ in range(size)], len(symbols)
+
+def main():
+    symbols, distinct = corpus(CORPUS_SIZE)
+    print("🎹 Chord parser benchmark")
+    print("=" * 60)
+    print(f"{len(symbols):,} symbols, {distinct} distinct")
+
+    parse = parse_chord.__wrapped__  # bypass the cache
+    start = time.perf_counter()
+    for symbol in symbols[:20_000]:
+        parse(symbol)
+    cold = time.perf_counter() - start
+    print(f"  parse (uncached):   {20_000 / cold:12,.0f} symbols/s")
+
+    chord_pitches.cache_clear()
+    parse_chord.cache_clear()
+    start = time.perf_counter()
+    for symbol in symbols:
+        chord_pitches(symbol)
+    cached = time.perf_counter() - start
+    print(f"  chord_pitches (LRU): {len(symbols) / cached:11,.0f} symbols/s")
+    print(f"  cache: {chord_pitches.cache_info()}")
+
+if __name__ == "__main__":
+    main()
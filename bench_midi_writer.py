@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: encode the same note events with the built-in SMF writer and
+with the pretty_midi compatibility backend (notes/s and bytes/s)
+"""
+
+import time
+import numpy as np
+from midi_generator import encode_midi, drum_events, piano_events
+from smf_writer import NoteEvents, DRUM_CHANNEL, DEFAULT_PPQ
+
+RUNS = 20
+
+def typical_tracks():
+    """One bar of drums plus chords and melody, as make_music_midi renders them"""
+    pattern = {"kick": "1,1.3,3", "snare": "2,4", "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"}
+    return [drum_events(pattern), piano_events(["Am", "F", "C", "G"], ["C4", "E4", "G4", "A4"])]
+
+def long_tracks(bars=256):
+    """A long 16th-note drum part, like a multi-bar arrangement"""
+    steps = np.arange(bars * 16)
+    starts = steps * (DEFAULT_PPQ // 4)
+    pitches = np.where(steps % 4 == 0, 36, 42)
+    return [NoteEvents(pitches, np.full(len(steps), 90), starts, starts + DEFAULT_PPQ // 8,
+                       channel=DRUM_CHANNEL, name="Drums")]
+
+def measure(tracks, backend):
+    notes = sum(len(track) for track in tracks)
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        data = encode_midi(tracks, 120, backend=backend)
+        times.append(time.perf_counter() - start)
+    median = float(np.median(times))
+    return median, notes / median, len(data) / median
+
+def main():
+    print("🎹 MIDI writer benchmark")
+    print("=" * 60)
+    for label, tracks in (("typical (1 bar)", typical_tracks()), ("long (256 bars)", long_tracks())):
+        print(f"\n{label}: {sum(len(t) for t in tracks)} notes")
+        results = {}
+        for backend in ("smf", "pretty_midi"):
+            median, notes_per_s, bytes_per_s = measure(tracks, backend)
+            results[backend] = median
+            print(f"  {backend:12s} {median * 1000:8.3f} ms   {notes_per_s:12,.0f} notes/s   {bytes_per_s / 1e6:8.2f} MB/s")
+        print(f"  speedup: {results['pretty_midi'] / results['smf']:.1f}x")
+
+if __name__ == "__main__":
+    main()
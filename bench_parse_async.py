@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk prompt parsing: sequential calls vs. parse_prompts_async,
+against the local mock server with simulated latency and a rate limit
+"""
+
+import sys
+import time
+import openai
+from gpt_parser import parse_prompt_to_structure, parse_prompts
+from mock_openai_server import MockOpenAIServer
+from prompt_cache import PromptCache
+
+LATENCY = 0.1  # seconds per simulated completion
+SERVER_RATE_LIMIT = 50  # requests per second before the mock returns 429
+
+def bench_sequential(url, prompts):
+    """One blocking call after another (the pre-existing behaviour)"""
+    client = openai.OpenAI(api_key="bench", base_url=url)
+    start = time.perf_counter()
+    for prompt in prompts:
+        parse_prompt_to_structure(prompt, client=client, cache=PromptCache(":memory:"))
+    return time.perf_counter() - start
+
+def bench_async(url, prompts, concurrency, requests_per_second):
+    """parse_prompts_async with the given concurrency and client-side rate limit"""
+    stats = {}
+    client = openai.AsyncOpenAI(api_key="bench", base_url=url)
+    start = time.perf_counter()
+    parse_prompts(prompts, concurrency=concurrency, requests_per_second=requests_per_second,
+                  cache=PromptCache(":memory:"), client=client, stats=stats)
+    return time.perf_counter() - start, stats
+
+def main(count=200):
+    print("⏱️  Bulk prompt parsing benchmark")
+    print(f"{count} prompts, {LATENCY * 1000:.0f} ms simulated latency, "
+          f"server limit {SERVER_RATE_LIMIT} req/s")
+    print("=" * 60)
+    prompts = [f"make beat number {i}" for i in range(count)]
+
+    with MockOpenAIServer(latency=LATENCY, rate_limit=SERVER_RATE_LIMIT) as server:
+        sample = prompts[:20]
+        elapsed = bench_sequential(server.url, sample)
+        print(f"sequential          : {len(sample) / elapsed:7.1f} prompts/s")
+
+        for concurrency, rps in [(8, None), (32, None), (32, SERVER_RATE_LIMIT * 0.9)]:
+            elapsed, stats = bench_async(server.url, prompts, concurrency, rps)
+            limit = f"{rps:.0f} req/s" if rps else "no limit"
+            print(f"async x{concurrency:<3} {limit:>9}: {count / elapsed:7.1f} prompts/s "
+                  f"({stats['retries']} retries)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
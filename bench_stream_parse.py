@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Timing harness: time-to-MIDI for a drums-only request, waiting for the whole
+completion vs. streaming it and starting the drum track early
+"""
+
+import json
+import math
+import os
+import tempfile
+import time
+import numpy as np
+import openai
+from gpt_parser import parse_prompt_to_structure, stream_prompt_to_structure
+from midi_generator import make_music_midi, StreamingMidiRenderer
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from prompt_cache import PromptCache
+
+TOKEN_DELAY = 0.02  # seconds between streamed chunks (~50 tokens/s)
+RUNS = 5
+PROMPT = "give me a beat"
+
+def time_blocking(client, filename):
+    """Full completion, then json.loads, then render"""
+    start = time.perf_counter()
+    parsed = parse_prompt_to_structure(PROMPT, client=client, cache=PromptCache(":memory:"))
+    make_music_midi(parsed, filename)
+    return time.perf_counter() - start
+
+def time_streaming(client, filename):
+    """Streamed completion; the drum file is ready when `pattern` closes"""
+    renderer = StreamingMidiRenderer(filename)
+    start = time.perf_counter()
+    parsed = stream_prompt_to_structure(PROMPT, on_field=renderer.on_field,
+                                        client=client, cache=PromptCache(":memory:"))
+    done = time.perf_counter()
+    early = renderer.written is not None
+    renderer.finish(parsed)
+    ready = renderer.drums_ready_at if early else time.perf_counter()
+    return ready - start, done - start
+
+def main():
+    print("⏱️  Streamed JSON decoding benchmark (drums-only request)")
+    print(f"{TOKEN_DELAY * 1000:.0f} ms per streamed chunk, {RUNS} runs each")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp, MockOpenAIServer(token_delay=TOKEN_DELAY) as server:
+        filename = os.path.join(tmp, "bench.mid")
+        client = openai.OpenAI(api_key="bench", base_url=server.url)
+
+        # The blocking path sees the same generation time, delivered all at once
+        chunks = math.ceil(len(json.dumps(DEFAULT_STRUCTURE)) / 4) + 1
+        with MockOpenAIServer(latency=TOKEN_DELAY * chunks) as blocking_server:
+            blocking_client = openai.OpenAI(api_key="bench", base_url=blocking_server.url)
+            blocking = [time_blocking(blocking_client, filename) for _ in range(RUNS)]
+
+        streamed = [time_streaming(client, filename) for _ in range(RUNS)]
+
+    ready = [r for r, _ in streamed]
+    total = [t for _, t in streamed]
+    print(f"Blocking   : MIDI ready after {np.median(blocking) * 1000:7.1f} ms")
+    print(f"Streaming  : MIDI ready after {np.median(ready) * 1000:7.1f} ms "
+          f"(stream finished at {np.median(total) * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
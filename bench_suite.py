@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark suite for the whole pipeline.
+
+Every benchmark is a setup function registered with @benchmark that returns
+the callable to time. Each one is auto-calibrated to run for at least
+--min-time per repeat; the median per-call time is compared with the stored
+baseline and anything slower by more than --threshold is a regression
+(exit status 1).
+
+Usage:
+    python bench_suite.py                      # run and compare with the baseline
+    python bench_suite.py --save-baseline      # record a new baseline
+    python bench_suite.py -k render --quick    # a subset, fewer repeats
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+from config import BENCH_BASELINE_PATH, BENCH_REGRESSION_THRESHOLD
+
+BENCHMARKS = {}  # name -> setup function
+THRESHOLDS = {}  # name -> allowed slowdown for noisy (I/O-bound) benchmarks
+
+def benchmark(name, threshold=None):
+    """Register a setup function; it returns the zero-argument callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        if threshold is not None:
+            THRESHOLDS[name] = threshold
+        return setup
+    return register
+
+class Skip(Exception):
+    """Raised by a setup function when a benchmark can't run here"""
+
+# --- MIDI rendering ---------------------------------------------------------
+
+def _drum_events(notes):
+    from smf_writer import NoteEvents, DRUM_CHANNEL
+    steps = np.arange(notes)
+    starts = steps * 120
+    return NoteEvents(np.where(steps % 4 == 0, 36, 42), np.full(notes, 90), starts, starts + 60,
+                      channel=DRUM_CHANNEL, name="Drums")
+
+for _notes in (16, 256, 4096):
+    @benchmark(f"render.smf.{_notes}_notes")
+    def _setup_smf(notes=_notes):
+        from smf_writer import encode_smf
+        tracks = [_drum_events(notes)]
+        return lambda: encode_smf(tracks, 120)
+
+@benchmark("render.structure.4_bars")
+def _setup_render_structure():
+    from midi_generator import render_midi_bytes
+    from fast_parser import GENRE_TEMPLATES
+    structure = dict(GENRE_TEMPLATES["lo-fi"], genre="lo-fi")
+    return lambda: render_midi_bytes(structure)
+
+@benchmark("render.preview.4_bars")
+def _setup_preview():
+    from preview_synth import render_preview
+    from fast_parser import GENRE_TEMPLATES
+    structure = dict(GENRE_TEMPLATES["lo-fi"], genre="lo-fi")
+    render_preview(structure)  # one-shots and piano tones are cached after the first render
+    return lambda: render_preview(structure)
+
+@benchmark("render.arrangement.128_bars")
+def _setup_arrangement():
+    from arrangement import Arrangement
+    from fast_parser import GENRE_TEMPLATES
+    arrangement = Arrangement.from_structure(dict(GENRE_TEMPLATES["lo-fi"]), form=(("song", 128),))
+    return arrangement.render
+
+# --- Parsing ------------------------------------------------------------------
+
+@benchmark("parse.step_grid.positions")
+def _setup_positions():
+    from step_grid import parse_positions
+    from fast_parser import SIXTEENTHS
+    parse = parse_positions.__wrapped__  # uncached: measure the parser itself
+    lines = [SIXTEENTHS, "1,1.5,2,2.5,3,3.5,4,4.5", "1,2.3,3,3.3", "1.2,1.4,1.6,1.8"]
+    return lambda: [parse(line) for line in lines]
+
+@benchmark("parse.fast_path.prompt")
+def _setup_fast_path():
+    from fast_parser import local_parse
+    prompts = ["make a trap beat at 140 bpm", "lo-fi chords Am F C G", "house groove @ 124", "a spooky waltz"]
+    return lambda: [local_parse(prompt) for prompt in prompts]
+
+@benchmark("parse.chords.uncached")
+def _setup_chords():
+    from chords import parse_chord
+    parse = parse_chord.__wrapped__
+    symbols = ["Am", "Ebmaj9", "F#m7b5", "G7#9", "C6/9", "Bbm11", "D7(b9)", "C/E"]
+    return lambda: [parse(symbol) for symbol in symbols]
+
+@benchmark("parse.chords.cached_lookup")
+def _setup_chord_lookup():
+    from chords import chord_pitches
+    symbols = ["Am", "Ebmaj9", "F#m7b5", "G7#9", "C6/9", "Bbm11", "D7(b9)", "C/E"]
+    return lambda: [chord_pitches(symbol) for symbol in symbols]
+
+# --- JSON parsing / validation -------------------------------------------------
+
+_RESPONSE = json.dumps({
+    "genre": "lo-fi", "bpm": 85, "music_type": "mixed",
+    "pattern": {"kick": "1,2.3,3", "snare": "2,4", "hats": "1,1.3,2,2.3,3,3.3,4,4.3"},
+    "chords": ["Am7", "Fmaj7", "C", "G"], "melody": ["A4", "C5", "E5", "F5"],
+})
+
+@benchmark("json.loads_and_validate")
+def _setup_validate():
+    from music_schema import normalize_structure
+    return lambda: normalize_structure(json.loads(_RESPONSE))
+
+@benchmark("json.incremental_stream")
+def _setup_incremental():
+    from json_stream import IncrementalJSONObject
+    chunks = [_RESPONSE[i:i + 4] for i in range(0, len(_RESPONSE), 4)]
+
+    def run():
+        decoder = IncrementalJSONObject()
+        for chunk in chunks:
+            decoder.feed(chunk)
+        return decoder.fields
+    return run
+
+# --- Transcription ----------------------------------------------------------------
+
+@benchmark("whisper.transcribe.tiny_3s", threshold=0.5)
+def _setup_transcribe():
+    try:
+        from whisper_transcriber import get_model, to_whisper_audio, decode_options
+    except Exception as e:  # no audio stack / model runtime on this machine
+        raise Skip(f"whisper unavailable: {e}")
+    # Synthetic, deterministic input: three seconds of a gliding tone with noise
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * 16000) / 16000
+    audio = (0.2 * np.sin(2 * np.pi * (220 + 60 * t) * t) + 0.01 * rng.standard_normal(t.size)).astype(np.float32)
+    try:
+        model = get_model("tiny", "int8", "cpu")
+    except Exception as e:
+        raise Skip(f"tiny model unavailable: {e}")
+
+    options = decode_options()  # the profile the app decodes with
+
+    def run():
+        segments, _ = model.transcribe(to_whisper_audio(audio, 16000), **options)
+        return list(segments)
+    return run
+
+# --- GPT path against the local mock server --------------------------------------
+
+def _mock_client():
+    import atexit
+    import openai
+    from mock_openai_server import MockOpenAIServer
+    server = MockOpenAIServer().start()
+    atexit.register(server.stop)
+    return openai.OpenAI(api_key="bench", base_url=server.url)
+
+@benchmark("gpt.mock_roundtrip", threshold=0.5)
+def _setup_gpt():
+    from gpt_parser import parse_prompt_to_structure
+    from prompt_cache import PromptCache
+    client = _mock_client()
+    return lambda: parse_prompt_to_structure("something nobody has asked for", client=client,
+                                             cache=PromptCache(":memory:"))
+
+@benchmark("gpt.mock_stream", threshold=0.5)
+def _setup_gpt_stream():
+    from gpt_parser import stream_prompt_to_structure
+    from prompt_cache import PromptCache
+    client = _mock_client()
+    return lambda: stream_prompt_to_structure("something nobody has asked for", client=client,
+                                              cache=PromptCache(":memory:"))
+
+# --- Harness ------------------------------------------------------------------------
+
+def measure(fn, min_time=0.1, repeats=5):
+    """Median/min/stdev seconds per call over `repeats` calibrated batches"""
+    fn()  # warm caches, imports and lazy initialisation
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeats": repeats,
+    }
+
+def run_suite(pattern=None, min_time=0.1, repeats=5):
+    """{name: stats or {"skipped": reason}} for every matching benchmark"""
+    import contextlib
+    import io
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            # The code under test prints progress; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn = setup()
+                results[name] = measure(fn, min_time, repeats)
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+    return results
+
+def compare(results, baseline, threshold=BENCH_REGRESSION_THRESHOLD):
+    """[(name, ratio)] for benchmarks slower than baseline by more than threshold
+    (or their own, looser, registered threshold)"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median" not in base or "median" not in stats:
+            continue
+        ratio = stats["median"] / base["median"]
+        if ratio > 1 + max(threshold, THRESHOLDS.get(name, 0.0)):
+            regressions.append((name, ratio))
+    return regressions
+
+def machine_info():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "numpy": np.__version__}
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, results, previous=None):
+    """Write results; benchmarks not re-run (filtered out) keep their old values"""
+    merged = dict((previous or {}).get("results", {}))
+    merged.update({name: stats for name, stats in results.items() if "median" in stats})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine_info(), "results": merged}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare with a baseline")
+    parser.add_argument("-k", dest="pattern", help="only benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=BENCH_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=BENCH_REGRESSION_THRESHOLD,
+                        help="allowed slowdown before failing, e.g. 0.25 = 25%%")
+    parser.add_argument("--quick", action="store_true", help="3 short repeats per benchmark")
+    parser.add_argument("--json", help="also write this run's results here")
+    args = parser.parse_args(argv)
+
+    min_time, repeats = (0.02, 3) if args.quick else (0.1, 5)
+    baseline = load_baseline(args.baseline)
+    results = run_suite(args.pattern, min_time, repeats)
+
+    print("📊 Benchmark suite")
+    print("=" * 72)
+    for name, stats in results.items():
+        if "skipped" in stats:
+            print(f"{name:32s}   skipped ({stats['skipped'][:60]})")
+            continue
+        base = baseline.get("results", {}).get(name)
+        change = f"{(stats['median'] / base['median'] - 1) * 100:+6.1f}%" if base else "   new"
+        print(f"{name:32s} {_format_time(stats['median'])}  ±{_format_time(stats['stdev']).strip():>10}  {change}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine_info(), "results": results}, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        limit = 1 + max(args.threshold, THRESHOLDS.get(name, 0.0))
+        print(f"❌ {name} is {ratio:.2f}x the baseline (threshold {limit:.2f}x)")
+    if baseline and baseline.get("machine") != machine_info():
+        print("⚠️  Baseline was recorded on a different machine; compare with care")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Sweep Whisper decode settings on reference clips: real-time factor and WER.
+
+Clips are <name>.wav files with the reference transcript next to them in
+<name>.txt (default directory: config.WHISPER_BENCH_CLIPS_DIR). Every
+combination of compute type, cpu_threads, num_workers and beam size is
+loaded once, warmed up, and then decodes all clips (num_workers at a time);
+the remaining options come from the configured decode profile.
+
+  RTF   decode wall time / audio duration (below 1 is faster than real time)
+  WER   word errors / reference words, over all clips
+
+Usage: python bench_whisper_decode.py [--clips DIR] [--model base]
+           [--compute-types int8,int8_float32,float32] [--threads 1,2,4]
+           [--workers 1] [--beams 1,5] [--max-wer-increase 0.02]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.io.wavfile
+import whisper_transcriber
+from config import WHISPER_BENCH_CLIPS_DIR, WHISPER_MODEL_SIZE
+from whisper_transcriber import decode_options, to_whisper_audio, WHISPER_SAMPLE_RATE
+
+def normalize_words(text):
+    """Lower-case words without punctuation ("140 BPM." -> ["140", "bpm"])"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def word_errors(reference, hypothesis):
+    """(substitutions + deletions + insertions, reference word count)"""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        row = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            row.append(min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = row
+    return previous[-1], len(ref)
+
+def load_clips(directory=WHISPER_BENCH_CLIPS_DIR):
+    """[(name, 16 kHz float32 audio, reference text)] for every .wav with a .txt"""
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        reference_path = os.path.join(directory, stem + ".txt")
+        if ext.lower() != ".wav" or not os.path.exists(reference_path):
+            continue
+        samplerate, audio = scipy.io.wavfile.read(os.path.join(directory, name))
+        with open(reference_path, encoding="utf-8") as f:
+            clips.append((stem, to_whisper_audio(audio, samplerate), f.read().strip()))
+    if not clips:
+        raise FileNotFoundError(f"no <name>.wav + <name>.txt clips in {directory}")
+    return clips
+
+def run_setting(clips, model_size=WHISPER_MODEL_SIZE, compute_type="int8", cpu_threads=0, num_workers=1,
+                beam_size=1):
+    """Load one configuration and decode every clip with it"""
+    start = time.perf_counter()
+    model = whisper_transcriber.WhisperModel(model_size, device="cpu", compute_type=compute_type,
+                                             cpu_threads=cpu_threads, num_workers=num_workers)
+    load_seconds = time.perf_counter() - start
+    options = decode_options(beam_size=beam_size)
+
+    def decode(audio):
+        segments, _ = model.transcribe(audio, **options)
+        return "".join(seg.text for seg in segments).strip()
+
+    decode(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32))  # warm-up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(num_workers) as pool:
+        texts = list(pool.map(decode, [audio for _, audio, _ in clips]))
+    seconds = time.perf_counter() - start
+
+    errors = words = 0
+    for (_, _, reference), text in zip(clips, texts):
+        clip_errors, clip_words = word_errors(reference, text)
+        errors += clip_errors
+        words += clip_words
+    audio_seconds = sum(len(audio) for _, audio, _ in clips) / WHISPER_SAMPLE_RATE
+    return {
+        "compute_type": compute_type, "cpu_threads": cpu_threads,
+        "num_workers": num_workers, "beam_size": beam_size,
+        "load_seconds": load_seconds, "seconds": seconds,
+        "rtf": seconds / audio_seconds, "wer": errors / max(words, 1),
+    }
+
+def sweep(clips, model_size=WHISPER_MODEL_SIZE, compute_types=("int8", "int8_float32", "float32"),
+          threads=(1, 2, 4), workers=(1,), beams=(1, 5)):
+    """run_setting for every combination, in order"""
+    results = []
+    for compute_type, cpu_threads, num_workers, beam_size in itertools.product(compute_types, threads, workers, beams):
+        result = run_setting(clips, model_size, compute_type, cpu_threads, num_workers, beam_size)
+        print(f"   {compute_type:<13} threads={cpu_threads:<2} workers={num_workers:<2} beam={beam_size:<2} "
+              f"RTF {result['rtf']:.3f}  WER {result['wer']:.1%}")
+        results.append(result)
+    return results
+
+def pick(results, max_wer_increase=0.02):
+    """Fastest setting whose WER is within `max_wer_increase` of the best one"""
+    best_wer = min(result["wer"] for result in results)
+    return min((result for result in results if result["wer"] <= best_wer + max_wer_increase),
+               key=lambda result: result["rtf"])
+
+def _list(cast):
+    return lambda value: tuple(cast(item) for item in value.split(","))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep Whisper decode settings (RTF and WER)")
+    parser.add_argument("--clips", default=WHISPER_BENCH_CLIPS_DIR, help="directory of <name>.wav + <name>.txt")
+    parser.add_argument("--model", default=WHISPER_MODEL_SIZE)
+    parser.add_argument("--compute-types", type=_list(str), default=("int8", "int8_float32", "float32"))
+    parser.add_argument("--threads", type=_list(int), default=(1, 2, 4), help="cpu_threads (0 = CTranslate2 picks)")
+    parser.add_argument("--workers", type=_list(int), default=(1,), help="num_workers (clips decoded at once)")
+    parser.add_argument("--beams", type=_list(int), default=(1, 5), help="beam sizes (1 = greedy)")
+    parser.add_argument("--max-wer-increase", type=float, default=0.02)
+    parser.add_argument("--json", help="also write every result here")
+    args = parser.parse_args(argv)
+
+    clips = load_clips(args.clips)
+    audio_seconds = sum(len(audio) for _, audio, _ in clips) / WHISPER_SAMPLE_RATE
+    print(f"🎙️  Whisper '{args.model}' decode sweep: {len(clips)} clips, {audio_seconds:.1f}s of audio")
+    results = sweep(clips, args.model, args.compute_types, args.threads, args.workers, args.beams)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    best = pick(results, args.max_wer_increase)
+    print(f"✅ Fastest within {args.max_wer_increase:.0%} of the best WER: RTF {best['rtf']:.3f}, WER {best['wer']:.1%}")
+    print(f'   WHISPER_COMPUTE_TYPE = "{best["compute_type"]}"')
+    print(f"   WHISPER_CPU_THREADS = {best['cpu_threads']}")
+    print(f"   WHISPER_NUM_WORKERS = {best['num_workers']}")
+    print(f"   WHISPER_BEAM_SIZE = {best['beam_size']}")
+    return results
+
+if __name__ == "__main__":
+    main()
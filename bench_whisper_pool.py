@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs. warm transcription latency with the Whisper model pool
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import scipy.io.wavfile
+import whisper_transcriber
+
+def make_test_clip(path, seconds=3, samplerate=16000):
+    """Write a short synthetic clip (a quiet tone) to transcribe"""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    audio = (0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    scipy.io.wavfile.write(path, samplerate, audio)
+
+def bench_pool(requests=5, model_size=None):
+    """Time per-request latency with and without a resident model"""
+    print("⏱️  Whisper model pool benchmark")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "clip.wav")
+        make_test_clip(clip)
+
+        # Cold: every request starts with an empty pool (the old behaviour)
+        cold = []
+        for _ in range(requests):
+            whisper_transcriber.clear_model_pool()
+            start = time.perf_counter()
+            list(whisper_transcriber.get_model(model_size).transcribe(clip)[0])
+            cold.append(time.perf_counter() - start)
+
+        # Warm: load once up front, then reuse
+        whisper_transcriber.clear_model_pool()
+        whisper_transcriber.warm_up(model_size)
+        warm = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            list(whisper_transcriber.get_model(model_size).transcribe(clip)[0])
+            warm.append(time.perf_counter() - start)
+
+    print(f"Cold: median {np.median(cold) * 1000:.1f} ms per request")
+    print(f"Warm: median {np.median(warm) * 1000:.1f} ms per request")
+    print(f"🚀 Speed-up: {np.median(cold) / np.median(warm):.1f}x")
+    return cold, warm
+
+if __name__ == "__main__":
+    bench_pool(model_size=sys.argv[1] if len(sys.argv) > 1 else None)
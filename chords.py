@@ -0,0 +1,176 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+PITCH_CLASSES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+ACCIDENTALS = {"": 0, "#": 1, "b": -1, "♯": 1, "♭": -1}
+
+# Close-position roots sit at or below middle C (Db3..C4)
+ROOT_PITCHES = np.array([60 - (-pc) % 12 for pc in range(12)], dtype=np.int64)
+
+# Scale degree -> semitones above the root
+DEGREES = {2: 2, 3: 4, 4: 5, 5: 7, 6: 9, 7: 10, 9: 14, 11: 17, 13: 21}
+
+ChordSymbol = namedtuple("ChordSymbol", ["root", "intervals", "bass"])
+
+_SYMBOL = re.compile(r"^([A-G])([#b♯♭]?)(.*?)(?:/([A-G])([#b♯♭]?))?$")
+_TRIADS = [  # longest first
+    ("mmaj", (0, 3, 7)), ("min", (0, 3, 7)), ("dim", (0, 3, 6)), ("aug", (0, 4, 8)),
+    ("maj", (0, 4, 7)), ("sus2", (0, 2, 7)), ("sus4", (0, 5, 7)), ("sus", (0, 5, 7)),
+    ("mM", (0, 3, 7)), ("m", (0, 3, 7)), ("-", (0, 3, 7)), ("°", (0, 3, 6)), ("ø", (0, 3, 6)), ("+", (0, 4, 8)),
+    ("M", (0, 4, 7)), ("Δ", (0, 4, 7)),
+]
+_TOKEN = re.compile(r"maj|add|sus|[#b♯♭]?\d+")
+
+def pitch_class(name, accidental=""):
+    """'E', 'b' -> 3"""
+    return (PITCH_CLASSES[name.upper()] + ACCIDENTALS[accidental]) % 12
+
+def _seventh(triad_name, is_major):
+    if is_major or triad_name in ("mmaj", "mM", "maj", "M", "Δ"):
+        return 11
+    if triad_name == "°" or triad_name == "dim":
+        return 9  # diminished seventh
+    return 10
+
+@lru_cache(maxsize=4096)
+def parse_chord(symbol):
+    """Chord symbol -> ChordSymbol(root pitch class, intervals, bass pitch class or None).
+
+    Handles qualities (m, min, -, dim, °, aug, +, sus2/4, maj/M/Δ, ø, and
+    minor-major mM/mMaj/m(maj7)), sevenths
+    and extensions (6, 7, 9, 11, 13, 69), add-tones, altered tones (b5, #5,
+    b9, #9, #11, b13) and slash bass. Raises ValueError for anything else.
+    """
+    text = symbol.strip().replace(" ", "").replace("(", "").replace(")", "").replace(",", "")
+    match = _SYMBOL.match(text)
+    if not match:
+        raise ValueError(f"Not a chord symbol: {symbol!r}")
+    root, accidental, rest, bass, bass_accidental = match.groups()
+    rest = rest.replace("Maj", "maj")
+    if rest.startswith("6/9"):
+        rest = "69" + rest[3:]
+
+    triad_name, triad = "", (0, 4, 7)
+    for name, intervals in _TRIADS:
+        if name == "m" and rest.startswith("maj"):
+            continue  # "maj7", not minor + "aj7"
+        if rest.startswith(name) and not (name == "maj" and rest[3:4].isdigit()):
+            triad_name, triad = name, intervals
+            rest = rest[len(name):]
+            break
+    if rest == "5" and not triad_name:
+        return ChordSymbol(pitch_class(root, accidental), (0, 7), None if bass is None else pitch_class(bass, bass_accidental))
+
+    notes = set(triad)
+    if triad_name == "ø":
+        notes.add(10)
+    if triad_name in ("mmaj", "mM"):
+        notes.add(11)
+    pending_add = False
+    major_extension = False
+    for token in _TOKEN.findall(rest):
+        consumed = True
+        if token == "maj":
+            major_extension = True
+        elif token == "add":
+            pending_add = True
+        elif token == "sus":
+            pending_add = "sus"
+        elif token[0] in "#b♯♭":
+            degree = int(token[1:])
+            if degree not in DEGREES:
+                raise ValueError(f"Unknown alteration {token!r} in {symbol!r}")
+            natural = DEGREES[degree]
+            notes.discard(natural)
+            notes.add(natural + ACCIDENTALS[token[0]])
+        else:
+            number = int(token)
+            if pending_add == "sus" and number in (2, 4):
+                notes.difference_update((3, 4))
+                notes.add(DEGREES[number])
+            elif pending_add:
+                if number not in DEGREES:
+                    raise ValueError(f"Unknown added tone {token!r} in {symbol!r}")
+                notes.add(DEGREES[number])
+            elif number == 6:
+                notes.add(9)
+            elif number == 69:
+                notes.update((9, 14))
+            elif number in (7, 9, 11, 13):
+                notes.add(_seventh(triad_name, major_extension))
+                if number >= 9:
+                    notes.add(14)
+                if number >= 11 and (number == 11 or triad_name in ("m", "min", "-")):
+                    notes.add(17)
+                if number == 13:
+                    notes.add(21)
+            else:
+                consumed = False
+            pending_add = False
+            major_extension = False
+        if not consumed:
+            raise ValueError(f"Unknown extension {token!r} in {symbol!r}")
+    if _TOKEN.sub("", rest):
+        raise ValueError(f"Unrecognised text in chord symbol {symbol!r}")
+
+    return ChordSymbol(
+        pitch_class(root, accidental),
+        tuple(sorted(notes)),
+        None if bass is None else pitch_class(bass, bass_accidental),
+    )
+
+@lru_cache(maxsize=256)
+def voicing_table(intervals):
+    """Close voicings of one chord quality for all 12 roots (12 x len(intervals))"""
+    table = ROOT_PITCHES[:, None] + np.array(intervals, dtype=np.int64)[None, :]
+    table.setflags(write=False)
+    return table
+
+# The qualities GPT uses most, built up front
+for _symbol in ("C", "Cm", "C7", "Cmaj7", "Cm7", "Cdim", "Caug", "Csus4", "Cm7b5", "C9", "Cm9", "Cmaj9"):
+    voicing_table(parse_chord(_symbol).intervals)
+
+@lru_cache(maxsize=4096)
+def chord_pitches(symbol):
+    """MIDI pitches of a chord symbol in close position (read-only array);
+    a slash bass goes below the chord"""
+    chord = parse_chord(symbol)
+    pitches = voicing_table(chord.intervals)[chord.root]
+    if chord.bass is not None:
+        bass = ROOT_PITCHES[chord.bass]
+        while bass >= pitches[0]:
+            bass -= 12
+        pitches = np.concatenate(([bass], pitches))
+        pitches.setflags(write=False)
+    return pitches
+
+def _candidates(pitches, low, high):
+    """Every inversion and octave placement of a chord within [low, high]"""
+    n = len(pitches)
+    inversions = np.array([np.concatenate((pitches[i:], pitches[:i] + 12)) for i in range(n)])
+    shifts = np.arange(-3, 3)[:, None, None] * 12
+    candidates = (inversions[None, :, :] + shifts).reshape(-1, n)
+    in_range = (candidates.min(axis=1) >= low) & (candidates.max(axis=1) <= high)
+    return candidates[in_range] if in_range.any() else inversions
+
+def voice_lead(symbols, low=48, high=79):
+    """Pitch arrays for a progression, each voiced to move as little as
+    possible from the previous chord (slash basses stay in the bass)"""
+    voiced = []
+    previous = None
+    for symbol in symbols:
+        pitches = chord_pitches(symbol)
+        chord = parse_chord(symbol)
+        bass = pitches[:1] if chord.bass is not None else pitches[:0]
+        upper = pitches[len(bass):]
+        if previous is not None and len(upper):
+            candidates = _candidates(upper, low, high)
+            # Each voice's distance to the nearest previous voice, both ways
+            distance = np.abs(candidates[:, :, None] - previous[None, None, :])
+            cost = distance.min(axis=2).sum(axis=1) + distance.min(axis=1).sum(axis=1)
+            upper = candidates[int(np.argmin(cost))]
+        previous = upper
+        voiced.append(np.concatenate((bass, upper)))
+    return voiced
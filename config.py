@@ -1,22 +1,133 @@
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+def _find_env_file():
+    """The nearest .env at or above this directory (where load_dotenv looks)"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# Load environment variables from .env file if it exists (python-dotenv is
+# only imported when there is one to read)
+_env_file = _find_env_file()
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+GPT_MODEL = "gpt-4o-mini"  # Using mini for cost efficiency
+GPT_TEMPERATURE = 0.7
+GPT_STRUCTURED_OUTPUT = True  # send the JSON schema in response_format (strict)
+GPT_BATCH_CONCURRENCY = 8  # in-flight requests for bulk parsing
+GPT_REQUESTS_PER_SECOND = 8  # client-side rate limit for bulk parsing
+GPT_MAX_RETRIES = 5  # on 429 / 5xx / connection errors
+
+# OpenAI HTTP connection pool (shared by every caller in the process)
+OPENAI_MAX_CONNECTIONS = 20
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 10
+OPENAI_KEEPALIVE_EXPIRY = 60.0  # seconds an idle connection is kept open
+OPENAI_TIMEOUT = 60.0  # seconds per request
+OPENAI_CONNECT_TIMEOUT = 5.0
+OPENAI_PREWARM_CONNECTION = True  # open the connection while the user is still speaking
+
+# Local rule-based parser tried before the OpenAI call
+FAST_PATH_ENABLED = True
+FAST_PATH_MIN_CONFIDENCE = 1.0  # each unrecognised word costs 0.25, so any one sends the prompt to GPT
+
+# Prompt Response Cache
+PROMPT_CACHE_ENABLED = True
+PROMPT_CACHE_PATH = os.path.join(".cache", "prompt_cache.sqlite3")
+PROMPT_CACHE_TTL = 7 * 24 * 3600  # seconds
+PROMPT_CACHE_MAX_ENTRIES = 10000  # on disk, least recently used evicted first
+PROMPT_CACHE_MEMORY_ENTRIES = 256  # in-process front tier
+PROMPT_CACHE_TOUCH_INTERVAL = 30  # seconds between writes of memory hits' access times to disk
+
+# Rendered MIDI Cache (keyed on the normalized structure); the shared cache is
+# memory-only, the disk tier is used by the CLI, which writes files anyway
+RENDER_CACHE_ENABLED = True
+RENDER_CACHE_DIR = os.path.join(".cache", "midi_renders")
+RENDER_CACHE_MAX_ENTRIES = 5000  # on disk, least recently used evicted first
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RENDER_CACHE_MEMORY_BYTES = 8 * 1024 * 1024  # in-process front tier
 
 # Audio Recording Configuration
 DEFAULT_SAMPLE_RATE = 44100
 DEFAULT_RECORDING_DURATION = 15  # seconds - customizable duration
 
+# Whisper Configuration
+WHISPER_MODEL_SIZE = "base"
+WHISPER_COMPUTE_TYPE = "default"
+WHISPER_DEVICE = "auto"
+WHISPER_CPU_THREADS = 0  # 0 lets CTranslate2 pick
+WHISPER_NUM_WORKERS = 1  # transcriptions one model can run in parallel
+WHISPER_MAX_RESIDENT_MODELS = 2  # models kept loaded before LRU eviction
+
+# Whisper decode profile (bench_whisper_decode.py sweeps these on real clips;
+# "int8" / "int8_float32" compute types and beam size 1 trade accuracy for speed)
+WHISPER_BEAM_SIZE = 5  # 1 = greedy decoding
+WHISPER_LANGUAGE = "en"  # None detects the language first (an extra decoder pass)
+WHISPER_WITHOUT_TIMESTAMPS = True  # we only need the text
+WHISPER_CONDITION_ON_PREVIOUS_TEXT = False  # requests are short; avoids repetition loops
+WHISPER_BENCH_CLIPS_DIR = os.path.join("bench_clips", "whisper")  # <name>.wav + <name>.txt reference
+
 # MIDI Configuration
 DEFAULT_BPM = 90
 DEFAULT_GENRE = "hip-hop"
+MIDI_BACKEND = "smf"  # "smf" (built-in writer) or "pretty_midi"
+MIDI_PPQ = 480  # ticks per quarter note
+DEFAULT_BARS = 4  # length of a rendered loop
+PROGRESSION_BARS = 4  # chords/melody are spread across this many bars, then repeated
+CHORD_VOICE_LEADING = False  # revoice chords to minimise movement between them
+STEP_GRID_RESOLUTION = "16th"  # "16th", "32nd", "8th-triplet" or "16th-triplet"
+
+# Instrumentation (spans, latency histograms, Prometheus/Chrome trace export)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+METRICS_DIR = "metrics"
+METRICS_MAX_SAMPLES = 10000  # per histogram, for percentiles
+TRACE_MAX_EVENTS = 100000
+
+# HTTP service (service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8000
+SERVICE_WORKERS = 4  # threads running transcription and rendering jobs
+SERVICE_QUEUE_SIZE = 32  # jobs admitted (queued + running) before answering 503
+SERVICE_RETRY_AFTER = 1  # seconds, sent with 503 responses
+SERVICE_MAX_AUDIO_BYTES = 10 * 1024 * 1024
+SERVICE_PRELOAD_WHISPER = True  # load the model at startup instead of on the first request
+
+# Streamlit web interface
+STREAMLIT_BACKGROUND_JOBS = os.getenv("STREAMLIT_BACKGROUND_JOBS", "1").lower() not in ("0", "false", "no")
+STREAMLIT_JOB_WORKERS = 8  # generation jobs running at once, across all sessions (mostly waiting on GPT)
+STREAMLIT_MAX_JOBS = 256  # finished jobs kept for download before the oldest are dropped
+STREAMLIT_POLL_INTERVAL = 0.5  # seconds between progress refreshes while a job runs
+
+# Batch transcription (batch_transcribe.py); workers default to one per CPU,
+# each holding its own model in memory
+BATCH_TRANSCRIBE_READERS = 4  # threads decoding audio files ahead of the workers
+BATCH_TRANSCRIBE_OUTPUT = "transcripts.jsonl"
+
+# In-browser audio preview (preview_synth.py)
+PREVIEW_ENABLED = True
+PREVIEW_SAMPLE_RATE = 22050
+PREVIEW_CACHE_ENTRIES = 32  # rendered WAVs kept in memory
+
+# Startup (app.py): heavy dependencies are imported by the stage that uses them
+STARTUP_BUDGET_SECONDS = 0.5  # launch to the text-mode prompt, enforced by test_startup.py
+
+# Benchmark suite
+BENCH_BASELINE_PATH = "bench_baseline.json"
+BENCH_REGRESSION_THRESHOLD = 0.25  # fail when a median gets more than 25% slower
 
 # File Paths
 MIDI_OUTPUT_DIR = "midi_output"
+MIDI_STORE_ENABLED = False  # also keep web renders in the content-addressed store
+MIDI_STORE_DIR = os.path.join(MIDI_OUTPUT_DIR, "store")
 AUDIO_INPUT_FILE = "input.wav"
 
 def validate_setup():
@@ -28,6 +139,10 @@ def validate_setup():
         return False
     return True
 
-def get_openai_key():
-    """Get OpenAI API key with fallback"""
-    return OPENAI_API_KEY or input("Enter your OpenAI API key: ").strip() 
\ No newline at end of file
+def get_openai_key(ask=True):
+    """Get OpenAI API key with fallback (prompting for it unless ask=False)"""
+    # Re-read the environment: the web interface sets the key after import
+    key = os.getenv("OPENAI_API_KEY") or OPENAI_API_KEY
+    if key or not ask:
+        return key
+    return input("Enter your OpenAI API key: ").strip() 
\ No newline at end of file
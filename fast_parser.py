@@ -0,0 +1,195 @@
+import re
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import FAST_PATH_MIN_CONFIDENCE
+
+# Aliases for the genres the GPT system prompt knows about
+GENRE_ALIASES = {
+    "trap": ["trap"],
+    "lo-fi": ["lo-fi", "lofi", "lo fi", "low fi", "low-fi"],
+    "house": ["house", "deep house", "tech house"],
+    "hip-hop": ["hip-hop", "hip hop", "hiphop", "boom bap", "boom-bap", "boombap", "rap"],
+    "dubstep": ["dubstep"],
+    "techno": ["techno"],
+    "jazz": ["jazz", "jazzy"],
+    "funk": ["funk", "funky"],
+    "classical": ["classical"],
+    "ambient": ["ambient"],
+}
+
+EIGHTHS = "1,1.3,2,2.3,3,3.3,4,4.3"
+SIXTEENTHS = "1,1.2,1.3,1.4,2,2.2,2.3,2.4,3,3.2,3.3,3.4,4,4.2,4.3,4.4"
+OFFBEATS = "1.3,2.3,3.3,4.3"
+DEFAULT_CHORDS = ["Am", "F", "C", "G"]
+DEFAULT_MELODY = ["C4", "E4", "G4", "A4"]
+
+# Genre defaults, following the genre notes in gpt_parser.SYSTEM_PROMPT
+GENRE_TEMPLATES = {
+    "trap": {"bpm": 140, "music_type": "drums",
+             "pattern": {"kick": "1,1.4,2.3,3.3", "snare": "2,4", "hats": SIXTEENTHS}},
+    "lo-fi": {"bpm": 85, "music_type": "mixed",
+              "pattern": {"kick": "1,2.3,3", "snare": "2,4", "hats": EIGHTHS},
+              "chords": ["Am", "F", "C", "G"], "melody": ["A4", "C5", "E5", "F5"]},
+    "house": {"bpm": 126, "music_type": "drums",
+              "pattern": {"kick": "1,2,3,4", "clap": "2,4", "hats": OFFBEATS}},
+    "hip-hop": {"bpm": 90, "music_type": "drums",
+                "pattern": {"kick": "1,2.3,3,3.3", "snare": "2,4", "hats": EIGHTHS}},
+    "dubstep": {"bpm": 140, "music_type": "drums",
+                "pattern": {"kick": "1,2.3", "snare": "3", "hats": EIGHTHS}},
+    "techno": {"bpm": 130, "music_type": "drums",
+               "pattern": {"kick": "1,2,3,4", "clap": "2,4", "hats": OFFBEATS}},
+    "jazz": {"bpm": 120, "music_type": "chords",
+             "pattern": {"kick": "1,3", "snare": "2,4", "hats": "1,2,2.4,3,4,4.4"},
+             "chords": ["Dm7", "G7", "Cmaj7", "Cmaj7"]},
+    "funk": {"bpm": 105, "music_type": "drums",
+             "pattern": {"kick": "1,1.4,2.3,3.3", "snare": "2,4", "hats": SIXTEENTHS}},
+    "classical": {"bpm": 90, "music_type": "melody",
+                  "pattern": {"kick": "1,3", "snare": "2,4", "hats": EIGHTHS},
+                  "melody": ["C4", "E4", "G4", "C5", "B4", "G4", "E4", "D4"]},
+    "ambient": {"bpm": 70, "music_type": "chords",
+                "pattern": {"kick": "1", "hats": "3"},
+                "chords": ["Cmaj7", "Am", "F", "G"]},
+}
+
+_GENRE_RE = re.compile(
+    r"(?<![\w-])(" + "|".join(
+        sorted((re.escape(a) for aliases in GENRE_ALIASES.values() for a in aliases), key=len, reverse=True)
+    ) + r")(?![\w-])"
+)
+_ALIAS_TO_GENRE = {alias: genre for genre, aliases in GENRE_ALIASES.items() for alias in aliases}
+_BPM_RE = re.compile(r"\b(\d{2,3})\s*(?:bpm|beats per minute)\b|(?:\bat|@)\s*(\d{2,3})\b")
+_CHORD_RE = re.compile(r"(?<![\w#])([A-G](?:#|b)?(?:maj7|m7|m|7|dim|aug|sus2|sus4)?)(?![\w#])")
+_DRUMS_RE = re.compile(r"\b(?:beat|beats|drum|drums|rhythm|groove|percussion)\b")
+_CHORDS_RE = re.compile(r"\b(?:chord|chords|progression|harmony)\b")
+_MELODY_RE = re.compile(r"\b(?:melody|melodies|piano|tune|lead)\b")
+_MIXED_RE = re.compile(r"\b(?:mixed|full|song|track|everything)\b")
+_WORD_RE = re.compile(r"[a-z0-9#'-]+")
+_METER_RE = re.compile(r"\b\d+\s*/\s*\d+\b")
+_ARTICLE_RE = re.compile(r"\s+[a-z]")
+SUPPORTED_METERS = frozenset({"4/4"})  # every loop is written in 4/4
+
+# Words that don't change the musical result; anything else lowers confidence
+FILLER_WORDS = frozenset("""
+a an the me my some please can could you i want need would like give make create generate
+produce build write compose play with and at in of for to style type kind sort pattern
+music loop bpm tempo beats per minute song track new simple basic quick classic typical
+standard nice good cool
+""".split())
+
+# Recent fast-path timings in microseconds, for the latency distribution
+_latencies = deque(maxlen=10000)
+_stats = {"attempts": 0, "hits": 0}
+_stats_lock = threading.Lock()
+
+def _detect_music_type(text, has_chord_names):
+    """Pick drums/chords/melody/mixed from the words used; None if unspecified"""
+    wants = {
+        "drums": bool(_DRUMS_RE.search(text)),
+        "chords": has_chord_names or bool(_CHORDS_RE.search(text)),
+        "melody": bool(_MELODY_RE.search(text)),
+    }
+    if _MIXED_RE.search(text) or sum(wants.values()) > 1:
+        return "mixed"
+    for music_type, wanted in wants.items():
+        if wanted:
+            return music_type
+    return None
+
+def _chord_names(prompt):
+    """Chord symbols in the prompt; a capital "A" that opens the prompt or
+    comes before a lowercase word is the article, not a chord"""
+    names = []
+    for match in _CHORD_RE.finditer(prompt):
+        if match.group(1) == "A" and (not prompt[:match.start()].strip() or _ARTICLE_RE.match(prompt, match.end())):
+            continue
+        names.append(match.group(1))
+    return names
+
+def local_parse(prompt):
+    """Deterministically parse a prompt; returns (structure or None, confidence)"""
+    text = prompt.lower()
+
+    genre_match = _GENRE_RE.search(text)
+    if not genre_match:
+        return None, 0.0
+    genre = _ALIAS_TO_GENRE[genre_match.group(1)]
+    template = GENRE_TEMPLATES[genre]
+
+    bpm = template["bpm"]
+    bpm_matches = list(_BPM_RE.finditer(text))
+    bpm_match = bpm_matches[0] if bpm_matches else None
+    if bpm_match:
+        bpm = int(bpm_match.group(1) or bpm_match.group(2))
+        if not 40 <= bpm <= 220:
+            return None, 0.0
+
+    # Chord symbols are case-sensitive, so match against the original prompt;
+    # a lone capital letter is more likely a word than a chord
+    chord_names = _chord_names(prompt)
+    chord_names = chord_names if len(chord_names) >= 2 else []
+
+    music_type = _detect_music_type(text, bool(chord_names)) or template["music_type"]
+
+    # Every remaining word the rules don't understand costs confidence
+    known = text
+    for match in [genre_match] + bpm_matches:
+        known = known.replace(match.group(0), " ")
+    # Time signatures other than 4/4 can't be honoured; each one counts as unknown
+    meters = [re.sub(r"\s", "", meter) for meter in _METER_RE.findall(known)]
+    known = _METER_RE.sub(" ", known)
+    chord_words = {name.lower() for name in chord_names}
+    unknown = [
+        word for word in _WORD_RE.findall(known)
+        if word not in FILLER_WORDS
+        and not _DRUMS_RE.fullmatch(word) and not _CHORDS_RE.fullmatch(word)
+        and not _MELODY_RE.fullmatch(word) and not _MIXED_RE.fullmatch(word)
+        and word not in chord_words
+    ] + [meter for meter in meters if meter not in SUPPORTED_METERS]
+    # Numbers the BPM rule didn't take, and any second tempo, are unknown too
+    unknown += [match.group(0) for match in bpm_matches[1:]]
+    confidence = max(0.0, 1.0 - 0.25 * len(unknown))
+
+    structure = {
+        "genre": genre,
+        "bpm": bpm,
+        "music_type": music_type,
+        "pattern": dict(template["pattern"]),
+        "chords": None,
+        "melody": None,
+    }
+    if music_type in ("chords", "mixed"):
+        structure["chords"] = chord_names or list(template.get("chords", DEFAULT_CHORDS))
+    if music_type in ("melody", "mixed"):
+        structure["melody"] = list(template.get("melody", DEFAULT_MELODY))
+    return structure, confidence
+
+def try_fast_parse(prompt, min_confidence=FAST_PATH_MIN_CONFIDENCE):
+    """Return a locally parsed structure when confident enough, else None"""
+    start = time.perf_counter()
+    structure, confidence = local_parse(prompt)
+    hit = structure is not None and confidence >= min_confidence
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    with _stats_lock:
+        _stats["attempts"] += 1
+        _stats["hits"] += hit
+        _latencies.append(elapsed_us)
+    return structure if hit else None
+
+def fast_path_stats():
+    """Hit rate and latency percentiles (microseconds) of the fast path"""
+    with _stats_lock:
+        attempts, hits = _stats["attempts"], _stats["hits"]
+        latencies = np.fromiter(_latencies, dtype=float)
+    stats = {"attempts": attempts, "hits": hits, "hit_rate": hits / attempts if attempts else 0.0}
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        stats.update({"p50_us": float(p50), "p95_us": float(p95), "p99_us": float(p99)})
+    return stats
+
+def reset_fast_path_stats():
+    """Clear the hit counters and latency samples"""
+    with _stats_lock:
+        _stats["attempts"] = _stats["hits"] = 0
+        _latencies.clear()
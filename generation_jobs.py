@@ -0,0 +1,147 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import STREAMLIT_JOB_WORKERS, STREAMLIT_MAX_JOBS, DEFAULT_BARS
+from gpt_parser import stream_prompt_to_structure
+from midi_generator import StreamingMidiRenderer
+from music_schema import normalize_structure
+from render_cache import structure_key
+
+ACTIVE = ("queued", "recording", "parsing", "rendering")
+
+class Job:
+    """One voice or text generation request.
+
+    The worker thread fills in the transcript, the parsed fields as they
+    stream in and finally the MIDI bytes; UI reruns read a snapshot.
+    """
+
+    def __init__(self, session_id, prompt=None):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.voice = prompt is None
+        self.status = "queued"
+        self.transcript = prompt or ""
+        self.parsed = {}
+        self.structure = None
+        self.midi = None
+        self.key = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def set_field(self, key, value):
+        with self._lock:
+            self.parsed = dict(self.parsed, **{key: value})
+
+    @property
+    def done(self):
+        return self.status not in ACTIVE
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id, "status": self.status, "voice": self.voice,
+                "transcript": self.transcript, "parsed": self.parsed,
+                "structure": self.structure, "midi": self.midi, "key": self.key,
+                "error": self.error, "created": self.created, "finished": self.finished,
+            }
+
+def _record(job):
+    # Imported here: sounddevice needs PortAudio, which text-only servers lack
+    from voice_stream import stream_transcribe
+
+    text = ""
+    for text, is_final in stream_transcribe():
+        job.update(transcript=text)
+    return text
+
+def run_generation(job, client=None, store=None, bars=DEFAULT_BARS, cache=None):
+    """Record (voice jobs), parse and render, reporting progress on `job`;
+    `cache` is the prompt cache (default: the shared one)"""
+    try:
+        text = job.transcript
+        if job.voice:
+            job.update(status="recording")
+            text = _record(job)
+            if not text.strip():
+                raise ValueError("No speech detected, please try again")
+
+        job.update(status="parsing")
+        renderer = StreamingMidiRenderer(filename=None, store=store, bars=bars)
+
+        def on_field(key, value):
+            job.set_field(key, value)
+            renderer.on_field(key, value)
+            if renderer.written is not None and job.midi is None:
+                # A drums-only loop is ready before chords/melody have streamed in
+                early = normalize_structure(renderer.fields).to_dict()
+                job.update(structure=early, midi=renderer.written, key=structure_key(early, bars=bars))
+
+        structure = stream_prompt_to_structure(text, on_field=on_field, client=client, cache=cache)
+        if structure is None:
+            raise ValueError("No OpenAI API key provided")
+
+        job.update(status="rendering", structure=structure)
+        midi = renderer.finish(structure)
+        job.update(status="done", midi=midi, key=structure_key(structure, bars=bars))
+    except Exception as e:
+        job.update(status="error", error=str(e))
+    finally:
+        job.update(finished=time.time())
+    return job
+
+class JobManager:
+    """Process-wide generation jobs on a small thread pool, looked up by id.
+
+    Finished jobs are kept (for their downloads) until more than `max_jobs`
+    exist; then the oldest finished ones are dropped.
+    """
+
+    def __init__(self, workers=STREAMLIT_JOB_WORKERS, max_jobs=STREAMLIT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="generation-job")
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, prompt=None, client=None, store=None, bars=DEFAULT_BARS, wait=False, cache=None):
+        """Start a job (prompt=None records from the microphone); with
+        wait=True it runs in the calling thread instead"""
+        job = Job(session_id, prompt)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        if wait:
+            run_generation(job, client, store, bars, cache)
+        else:
+            self._executor.submit(run_generation, job, client, store, bars, cache)
+        return job
+
+    def _evict(self):
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, session_id):
+        """This session's jobs, newest first"""
+        with self._lock:
+            return [job for job in reversed(self._jobs.values()) if job.session_id == session_id]
+
+    def active(self):
+        with self._lock:
+            return sum(not job.done for job in self._jobs.values())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -1,21 +1,27 @@
-import openai
+import asyncio
 import json
 import os
-from config import get_openai_key
+import random
+import time
+from config import (
+    get_openai_key,
+    GPT_MODEL,
+    GPT_TEMPERATURE,
+    GPT_BATCH_CONCURRENCY,
+    GPT_REQUESTS_PER_SECOND,
+    GPT_MAX_RETRIES,
+    GPT_STRUCTURED_OUTPUT,
+    PROMPT_CACHE_ENABLED,
+    FAST_PATH_ENABLED,
+)
+from prompt_cache import get_prompt_cache, make_cache_key
+from fast_parser import try_fast_parse
+from json_stream import IncrementalJSONObject
+from music_schema import normalize_structure, RESPONSE_FORMAT
+from openai_client import get_client, get_async_client, close_async_clients
+from instrumentation import timed
 
-def parse_prompt_to_structure(prompt):
-    """Convert natural language prompt to structured music instructions"""
-    
-    # Set up OpenAI API key
-    api_key = get_openai_key()
-    if not api_key:
-        print("❌ No OpenAI API key provided!")
-        return None
-    
-    # Initialize OpenAI client with new API
-    client = openai.OpenAI(api_key=api_key)
-    
-    system_msg = """You are a music assistant that converts natural language requests into structured music instructions. 
+SYSTEM_PROMPT = """You are a music assistant that converts natural language requests into structured music instructions. 
     Return ONLY valid JSON with the following structure:
     {
         "genre": "string (e.g., trap, lo-fi, house, hip-hop, dubstep, techno, jazz, funk, classical, ambient)",
@@ -46,127 +52,397 @@ def parse_prompt_to_structure(prompt):
     - Hip-hop: Boom-bap drums, 85-95 BPM
     - Classical: Melodic lines, 60-120 BPM
     - Ambient: Sparse, atmospheric, 60-80 BPM"""
+
+def _build_messages(prompt):
+    """Chat messages for one prompt"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def _completion_kwargs(prompt):
+    """Arguments shared by every chat-completion request"""
+    kwargs = {
+        "model": GPT_MODEL,
+        "messages": _build_messages(prompt),
+        "temperature": GPT_TEMPERATURE
+    }
+    if GPT_STRUCTURED_OUTPUT:
+        # Schema-constrained decoding: the reply is always valid JSON of our shape
+        kwargs["response_format"] = RESPONSE_FORMAT
+    return kwargs
+
+def _malformed_response_fallback(result):
+    """Varied default structure used when GPT output isn't valid JSON"""
+    print(f"Failed to parse GPT response as JSON: {result}")
+    
+    # Create varied fallback patterns
+    fallback_patterns = [
+        {
+            "genre": "jazz",
+            "bpm": 120,
+            "music_type": "chords",
+            "pattern": {
+                "kick": "1,3",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            },
+            "chords": ["Cmaj7", "Dm7", "G7", "Cmaj7"],
+            "melody": None
+        },
+        {
+            "genre": "trap",
+            "bpm": 140,
+            "music_type": "drums",
+            "pattern": {
+                "kick": "1,1.5,2,2.5,3,3.5,4,4.5",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            },
+            "chords": None,
+            "melody": None
+        },
+        {
+            "genre": "lo-fi",
+            "bpm": 85,
+            "music_type": "mixed",
+            "pattern": {
+                "kick": "1,3",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            },
+            "chords": ["Am", "F", "C", "G"],
+            "melody": ["A4", "C5", "E5", "F5"]
+        },
+        {
+            "genre": "classical",
+            "bpm": 90,
+            "music_type": "melody",
+            "pattern": {
+                "kick": "1,3",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            },
+            "chords": None,
+            "melody": ["C4", "E4", "G4", "A4", "C5"]
+        }
+    ]
+    
+    return normalize_structure(random.choice(fallback_patterns)).to_dict()
+
+def _api_error_fallback():
+    """Varied default structure used when the API call fails"""
+    fallback_patterns = [
+        {
+            "genre": "trap",
+            "bpm": 140,
+            "pattern": {
+                "kick": "1,1.5,2,2.5,3,3.5,4,4.5",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            }
+        },
+        {
+            "genre": "lo-fi",
+            "bpm": 85,
+            "pattern": {
+                "kick": "1,3",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            }
+        },
+        {
+            "genre": "house",
+            "bpm": 128,
+            "pattern": {
+                "kick": "1,2,3,4",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            }
+        },
+        {
+            "genre": "hip-hop",
+            "bpm": 90,
+            "pattern": {
+                "kick": "1,1.3,2,2.3",
+                "snare": "2,4",
+                "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+            }
+        }
+    ]
+    
+    return normalize_structure(random.choice(fallback_patterns)).to_dict()
+
+def _structure_from_response(result, cache, cache_key):
+    """Decode and validate the completion text, caching it if it was valid JSON.
+    Returns (structure, "api"), or (fallback structure, "malformed")"""
+    try:
+        parsed = json.loads(result)
+    except json.JSONDecodeError:
+        # If JSON parsing fails, return a varied default structure
+        return _malformed_response_fallback(result), "malformed"
+    parsed = normalize_structure(parsed).to_dict()
+    if cache is not None:
+        cache.put(cache_key, parsed)
+    return parsed, "api"
+
+def _cache_lookup(prompt, cache):
+    """Return (cache_key, cached structure or None)"""
+    if cache is None:
+        return None, None
+    cache_key = make_cache_key(prompt, GPT_MODEL, SYSTEM_PROMPT, GPT_TEMPERATURE)
+    return cache_key, cache.get(cache_key)
+
+def _resolve_locally(prompt, cache):
+    """(structure, "fast_path" | "cache" | None, cache_key) without any API call"""
+    if FAST_PATH_ENABLED:
+        structure = try_fast_parse(prompt)
+        if structure is not None:
+            return structure, "fast_path", None
+    cache_key, cached = _cache_lookup(prompt, cache)
+    return cached, ("cache" if cached is not None else None), cache_key
+
+@timed()
+def parse_prompt_to_structure(prompt, client=None, cache=None):
+    """Convert natural language prompt to structured music instructions"""
+    
+    # Simple genre/BPM requests don't need the LLM at all
+    if FAST_PATH_ENABLED:
+        structure = try_fast_parse(prompt)
+        if structure is not None:
+            print("⚡ Parsed locally (fast path)")
+            return structure
+    
+    # Check the response cache before spending an API call
+    if cache is None and PROMPT_CACHE_ENABLED:
+        cache = get_prompt_cache()
+    cache_key, cached = _cache_lookup(prompt, cache)
+    if cached is not None:
+        print("⚡ Using cached response")
+        return cached
+    
+    if client is None:
+        # Set up OpenAI API key
+        api_key = get_openai_key()
+        if not api_key:
+            print("❌ No OpenAI API key provided!")
+            return None
+        
+        # Shared client: reuses pooled keep-alive connections across calls
+        client = get_client(api_key)
     
     try:
         print("🔄 Attempting OpenAI API call...")
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Using mini for cost efficiency
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
+        response = client.chat.completions.create(**_completion_kwargs(prompt))
         
         print("✅ OpenAI API call successful!")
         result = response.choices[0].message.content.strip()
         
         # Try to parse as JSON
-        try:
-            parsed = json.loads(result)
-            return parsed
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return a varied default structure
-            print(f"Failed to parse GPT response as JSON: {result}")
-            import random
-            
-            # Create varied fallback patterns
-            fallback_patterns = [
-                {
-                    "genre": "jazz",
-                    "bpm": 120,
-                    "music_type": "chords",
-                    "pattern": {
-                        "kick": "1,3",
-                        "snare": "2,4",
-                        "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                    },
-                    "chords": ["Cmaj7", "Dm7", "G7", "Cmaj7"],
-                    "melody": null
-                },
-                {
-                    "genre": "trap",
-                    "bpm": 140,
-                    "music_type": "drums",
-                    "pattern": {
-                        "kick": "1,1.5,2,2.5,3,3.5,4,4.5",
-                        "snare": "2,4",
-                        "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                    },
-                    "chords": null,
-                    "melody": null
-                },
-                {
-                    "genre": "lo-fi",
-                    "bpm": 85,
-                    "music_type": "mixed",
-                    "pattern": {
-                        "kick": "1,3",
-                        "snare": "2,4",
-                        "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                    },
-                    "chords": ["Am", "F", "C", "G"],
-                    "melody": ["A4", "C5", "E5", "F5"]
-                },
-                {
-                    "genre": "classical",
-                    "bpm": 90,
-                    "music_type": "melody",
-                    "pattern": {
-                        "kick": "1,3",
-                        "snare": "2,4",
-                        "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                    },
-                    "chords": null,
-                    "melody": ["C4", "E4", "G4", "A4", "C5"]
-                }
-            ]
-            
-            return random.choice(fallback_patterns)
+        return _structure_from_response(result, cache, cache_key)[0]
             
     except Exception as e:
         print(f"❌ Error calling OpenAI API: {e}")
         print("🔄 Falling back to varied patterns...")
         # Return varied default structure on error
-        import random
+        return _api_error_fallback()
+
+@timed()
+def stream_prompt_to_structure(prompt, on_field=None, client=None, cache=None):
+    """Like parse_prompt_to_structure, but streams the completion and calls
+    on_field(key, value) as soon as each top-level field is complete"""
+    
+    def report(structure):
+        if on_field is not None:
+            for key, value in structure.items():
+                on_field(key, value)
+        return structure
+    
+    if FAST_PATH_ENABLED:
+        structure = try_fast_parse(prompt)
+        if structure is not None:
+            print("⚡ Parsed locally (fast path)")
+            return report(structure)
+    
+    if cache is None and PROMPT_CACHE_ENABLED:
+        cache = get_prompt_cache()
+    cache_key, cached = _cache_lookup(prompt, cache)
+    if cached is not None:
+        print("⚡ Using cached response")
+        return report(cached)
+    
+    if client is None:
+        api_key = get_openai_key()
+        if not api_key:
+            print("❌ No OpenAI API key provided!")
+            return None
+        client = get_client(api_key)
+    
+    try:
+        print("🔄 Attempting streamed OpenAI API call...")
+        stream = client.chat.completions.create(**_completion_kwargs(prompt), stream=True)
         
-        fallback_patterns = [
-            {
-                "genre": "trap",
-                "bpm": 140,
-                "pattern": {
-                    "kick": "1,1.5,2,2.5,3,3.5,4,4.5",
-                    "snare": "2,4",
-                    "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                }
-            },
-            {
-                "genre": "lo-fi",
-                "bpm": 85,
-                "pattern": {
-                    "kick": "1,3",
-                    "snare": "2,4",
-                    "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                }
-            },
-            {
-                "genre": "house",
-                "bpm": 128,
-                "pattern": {
-                    "kick": "1,2,3,4",
-                    "snare": "2,4",
-                    "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                }
-            },
-            {
-                "genre": "hip-hop",
-                "bpm": 90,
-                "pattern": {
-                    "kick": "1,1.3,2,2.3",
-                    "snare": "2,4",
-                    "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
-                }
-            }
-        ]
+        decoder = IncrementalJSONObject()
+        pieces = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            pieces.append(text)
+            if decoder is None:
+                continue
+            try:
+                completed = decoder.feed(text)
+            except ValueError:
+                # Malformed field: stop decoding incrementally, judge the whole text at the end
+                decoder = None
+                continue
+            if on_field is not None:
+                for key, value in completed:
+                    on_field(key, value)
         
-        return random.choice(fallback_patterns) 
\ No newline at end of file
+        print("✅ OpenAI API call successful!")
+        result = "".join(pieces).strip()
+        if decoder is not None and decoder.done:
+            parsed = normalize_structure(decoder.fields).to_dict()
+            if cache is not None:
+                cache.put(cache_key, parsed)
+            return parsed
+        return _structure_from_response(result, cache, cache_key)[0]
+    
+    except Exception as e:
+        print(f"❌ Error calling OpenAI API: {e}")
+        print("🔄 Falling back to varied patterns...")
+        return _api_error_fallback()
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1.0):
+        # Over any one-second window at most capacity + rate requests go out,
+        # so a small bucket keeps us under a server-side per-second quota
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+def _is_retryable(error):
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    import openai  # already loaded by the client that raised
+
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _retry_delay(error, attempt, base=0.25, cap=8.0):
+    """Server-requested Retry-After if given, else jittered exponential backoff"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                # Jitter on top so queued retries don't all fire together
+                return float(retry_after) + random.uniform(0, base)
+            except ValueError:
+                pass
+    # "Full jitter": spreads retries out so workers don't stampede together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+async def parse_prompts_async(prompts, concurrency=GPT_BATCH_CONCURRENCY,
+                              requests_per_second=GPT_REQUESTS_PER_SECOND,
+                              max_retries=GPT_MAX_RETRIES, client=None, cache=None, stats=None,
+                              with_sources=False, api_key=None):
+    """Parse many prompts concurrently; results are returned in input order.
+
+    With with_sources=True each result is a (structure, source) pair, source
+    being "fast_path", "cache", "api", or one of the fallbacks: "malformed"
+    (unparseable reply) and "api_error" (the call failed; the exception is
+    in stats["errors"][index]). Fallback structures are random defaults, not
+    an answer to the prompt. Without an API key unresolved prompts are
+    (None, None); `api_key` skips the lookup (and the prompt for one).
+    """
+    prompts = list(prompts)
+    if cache is None and PROMPT_CACHE_ENABLED:
+        cache = get_prompt_cache()
+    if stats is None:
+        stats = {}
+    stats.update({"fast_path_hits": 0, "api_calls": 0, "cache_hits": 0, "retries": 0, "failures": 0,
+                  "errors": {}})
+
+    # Fast path and cache first, so a batch that resolves locally needs no API key
+    results = [None] * len(prompts)
+    sources = [None] * len(prompts)
+
+    def finish():
+        return list(zip(results, sources)) if with_sources else results
+
+    remaining = []
+    for index, prompt in enumerate(prompts):
+        structure, source, cache_key = _resolve_locally(prompt, cache)
+        if structure is not None:
+            stats["fast_path_hits" if source == "fast_path" else "cache_hits"] += 1
+            results[index], sources[index] = structure, source
+            continue
+        remaining.append((index, prompt, cache_key))
+    if not remaining:
+        return finish()
+
+    if client is None:
+        api_key = get_openai_key() if api_key is None else api_key
+        if not api_key:
+            print("❌ No OpenAI API key provided!")
+            return finish()
+        client = get_async_client(api_key)
+    # Retries are handled here so they share the rate limiter
+    client = client.with_options(max_retries=0)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(requests_per_second) if requests_per_second else None
+
+    async def parse_one(index, prompt, cache_key):
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                if bucket is not None:
+                    await bucket.acquire()
+                try:
+                    stats["api_calls"] += 1
+                    response = await client.chat.completions.create(**_completion_kwargs(prompt))
+                    result = response.choices[0].message.content.strip()
+                    results[index], sources[index] = _structure_from_response(result, cache, cache_key)
+                    return
+                except Exception as e:
+                    if attempt == max_retries or not _is_retryable(e):
+                        print(f"❌ Error calling OpenAI API for '{prompt}': {e}")
+                        stats["failures"] += 1
+                        stats["errors"][index] = e
+                        results[index], sources[index] = _api_error_fallback(), "api_error"
+                        return
+                    stats["retries"] += 1
+                    await asyncio.sleep(_retry_delay(e, attempt))
+
+    await asyncio.gather(*(parse_one(*item) for item in remaining))
+    return finish()
+
+def parse_prompts(prompts, **kwargs):
+    """Blocking wrapper around parse_prompts_async"""
+    async def run():
+        try:
+            return await parse_prompts_async(prompts, **kwargs)
+        finally:
+            await close_async_clients()
+    return asyncio.run(run())
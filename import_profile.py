@@ -0,0 +1,92 @@
+"""
+Import-time profile of the assistant's stages.
+
+Runs a fresh interpreter with `-X importtime`, importing what each stage
+needs in the order the app loads it, and charges every module to the first
+stage that pulled it in. A stage whose imports fail (e.g. sounddevice
+without PortAudio) is reported with its error.
+
+Usage: python app.py --profile-imports [--top 10]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+STAGES = (
+    ("startup", ("app",)),  # menu and text-mode prompt
+    ("text", ("gpt_parser", "midi_generator")),  # fast path, cache and renderer
+    ("openai", ("openai",)),  # only for prompts the fast path and cache can't answer
+    ("voice", ("whisper_transcriber", "voice_stream")),
+)
+STAGE_MARKER = "@@stage "
+ERROR_MARKER = "@@error "
+
+# __import__ rather than importlib.import_module: only the former goes
+# through the import machinery that -X importtime times
+_RUNNER = """
+import json, sys
+for stage, modules in json.loads(sys.argv[1]):
+    sys.stderr.write("@@stage " + stage + "\\n")
+    for module in modules:
+        try:
+            __import__(module)
+        except Exception as e:
+            message = f"{module}: {type(e).__name__}: {e}".replace("\\n", " ")
+            sys.stderr.write("@@error " + message + "\\n")
+            break
+"""
+
+def parse_importtime(lines):
+    """(module, self_us, cumulative_us, depth) for each `-X importtime` line"""
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|", 2)
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except (ValueError, IndexError):
+            continue  # the header line
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+def profile_stages(stages=STAGES, python=sys.executable, cwd=None):
+    """Import each stage in a fresh interpreter; one dict per stage with its
+    total import time, the modules it loaded and any import error"""
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", _RUNNER, json.dumps([[name, list(mods)] for name, mods in stages])],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    report, current = [], None
+    for line in result.stderr.splitlines():
+        if line.startswith(STAGE_MARKER):
+            current = {"stage": line[len(STAGE_MARKER):], "lines": [], "error": None}
+            report.append(current)
+        elif current is None:
+            continue  # interpreter startup and the runner's own imports
+        elif line.startswith(ERROR_MARKER):
+            current["error"] = line[len(ERROR_MARKER):]
+        else:
+            current["lines"].append(line)
+    for stage in report:
+        modules = parse_importtime(stage.pop("lines"))
+        stage["modules"] = modules
+        stage["total_ms"] = sum(self_us for _, self_us, _, _ in modules) / 1000
+    return report
+
+def format_report(report, top=10):
+    """-X importtime-style lines: per stage, the slowest imports by cumulative time"""
+    lines = ["⏱️  Import time by stage (a module is charged to the first stage that loads it)"]
+    for stage in report:
+        lines.append(f"{stage['stage']:<8} {stage['total_ms']:8.1f} ms  {len(stage['modules'])} modules")
+        if stage["error"]:
+            lines.append(f"         ⚠️  {stage['error']}")
+        slowest = sorted(stage["modules"], key=lambda entry: entry[2], reverse=True)[:top]
+        for name, self_us, cumulative_us, depth in slowest:
+            lines.append(f"         {self_us / 1000:8.1f} | {cumulative_us / 1000:8.1f} | {'  ' * depth}{name}")
+    return lines
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import METRICS_ENABLED, METRICS_DIR, METRICS_MAX_SAMPLES, TRACE_MAX_EVENTS
+
+METRIC_NAME = "music_assistant_stage_seconds"
+QUANTILES = (0.5, 0.95, 0.99)
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+_histograms = {}
+_trace = deque(maxlen=TRACE_MAX_EVENTS)
+_origin = time.perf_counter()
+_NOOP = nullcontext()
+
+class Histogram:
+    """Count and sum of all observations, percentiles over the most recent ones"""
+
+    def __init__(self, max_samples=METRICS_MAX_SAMPLES):
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentiles(self, quantiles=QUANTILES):
+        if not self.samples:
+            return {}
+        values = np.percentile(np.fromiter(self.samples, dtype=float), [q * 100 for q in quantiles])
+        return {q: float(v) for q, v in zip(quantiles, values)}
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Drop every recorded histogram and trace event"""
+    with _lock:
+        _histograms.clear()
+        _trace.clear()
+
+def observe(name, seconds):
+    """Record a duration without a span (e.g. measured elsewhere)"""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        observe(self.name, end - self.start)
+        event = {
+            "name": self.name,
+            "cat": "stage",
+            "ph": "X",  # complete event: start + duration
+            "ts": (self.start - _origin) * 1e6,
+            "dur": (end - self.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if self.args or exc_type is not None:
+            event["args"] = dict(self.args, **({"error": exc_type.__name__} if exc_type else {}))
+        with _lock:
+            _trace.append(event)
+        return False
+
+def span(name, **args):
+    """Context manager timing a block into the `name` histogram and the trace"""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, args)
+
+def timed(name=None):
+    """Decorator: run the function inside span(name or its __name__)"""
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def snapshot():
+    """{name: {count, sum, p50, p95, p99}} in seconds"""
+    with _lock:
+        histograms = {name: (h.count, h.sum, h.percentiles()) for name, h in _histograms.items()}
+    result = {}
+    for name, (count, total, percentiles) in sorted(histograms.items()):
+        result[name] = {"count": count, "sum": total}
+        result[name].update({f"p{int(q * 100)}": value for q, value in percentiles.items()})
+    return result
+
+def prometheus_text():
+    """All histograms in Prometheus text exposition format (as a summary)"""
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each stage of the music assistant.",
+        f"# TYPE {METRIC_NAME} summary",
+    ]
+    for name, stats in snapshot().items():
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for q in QUANTILES:
+            key = f"p{int(q * 100)}"
+            if key in stats:
+                lines.append(f'{METRIC_NAME}{{stage="{label}",quantile="{q}"}} {stats[key]:.9f}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {stats["sum"]:.9f}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {stats["count"]}')
+    return "\n".join(lines) + "\n"
+
+def chrome_trace():
+    """Trace events as a Chrome trace viewer / Perfetto JSON document"""
+    with _lock:
+        events = list(_trace)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write_prometheus(path):
+    _write(path, prometheus_text())
+    return path
+
+def write_chrome_trace(path):
+    _write(path, json.dumps(chrome_trace()))
+    return path
+
+def _write(path, text):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)  # scrapers never read a half-written file
+
+def export(directory=METRICS_DIR):
+    """Write metrics.prom and trace.json into `directory`"""
+    return (write_prometheus(os.path.join(directory, "metrics.prom")),
+            write_chrome_trace(os.path.join(directory, "trace.json")))
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body, content_type = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/trace":
+            body, content_type = json.dumps(chrome_trace()).encode("utf-8"), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve_metrics(port=9464, host="127.0.0.1"):
+    """Serve /metrics (Prometheus) and /trace (Chrome JSON) from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,80 @@
+import json
+
+class IncrementalJSONObject:
+    """Incrementally scans a streamed JSON object and reports each top-level
+    field as soon as its value is complete"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"
+        self._start = 0
+        self._key = None
+
+    def _emit(self, end):
+        value = json.loads(self.buffer[self._start:end])
+        self.fields[self._key] = value
+        self._expect = "after_value"
+        return self._key, value
+
+    def feed(self, chunk):
+        """Add text; returns the (key, value) pairs completed by it"""
+        self.buffer += chunk
+        buf = self.buffer
+        completed = []
+        i = self._pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key_string":
+                        self._key = json.loads(buf[self._start:i + 1])
+                        self._expect = "colon"
+                    elif self._depth == 1 and self._expect == "value_string":
+                        completed.append(self._emit(i + 1))
+            elif self._depth == 0:
+                # Skip anything before the object, e.g. a ```json fence
+                if c == "{":
+                    self._depth = 1
+                    self._expect = "key"
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect == "key":
+                    self._expect, self._start = "key_string", i
+                elif self._depth == 1 and self._expect == "value":
+                    self._expect, self._start = "value_string", i
+            elif c in "{[":
+                if self._depth == 1 and self._expect == "value":
+                    self._expect, self._start = "value_container", i
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value_container":
+                    completed.append(self._emit(i + 1))
+                elif self._depth == 0:
+                    if self._expect == "value_scalar":
+                        completed.append(self._emit(i))
+                    self.done = True
+            elif self._depth == 1:
+                if c == ":" and self._expect == "colon":
+                    self._expect = "value"
+                elif c == ",":
+                    if self._expect == "value_scalar":
+                        completed.append(self._emit(i))
+                    self._expect = "key"
+                elif self._expect == "value" and not c.isspace():
+                    # Number, true, false or null: ends at the next , or }
+                    self._expect, self._start = "value_scalar", i
+            i += 1
+        self._pos = i
+        return completed
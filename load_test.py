@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load test for service.py: fires concurrent requests and reports
+requests/second, latency percentiles and how many were turned away (503).
+
+By default it starts the service in-process with uvicorn, pointed at a local
+MockOpenAIServer with simulated latency, so no API key or network is needed.
+Prompts are unique so every /generate and /parse request reaches the stub.
+
+Usage:
+    python load_test.py --endpoint generate --requests 500 --concurrency 32
+    python load_test.py --url http://127.0.0.1:8000 --endpoint render
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+import httpx
+import numpy as np
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from prompt_cache import PromptCache
+from render_cache import RenderCache
+
+ENDPOINTS = ("generate", "parse", "render")
+
+def _request_body(endpoint, index):
+    if endpoint == "render":
+        return dict(DEFAULT_STRUCTURE, bpm=60 + index % 120)
+    return {"prompt": f"a moody groove for scene number {index}"}
+
+async def _fire(url, endpoint, requests, concurrency):
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def worker(client):
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/{endpoint}", json=_request_body(endpoint, index))
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, np.array(latencies), statuses
+
+def _start_service(workers, queue_size):
+    import uvicorn
+    from service import create_app
+
+    app = create_app(workers, queue_size, prompt_cache=PromptCache(":memory:"),
+                     render_cache=RenderCache(root=None), preload_whisper=False)
+    # Let uvicorn bind port 0 itself: sockets handed in via run(sockets=...)
+    # are re-wrapped without their TCP protocol, so asyncio never sets
+    # TCP_NODELAY and every keep-alive response stalls on delayed ACKs
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    host, port = server.servers[0].sockets[0].getsockname()[:2]
+    return server, thread, f"http://{host}:{port}"
+
+def run_load_test(endpoint="generate", requests=200, concurrency=16, url=None,
+                  latency=0.05, workers=None, queue_size=None):
+    """Run one load test; returns a dict of throughput and latency results"""
+    mock = server = None
+    if url is None:
+        from config import SERVICE_WORKERS, SERVICE_QUEUE_SIZE
+
+        mock = MockOpenAIServer(latency=latency).start()
+        os.environ["OPENAI_BASE_URL"] = mock.url
+        os.environ["OPENAI_API_KEY"] = "mock-key"
+        server, thread, url = _start_service(workers or SERVICE_WORKERS, queue_size or SERVICE_QUEUE_SIZE)
+    try:
+        elapsed, latencies, statuses = asyncio.run(_fire(url, endpoint, requests, concurrency))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+        if mock is not None:
+            mock.stop()
+
+    ok = statuses.get(200, 0)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": ok,
+        "rejected": statuses.get(503, 0),
+        "statuses": statuses,
+        "seconds": elapsed,
+        "requests_per_second": ok / elapsed if elapsed else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "llm_requests": mock.requests if mock is not None else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure requests/second of the HTTP service")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="generate")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--url", help="existing server (default: start one with a mock LLM)")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock LLM seconds per request")
+    parser.add_argument("--workers", type=int, help="service job threads")
+    parser.add_argument("--queue-size", type=int, help="service job slots before 503")
+    args = parser.parse_args(argv)
+
+    result = run_load_test(args.endpoint, args.requests, args.concurrency, args.url,
+                           args.latency, args.workers, args.queue_size)
+    print(f"🚀 POST /{result['endpoint']}: {result['requests']} requests, concurrency {result['concurrency']}")
+    print(f"   {result['ok']} ok, {result['rejected']} rejected (503) in {result['seconds']:.2f}s "
+          f"-> {result['requests_per_second']:.1f} req/s")
+    print(f"   latency p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+    if result["llm_requests"] is not None:
+        print(f"   LLM stub requests: {result['llm_requests']}")
+    other = {k: v for k, v in result["statuses"].items() if k not in (200, 503)}
+    if other:
+        print(f"   other statuses: {other}")
+
+if __name__ == "__main__":
+    main()
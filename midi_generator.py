@@ -1,142 +1,228 @@
-import pretty_midi
+import io
 import os
+import time
+from config import (
+    MIDI_BACKEND, MIDI_PPQ, RENDER_CACHE_ENABLED, STEP_GRID_RESOLUTION, DEFAULT_BARS, PROGRESSION_BARS,
+    CHORD_VOICE_LEADING
+)
+from chords import chord_pitches, parse_chord, pitch_class, voice_lead, PITCH_CLASSES
+from instrumentation import timed
+from music_schema import normalize_structure, normalize_pattern
+from render_cache import structure_key, get_render_cache
+from smf_writer import NoteEvents, encode_smf
+from step_grid import StepPattern, DRUM_MAP, BEATS_PER_BAR
 
 def get_chord_notes(chord_name):
     """Convert chord name to MIDI note numbers"""
-    # Basic chord definitions
-    chord_definitions = {
-        "C": [60, 64, 67],      # C major
-        "Cm": [60, 63, 67],     # C minor
-        "C7": [60, 64, 67, 70], # C dominant 7
-        "Cmaj7": [60, 64, 67, 71], # C major 7
-        "Am": [57, 60, 64],     # A minor
-        "A": [57, 61, 64],      # A major
-        "F": [53, 57, 60],      # F major
-        "G": [55, 59, 62],      # G major
-        "G7": [55, 59, 62, 65], # G dominant 7
-        "Dm": [50, 53, 57],     # D minor
-        "Dm7": [50, 53, 57, 60], # D minor 7
-        "Em": [52, 55, 59],     # E minor
-        "Bm": [47, 50, 54],     # B minor
-    }
-    
-    return chord_definitions.get(chord_name, [60, 64, 67])  # Default to C major
+    try:
+        return chord_pitches(chord_name).tolist()
+    except ValueError:
+        return [60, 64, 67]  # Default to C major
 
 def note_name_to_midi(note_name):
-    """Convert note name (e.g., 'C4', 'A#5') to MIDI pitch"""
-    note_map = {
-        'C': 0, 'C#': 1, 'D': 2, 'D#': 3, 'E': 4, 'F': 5, 'F#': 6,
-        'G': 7, 'G#': 8, 'A': 9, 'A#': 10, 'B': 11
-    }
-    
+    """Convert note name (e.g., 'C4', 'A#5', 'Bb3') to MIDI pitch"""
     # Parse note name (e.g., "C4", "A#5")
-    if len(note_name) >= 2:
-        note = note_name[:-1]
-        octave = int(note_name[-1])
-        base_pitch = note_map.get(note, 0)
-        return base_pitch + (octave + 1) * 12
+    note, accidental, octave = note_name[:1].upper(), note_name[1:-1], note_name[-1:]
+    if note in PITCH_CLASSES and accidental in ("", "#", "b") and octave.isdigit():
+        return pitch_class(note, accidental) + (int(octave) + 1) * 12
     else:
         return 60  # Default to middle C
 
-def make_music_midi(parsed_data, filename="midi_output/music.mid"):
-    """Generate MIDI music from parsed data (drums, chords, melody)"""
+DRUM_NOTE_TICKS = MIDI_PPQ // 8  # drum hits last a 32nd note
+
+def _beats_to_ticks(beats):
+    return int(round(beats * MIDI_PPQ))
+
+def drum_events(pattern, resolution=STEP_GRID_RESOLUTION):
+    """Convert a drum pattern dict to array-backed note events (ticks)"""
+    grid = StepPattern.from_pattern(pattern, resolution)
+    return grid.to_events(MIDI_PPQ, DRUM_NOTE_TICKS)
+
+def _all_parse(chords):
+    try:
+        for chord in chords:
+            parse_chord(chord)
+    except ValueError:
+        return False
+    return True
+
+def piano_events(chords=None, melody=None, bars=PROGRESSION_BARS):
+    """Convert a chord progression and/or melody to note events (ticks)"""
+    pitches, velocities, starts, ends = [], [], [], []
+    span = bars * BEATS_PER_BAR
     
-    # Create output directory if it doesn't exist
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    if chords:
+        chord_duration = span / len(chords)  # Spread chords across the progression's bars
+        voicings = voice_lead(chords) if CHORD_VOICE_LEADING and _all_parse(chords) else map(get_chord_notes, chords)
+        for i, chord_notes in enumerate(voicings):
+            start = _beats_to_ticks(i * chord_duration)
+            end = _beats_to_ticks((i + 1) * chord_duration)
+            for note_pitch in chord_notes:
+                pitches.append(int(note_pitch))
+                velocities.append(70)
+                starts.append(start)
+                ends.append(end)
+    
+    if melody:
+        note_duration = span / len(melody)  # Spread melody across the progression's bars
+        for i, note_name in enumerate(melody):
+            pitches.append(note_name_to_midi(note_name))
+            velocities.append(80)
+            starts.append(_beats_to_ticks(i * note_duration))
+            ends.append(_beats_to_ticks((i + 1) * note_duration))
     
-    # Initialize MIDI with tempo
-    bpm = parsed_data.get("bpm", 90)
+    return NoteEvents(pitches, velocities, starts, ends, channel=0, program=0, name="Piano")
+
+def _encode_pretty_midi(tracks, bpm):
+    """Compatibility backend: build the file through pretty_midi/mido"""
+    try:
+        import pretty_midi  # optional, and slow to import: only loaded for this backend
+    except ImportError:
+        raise ImportError("pretty_midi is not installed; use the 'smf' MIDI backend")
     midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
+    seconds_per_tick = 60.0 / (bpm * MIDI_PPQ)
+    for track in tracks:
+        instrument = pretty_midi.Instrument(program=track.program, is_drum=track.is_drum, name=track.name)
+        for pitch, velocity, start, end in zip(track.pitch, track.velocity, track.start, track.end):
+            instrument.notes.append(pretty_midi.Note(
+                velocity=int(velocity),
+                pitch=int(pitch),
+                start=start * seconds_per_tick,
+                end=end * seconds_per_tick
+            ))
+        midi.instruments.append(instrument)
+    buffer = io.BytesIO()
+    midi.write(buffer)
+    return buffer.getvalue()
+
+def encode_midi(tracks, bpm, backend=None):
+    """Encode note-event tracks as Standard MIDI File bytes"""
+    backend = backend or MIDI_BACKEND
+    if backend == "pretty_midi":
+        return _encode_pretty_midi(tracks, bpm)
+    return encode_smf(tracks, bpm, ppq=MIDI_PPQ)
+
+def _write_bytes(data, filename):
+    # Create output directory if it doesn't exist
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "wb") as f:
+        f.write(data)
+
+def structure_tracks(structure, drum_track=None, bars=DEFAULT_BARS):
+    """Note-event tracks for a MusicStructure, looped to `bars` bars.
     
-    # Get music type
-    music_type = parsed_data.get("music_type", "drums")
+    The one-bar drum pattern and the progression are rendered once and then
+    tiled, so long loops cost little more than a single bar.
+    """
+    music_type = structure.music_type
+    bar_ticks = BEATS_PER_BAR * MIDI_PPQ
+    tracks = []
     
-    # Create instruments
+    # Generate drum notes if needed (drum_track may have been rendered early)
     if music_type in ["drums", "mixed"]:
-        drum = pretty_midi.Instrument(program=0, is_drum=True)
-        midi.instruments.append(drum)
+        drums = drum_track if drum_track is not None else drum_events(structure.pattern)
+        tracks.append(drums.tile(bar_ticks, bars * bar_ticks))
     
+    # Generate chords and/or melody on one piano track if needed
     if music_type in ["chords", "melody", "mixed"]:
-        piano = pretty_midi.Instrument(program=0)  # Acoustic Grand Piano
-        midi.instruments.append(piano)
-    
-    # Drum note mapping (General MIDI drum map)
-    drum_map = {
-        "kick": 36,      # Bass Drum 1
-        "snare": 38,     # Acoustic Snare
-        "hats": 42,      # Closed Hi-Hat
-        "crash": 49,     # Crash Cymbal 1
-        "tom": 45,       # Low Tom
-        "clap": 39       # Hand Clap
-    }
+        piano = piano_events(
+            chords=structure.chords if music_type in ["chords", "mixed"] else None,
+            melody=structure.melody if music_type in ["melody", "mixed"] else None
+        )
+        tracks.append(piano.tile(PROGRESSION_BARS * bar_ticks, bars * bar_ticks))
     
-    # Beat position to time mapping (4-bar pattern)
-    step_map = {
-        "1": 0.0, "1.2": 0.25, "1.3": 0.5, "1.4": 0.75,
-        "2": 1.0, "2.2": 1.25, "2.3": 1.5, "2.4": 1.75,
-        "3": 2.0, "3.2": 2.25, "3.3": 2.5, "3.4": 2.75,
-        "4": 3.0, "4.2": 3.25, "4.3": 3.5, "4.4": 3.75
-    }
+    return tracks
+
+def render_midi_bytes(parsed_data, drum_track=None, backend=None, bars=DEFAULT_BARS):
+    """Render parsed data (dict or MusicStructure) to MIDI file bytes, in memory"""
     
-    # Generate drum notes if needed
-    if music_type in ["drums", "mixed"] and "pattern" in parsed_data:
-        pattern = parsed_data["pattern"]
-        for drum_type, hits in pattern.items():
-            if drum_type in drum_map:
-                hit_positions = [hit.strip() for hit in hits.split(",")]
-                
-                for hit in hit_positions:
-                    if hit in step_map:
-                        time = step_map[hit]
-                        velocity = 100 if drum_type == "kick" else 80
-                        note = pretty_midi.Note(
-                            velocity=velocity, 
-                            pitch=drum_map[drum_type], 
-                            start=time, 
-                            end=time+0.1
-                        )
-                        drum.notes.append(note)
-    
-    # Generate chords if needed
-    if music_type in ["chords", "mixed"] and "chords" in parsed_data and parsed_data["chords"]:
-        chords = parsed_data["chords"]
-        chord_duration = 4.0 / len(chords)  # Spread chords across 4 bars
-        
-        for i, chord in enumerate(chords):
-            chord_notes = get_chord_notes(chord)
-            start_time = i * chord_duration
-            
-            for note_pitch in chord_notes:
-                note = pretty_midi.Note(
-                    velocity=70,
-                    pitch=note_pitch,
-                    start=start_time,
-                    end=start_time + chord_duration
-                )
-                piano.notes.append(note)
-    
-    # Generate melody if needed
-    if music_type in ["melody", "mixed"] and "melody" in parsed_data and parsed_data["melody"]:
-        melody = parsed_data["melody"]
-        note_duration = 4.0 / len(melody)  # Spread melody across 4 bars
-        
-        for i, note_name in enumerate(melody):
-            note_pitch = note_name_to_midi(note_name)
-            start_time = i * note_duration
-            
-            note = pretty_midi.Note(
-                velocity=80,
-                pitch=note_pitch,
-                start=start_time,
-                end=start_time + note_duration
-            )
-            piano.notes.append(note)
+    # Validate and coerce into a typed structure (bad BPMs, positions, chord names)
+    structure = normalize_structure(parsed_data)
+    return encode_midi(structure_tracks(structure, drum_track, bars), structure.bpm, backend)
+
+@timed()
+def make_music_midi(parsed_data, filename="midi_output/music.mid", drum_track=None, backend=None,
+                    store=None, cache=None, bars=DEFAULT_BARS):
+    """Generate MIDI music from parsed data (dict or MusicStructure).
+    
+    `filename` may be a path (returned after writing), a writable binary
+    file object such as io.BytesIO, or None to get the bytes back without
+    touching the filesystem. With `store` (a midi_store.MidiStore) the bytes
+    are also persisted under their content hash. Renders are looked up in
+    `cache` (default: the shared memory-only render cache) by their
+    normalized structure.
+    The loop is `bars` bars long.
+    """
+    structure = normalize_structure(parsed_data)
+    if cache is None and RENDER_CACHE_ENABLED:
+        cache = get_render_cache()
+    
+    data = None
+    if cache is not None:
+        cache_key = structure_key(structure, backend, bars=bars)
+        data = cache.get(cache_key)
+    if data is None:
+        data = render_midi_bytes(structure, drum_track=drum_track, backend=backend, bars=bars)
+        if cache is not None:
+            cache.put(cache_key, data)
+    if store is not None:
+        store.put(data)
+    
+    if filename is None:
+        return data
+    if hasattr(filename, "write"):
+        filename.write(data)
+        return filename
     
     # Write MIDI file
-    midi.write(filename)
+    _write_bytes(data, filename)
     print(f"MIDI file generated: {filename}")
     return filename
 
+class StreamingMidiRenderer:
+    """Renders MIDI from parsed fields as they stream in from GPT.
+    
+    The drum track is built as soon as `bpm` and `pattern` are complete; for
+    drums-only requests the loop is rendered right then (and written, if
+    `filename` is a path), before the rest of the response (chords/melody)
+    has arrived. `store`, `cache` and `bars` are as for make_music_midi; only
+    the final render goes to the store.
+    """
+
+    def __init__(self, filename="midi_output/music.mid", store=None, cache=None, bars=DEFAULT_BARS):
+        self.filename = filename
+        self.store = store
+        self.cache = cache
+        self.bars = bars
+        self.fields = {}
+        self.pattern = None
+        self.drum_track = None
+        self.written = None
+        self.drums_ready_at = None  # time.perf_counter() when drums were rendered
+
+    def on_field(self, key, value):
+        """Callback for each completed top-level field"""
+        self.fields[key] = value
+        if self.drum_track is None and "bpm" in self.fields and "pattern" in self.fields:
+            self.pattern = normalize_pattern(self.fields["pattern"])
+            self.drum_track = drum_events(self.pattern)
+            if self.fields.get("music_type") == "drums":
+                self.written = make_music_midi(self.fields, self.filename, drum_track=self.drum_track,
+                                               cache=self.cache, bars=self.bars)
+            self.drums_ready_at = time.perf_counter()
+
+    def finish(self, parsed_data):
+        """Render the final loop once the full structure is known, reusing
+        the early drum track (and, through the render cache, an early render
+        of the same structure)"""
+        structure = normalize_structure(parsed_data)
+        same_drums = self.drum_track is not None and structure.pattern == self.pattern
+        self.written = make_music_midi(structure, self.filename, drum_track=self.drum_track if same_drums else None,
+                                       store=self.store, cache=self.cache, bars=self.bars)
+        return self.written
+
 def make_drum_midi(pattern, bpm=90, filename="midi_output/drums.mid"):
     """Generate MIDI drum pattern from structured instructions (legacy function)"""
     parsed_data = {
@@ -147,12 +233,7 @@ def make_drum_midi(pattern, bpm=90, filename="midi_output/drums.mid"):
     return make_music_midi(parsed_data, filename)
 
 def create_melody_midi(notes, bpm=90, filename="midi_output/melody.mid"):
-    """Generate MIDI melody from note list"""
-    
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
-    midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
-    piano = pretty_midi.Instrument(program=0)  # Acoustic Grand Piano
+    """Generate MIDI melody from note list (durations in beats)"""
     
     # Note name to MIDI pitch mapping
     note_map = {
@@ -160,6 +241,7 @@ def create_melody_midi(notes, bpm=90, filename="midi_output/melody.mid"):
         'G': 67, 'G#': 68, 'A': 69, 'A#': 70, 'B': 71
     }
     
+    pitches, starts, ends = [], [], []
     current_time = 0.0
     for note_info in notes:
         if isinstance(note_info, dict):
@@ -173,17 +255,12 @@ def create_melody_midi(notes, bpm=90, filename="midi_output/melody.mid"):
             if '#' in note_name:
                 pitch += 1
             
-            # Create note
-            note = pretty_midi.Note(
-                velocity=80,
-                pitch=pitch,
-                start=current_time,
-                end=current_time + duration
-            )
-            piano.notes.append(note)
+            pitches.append(pitch)
+            starts.append(_beats_to_ticks(current_time))
+            ends.append(_beats_to_ticks(current_time + duration))
             current_time += duration
     
-    midi.instruments.append(piano)
-    midi.write(filename)
+    piano = NoteEvents(pitches, [80] * len(pitches), starts, ends, name="Piano")  # Acoustic Grand Piano
+    _write_bytes(encode_midi([piano], bpm), filename)
     print(f"Melody MIDI file generated: {filename}")
-    return filename 
\ No newline at end of file
+    return filename
@@ -0,0 +1,60 @@
+import hashlib
+import os
+import tempfile
+import threading
+from config import MIDI_STORE_DIR
+
+def midi_digest(data):
+    """Content address of rendered MIDI bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+class MidiStore:
+    """Content-addressed MIDI files: identical renders share one file, and
+    concurrent writers never clobber each other (write to temp + rename)"""
+
+    def __init__(self, root=MIDI_STORE_DIR):
+        self.root = root
+
+    def path(self, digest):
+        """File path for a digest, fanned out by its first two hex digits"""
+        return os.path.join(self.root, digest[:2], f"{digest}.mid")
+
+    def put(self, data):
+        """Store bytes (if not already present) and return their digest"""
+        digest = midi_digest(data)
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return digest
+
+    def get(self, digest):
+        """Stored bytes, or None if the digest is unknown"""
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_midi_store():
+    """Process-wide store instance"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = MidiStore()
+        return _default_store
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions endpoint, used by tests and
+benchmarks so they run offline and can count connections and requests.
+It can also simulate per-request latency, a requests-per-second quota and
+token-by-token streaming (stream=True).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_STRUCTURE = {
+    "genre": "hip-hop",
+    "bpm": 90,
+    "music_type": "drums",
+    "pattern": {
+        "kick": "1,1.3,3",
+        "snare": "2,4",
+        "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"
+    },
+    "chords": None,
+    "melody": None
+}
+
+def default_responder(request_body):
+    """Reply to every prompt with the same hip-hop structure"""
+    return json.dumps(DEFAULT_STRUCTURE)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, request_body, content):
+        """Server-sent events, a few characters per chunk like real tokens"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        size = self.server.token_size
+        deltas = [{"role": "assistant", "content": ""}]
+        deltas += [{"content": content[i:i + size]} for i in range(0, len(content), size)]
+        for delta in deltas:
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            event = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request_body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+            }
+            self._send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if not self.path.endswith("/models"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        self._send_json(200, {"object": "list", "data": [
+            {"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "mock"}
+        ]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        if self.server.rate_limit:
+            # Sliding one-second window, like a requests-per-second quota
+            now = time.monotonic()
+            with self.server.lock:
+                window = self.server.window
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                limited = len(window) >= self.server.rate_limit
+                if limited:
+                    self.server.rejected += 1
+                    retry_after = max(0.01, 1.0 - (now - window[0]))
+                else:
+                    window.append(now)
+            if limited:
+                self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                headers={"Retry-After": f"{retry_after:.3f}"})
+                return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        content = self.server.responder(request_body)
+        if request_body.get("stream"):
+            self._send_stream(request_body, content)
+            return
+        self._send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+class MockOpenAIServer:
+    """Threaded HTTP/1.1 server answering /v1/chat/completions (and /v1/models)"""
+
+    def __init__(self, responder=default_responder, latency=0.0, rate_limit=None,
+                 token_delay=0.0, token_size=4, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.responder = responder
+        self.httpd.latency = latency
+        self.httpd.rate_limit = rate_limit  # requests per second before 429s
+        self.httpd.window = deque()
+        self.httpd.token_delay = token_delay  # seconds between streamed chunks
+        self.httpd.token_size = token_size  # characters per streamed chunk
+        self.httpd.rejected = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def rejected(self):
+        return self.httpd.rejected
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    server = MockOpenAIServer(port=8765).start()
+    print(f"🧪 Mock OpenAI server listening on {server.url}")
+    print("Point OPENAI_BASE_URL at it. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,179 @@
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+from config import DEFAULT_BPM, DEFAULT_GENRE
+
+MUSIC_TYPES = ("drums", "chords", "melody", "mixed")
+DRUM_NAMES = ("kick", "snare", "hats", "crash", "tom", "clap")
+MIN_BPM = 40
+MAX_BPM = 220
+DEFAULT_PATTERN = {"kick": "1,3", "snare": "2,4", "hats": "1.2,1.4,2.2,2.4,3.2,3.4,4.2,4.4"}
+
+# JSON schema sent with the request (structured outputs, strict mode), so the
+# model can only produce this shape: no prose, no missing or extra keys
+MUSIC_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "genre": {"type": "string"},
+        "bpm": {"type": "integer"},
+        "music_type": {"type": "string", "enum": list(MUSIC_TYPES)},
+        "pattern": {
+            "type": "object",
+            "properties": {
+                "kick": {"type": "string"},
+                "snare": {"type": "string"},
+                "hats": {"type": "string"}
+            },
+            "required": ["kick", "snare", "hats"],
+            "additionalProperties": False
+        },
+        "chords": {"type": ["array", "null"], "items": {"type": "string"}},
+        "melody": {"type": ["array", "null"], "items": {"type": "string"}}
+    },
+    "required": ["genre", "bpm", "music_type", "pattern", "chords", "melody"],
+    "additionalProperties": False
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "music_structure", "strict": True, "schema": MUSIC_JSON_SCHEMA}
+}
+
+@dataclass
+class MusicStructure:
+    """Validated music instructions, ready for MIDI generation"""
+    genre: str = DEFAULT_GENRE
+    bpm: int = DEFAULT_BPM
+    music_type: str = "drums"
+    pattern: Dict[str, str] = field(default_factory=dict)
+    chords: Optional[List[str]] = None
+    melody: Optional[List[str]] = None
+
+    def to_dict(self):
+        """Plain dict in the same shape GPT returns"""
+        return asdict(self)
+
+# Compiled once; normalization runs on every parsed response
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_POSITION = re.compile(r"^([1-4])(?:\.(\d+))?$")
+_POSITION_SPLIT = re.compile(r"[,\s;]+")
+_CHORD = re.compile(r"^([A-Ga-g])([#b♯♭]?)((?:maj|min|dim|aug|sus|add|m|M|[0-9]|[#b+\-()/°øΔ]|[A-G])*)$")
+_NOTE = re.compile(r"^([A-Ga-g])([#b♯♭]?)(-?\d)$")
+_GENRE_SEPARATORS = re.compile(r"[\s_]+")
+_GENRE_UNSAFE = re.compile(r"[^\w-]+")  # the genre ends up in file names
+_DRUM_ALIASES = {
+    "kicks": "kick", "bass drum": "kick", "bd": "kick",
+    "snares": "snare", "sd": "snare", "rim": "snare",
+    "hat": "hats", "hihat": "hats", "hi-hat": "hats", "hihats": "hats", "hi-hats": "hats",
+    "hh": "hats", "closed hat": "hats",
+    "claps": "clap", "toms": "tom", "cymbal": "crash", "crashes": "crash",
+}
+_ACCIDENTALS = {"♯": "#", "♭": "b"}
+
+def normalize_bpm(value):
+    """Coerce numbers or strings like '140 bpm' into an int within range"""
+    if isinstance(value, str):
+        match = _NUMBER.search(value)
+        value = float(match.group(0)) if match else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return DEFAULT_BPM
+    return int(min(MAX_BPM, max(MIN_BPM, round(value))))
+
+def normalize_genre(value):
+    """Lower-case, hyphen-separated genre, stripped to [\\w-] so it is safe in
+    a file name ("Hip Hop" -> "hip-hop", "../x" -> "x")"""
+    if isinstance(value, str):
+        value = _GENRE_UNSAFE.sub("", _GENRE_SEPARATORS.sub("-", value.strip().lower())).strip("-")
+    return value if isinstance(value, str) and value else DEFAULT_GENRE
+
+def normalize_positions(value):
+    """Canonical comma-separated beat positions; invalid entries are dropped"""
+    if isinstance(value, (list, tuple)):
+        items = [str(item) for item in value]
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        items = [str(value)]
+    elif isinstance(value, str):
+        items = _POSITION_SPLIT.split(value)
+    else:
+        return ""
+    positions = []
+    for item in items:
+        match = _POSITION.match(item.strip())
+        if not match:
+            continue
+        beat, sub = match.groups()
+        # "2.0" and "2.1" both mean the downbeat
+        positions.append(beat if sub in (None, "0", "1") else f"{beat}.{sub}")
+    return ",".join(positions)
+
+def normalize_pattern(value):
+    """Known drum names mapped to canonical position strings"""
+    if not isinstance(value, dict):
+        return {}
+    pattern = {}
+    for name, hits in value.items():
+        name = str(name).strip().lower()
+        name = _DRUM_ALIASES.get(name, name)
+        if name in DRUM_NAMES:
+            positions = normalize_positions(hits)
+            if positions:
+                pattern[name] = positions
+    return pattern
+
+def normalize_chord(value):
+    """'am' -> 'Am', 'F♯m7' -> 'F#m7'; None if it isn't a chord symbol"""
+    if not isinstance(value, str):
+        return None
+    match = _CHORD.match(value.strip().replace(" ", ""))
+    if not match:
+        return None
+    root, accidental, rest = match.groups()
+    return root.upper() + _ACCIDENTALS.get(accidental, accidental) + rest
+
+def normalize_note(value):
+    """'c4' -> 'C4'; None if it isn't a note name with octave"""
+    if not isinstance(value, str):
+        return None
+    match = _NOTE.match(value.strip())
+    if not match:
+        return None
+    name, accidental, octave = match.groups()
+    return name.upper() + _ACCIDENTALS.get(accidental, accidental) + octave
+
+def _normalize_list(value, normalize):
+    if not isinstance(value, (list, tuple)):
+        return None
+    items = [item for item in map(normalize, value) if item]
+    return items or None
+
+def normalize_structure(data):
+    """Validate and coerce a parsed dict (or MusicStructure) into a MusicStructure"""
+    if isinstance(data, MusicStructure):
+        return data
+    if not isinstance(data, dict):
+        data = {}
+
+    genre = normalize_genre(data.get("genre"))
+
+    pattern = normalize_pattern(data.get("pattern"))
+    chords = _normalize_list(data.get("chords"), normalize_chord)
+    melody = _normalize_list(data.get("melody"), normalize_note)
+
+    music_type = data.get("music_type")
+    music_type = music_type.strip().lower() if isinstance(music_type, str) else None
+    if music_type not in MUSIC_TYPES:
+        # Infer from what is actually present
+        parts = [name for name, present in (("drums", pattern), ("chords", chords), ("melody", melody)) if present]
+        music_type = parts[0] if len(parts) == 1 else ("mixed" if parts else "drums")
+
+    if music_type in ("drums", "mixed") and not pattern:
+        pattern = dict(DEFAULT_PATTERN)
+
+    return MusicStructure(
+        genre=genre,
+        bpm=normalize_bpm(data.get("bpm")),
+        music_type=music_type,
+        pattern=pattern,
+        chords=chords,
+        melody=melody,
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import weakref
+from config import (
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_TIMEOUT,
+    OPENAI_CONNECT_TIMEOUT,
+)
+
+class ConnectionStats:
+    """Counts requests and newly opened TCP connections across all clients"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+
+    def snapshot(self):
+        """Requests, connections opened and how many requests reused a connection"""
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": reused,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+            }
+
+stats = ConnectionStats()
+
+# httpcore reports connection lifecycle events through the "trace" request
+# extension; a completed TCP connect means the pool had nothing to reuse
+def _trace(event_name, info):
+    if event_name == "connection.connect_tcp.complete":
+        stats.add_connection()
+
+async def _async_trace(event_name, info):
+    _trace(event_name, info)
+
+def _on_request(request):
+    stats.add_request()
+    request.extensions["trace"] = _trace
+
+async def _on_async_request(request):
+    stats.add_request()
+    request.extensions["trace"] = _async_trace
+
+# The SDK (and httpx) take about a second to import, so they are loaded
+# when the first client is created rather than with this module
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+def _timeout():
+    import httpx
+
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {key: client}
+_clients_lock = threading.Lock()
+
+def get_client(api_key, base_url=None):
+    """Shared OpenAI client (one keep-alive connection pool per key/endpoint)"""
+    import openai
+
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            http_client = openai.DefaultHttpxClient(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [_on_request]},
+            )
+            client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+            _clients[key] = client
+        return client
+
+def get_async_client(api_key, base_url=None):
+    """Shared AsyncOpenAI client for the running event loop"""
+    import openai
+
+    # Async connections belong to the loop that opened them, so each loop
+    # gets its own pool; it is dropped together with the loop
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url)
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            http_client = openai.DefaultAsyncHttpxClient(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [_on_async_request]},
+            )
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+            loop_clients[key] = client
+        return client
+
+def warm_connection(api_key, base_url=None):
+    """Create the shared client and open its keep-alive connection (DNS,
+    TCP and TLS) ahead of the first completion request"""
+    import openai
+
+    client = get_client(api_key, base_url)
+    try:
+        client.with_options(timeout=OPENAI_CONNECT_TIMEOUT, max_retries=0).models.list()
+    except openai.OpenAIError:
+        pass  # the connection is what matters; errors surface on the real call
+    return client
+
+def close_clients():
+    """Close every pooled sync client"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+async def close_async_clients():
+    """Close the pooled async clients of the running event loop"""
+    with _clients_lock:
+        loop_clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.close()
+
+def connection_stats():
+    """Connection reuse counters for this process"""
+    return stats.snapshot()
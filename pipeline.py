@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+
+class _Failed:
+    """An exception travelling down the pipeline in place of a result"""
+
+    def __init__(self, stage, error):
+        self.stage = stage
+        self.error = error
+
+class Pipeline:
+    """Stages that each run in their own thread and hand results to the next
+    stage through a queue, plus prefetch tasks (model load, connection setup,
+    cache warm-up) that run concurrently from the moment the pipeline starts.
+
+    Stages are (name, fn) pairs; fn(item) returns the item for the next stage.
+    A stage can block on a prefetch task with pipeline.prefetched(name).
+    """
+
+    def __init__(self, stages, prefetch=None, queue_size=1):
+        self.stages = list(stages)
+        self.prefetch = dict(prefetch or {})
+        # Bounded hand-offs between stages (backpressure); results are unbounded
+        # so submitting several items before reading them can't deadlock
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in self.stages] + [queue.Queue()]
+        self.timings = {}  # name -> [(start, end), ...] relative to start()
+        self._prefetch_results = {}
+        self._prefetch_done = {name: threading.Event() for name in self.prefetch}
+        self._threads = []
+        self._started_at = None
+        self._lock = threading.Lock()
+
+    def _record(self, name, start, end):
+        with self._lock:
+            self.timings.setdefault(name, []).append((start - self._started_at, end - self._started_at))
+
+    def _run_prefetch(self, name, fn):
+        start = time.perf_counter()
+        try:
+            self._prefetch_results[name] = (fn(), None)
+        except Exception as e:
+            self._prefetch_results[name] = (None, e)
+        self._record(name, start, time.perf_counter())
+        self._prefetch_done[name].set()
+
+    def _run_stage(self, index, name, fn):
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                outbox.put(_DONE)
+                return
+            if not isinstance(item, _Failed):
+                start = time.perf_counter()
+                try:
+                    item = fn(item)
+                except Exception as e:
+                    item = _Failed(name, e)
+                self._record(name, start, time.perf_counter())
+            outbox.put(item)
+
+    def start(self):
+        """Launch prefetch tasks and stage threads"""
+        self._started_at = time.perf_counter()
+        for name, fn in self.prefetch.items():
+            thread = threading.Thread(target=self._run_prefetch, args=(name, fn), name=f"prefetch-{name}", daemon=True)
+            thread.start()
+        for index, (name, fn) in enumerate(self.stages):
+            thread = threading.Thread(target=self._run_stage, args=(index, name, fn), name=f"stage-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def prefetched(self, name, timeout=None):
+        """Wait for a prefetch task and return its result (re-raising its error)"""
+        if not self._prefetch_done[name].wait(timeout):
+            raise TimeoutError(f"prefetch {name!r} did not finish in {timeout}s")
+        result, error = self._prefetch_results[name]
+        if error is not None:
+            raise error
+        return result
+
+    def submit(self, item):
+        """Feed an item to the first stage"""
+        self.queues[0].put(item)
+
+    def close(self):
+        """No more items; stage threads exit once they have drained"""
+        self.queues[0].put(_DONE)
+
+    def results(self):
+        """Final results in submission order; a failed item raises its stage's error"""
+        while True:
+            item = self.queues[-1].get()
+            if item is _DONE:
+                for thread in self._threads:
+                    thread.join()
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+
+    def run(self, item):
+        """Push one item through every stage and return the result"""
+        if self._started_at is None:
+            self.start()
+        self.submit(item)
+        self.close()
+        results = self.results()
+        try:
+            return next(results)
+        finally:
+            results.close()
+
+    def timing_report(self):
+        """Lines describing when each prefetch task and stage ran"""
+        lines = []
+        with self._lock:
+            timings = dict(self.timings)
+        names = list(self.prefetch) + [name for name, _ in self.stages]
+        width = max((len(name) for name in names), default=0)
+        for name in names:
+            for start, end in timings.get(name, []):
+                kind = "prefetch" if name in self.prefetch else "stage"
+                lines.append(f"{name:<{width}}  {kind:<8}  {start * 1000:8.1f} → {end * 1000:8.1f} ms  "
+                             f"({(end - start) * 1000:.1f} ms)")
+        spans = [span for name in names for span in timings.get(name, [])]
+        if spans:
+            total = max(end for _, end in spans)
+            busy = sum(end - start for start, end in spans)
+            lines.append(f"{'total':<{width}}  {'':<8}  {total * 1000:8.1f} ms wall, "
+                         f"{busy * 1000:.1f} ms of work ({max(0.0, busy - total) * 1000:.1f} ms overlapped)")
+        return lines
@@ -0,0 +1,161 @@
+import io
+import threading
+import wave
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from config import MIDI_PPQ, DEFAULT_BARS, PREVIEW_SAMPLE_RATE, PREVIEW_CACHE_ENTRIES
+from midi_generator import structure_tracks
+from music_schema import normalize_structure
+from render_cache import structure_key
+from step_grid import DRUM_MAP, BEATS_PER_BAR
+
+DRUM_NAMES_BY_PITCH = {pitch: name for name, pitch in DRUM_MAP.items()}
+DRUM_GAIN = 0.8
+PIANO_GAIN = 0.3  # per note; chords stack
+PIANO_PARTIALS = 6
+PIANO_INHARMONICITY = 0.0004  # stiff-string stretch of the upper partials
+PIANO_MAX_SECONDS = 1.5  # tones are cut here (they have decayed by then)
+PIANO_RELEASE_SECONDS = 0.08
+HEADROOM = 0.9  # peak level of the mix
+
+def _decay(t, seconds):
+    return np.exp(-t / seconds)
+
+def _noise(n, seed):
+    return np.random.default_rng(seed).uniform(-1.0, 1.0, n)
+
+def _highpass(x):
+    """First difference: a cheap tilt towards the top end for cymbals"""
+    return np.diff(x, prepend=0.0)
+
+def _sweep(t, start_hz, end_hz, seconds, sample_rate):
+    """Sine whose pitch falls exponentially from start_hz to end_hz"""
+    freq = end_hz + (start_hz - end_hz) * _decay(t, seconds)
+    return np.sin(2 * np.pi * np.cumsum(freq) / sample_rate)
+
+def _synth_drum(name, sample_rate):
+    duration = {"kick": 0.35, "snare": 0.25, "hats": 0.08, "clap": 0.25, "tom": 0.4, "crash": 1.2}[name]
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    noise = _noise(len(t), seed=DRUM_MAP[name])
+    if name == "kick":
+        x = _sweep(t, 150, 50, 0.03, sample_rate) * _decay(t, 0.12) + 0.3 * noise * _decay(t, 0.002)
+    elif name == "snare":
+        x = 0.5 * np.sin(2 * np.pi * 180 * t) * _decay(t, 0.05) + 0.8 * _highpass(noise) * _decay(t, 0.07)
+    elif name == "hats":
+        x = _highpass(_highpass(noise)) * _decay(t, 0.015)
+    elif name == "clap":
+        # Three quick bursts, then a short tail
+        bursts = sum(np.where(t >= onset, _decay(np.abs(t - onset), 0.004), 0.0) for onset in (0.0, 0.01, 0.02))
+        x = _highpass(noise) * (bursts + 0.5 * _decay(np.maximum(t - 0.02, 0.0), 0.06) * (t >= 0.02))
+    elif name == "tom":
+        x = _sweep(t, 160, 100, 0.08, sample_rate) * _decay(t, 0.15)
+    else:  # crash
+        x = _highpass(noise) * _decay(t, 0.4)
+    return x / np.abs(x).max()
+
+@lru_cache(maxsize=None)
+def drum_sample(name, sample_rate=PREVIEW_SAMPLE_RATE):
+    """Synthesized one-shot for a drum name (read-only float32, peak 1.0)"""
+    sample = _synth_drum(name, sample_rate).astype(np.float32)
+    sample.setflags(write=False)
+    return sample
+
+def warm_up(sample_rate=PREVIEW_SAMPLE_RATE):
+    """Synthesize the drum kit ahead of the first preview"""
+    for name in DRUM_MAP:
+        drum_sample(name, sample_rate)
+
+@lru_cache(maxsize=512)
+def piano_tone(pitch, samples, sample_rate=PREVIEW_SAMPLE_RATE):
+    """Additive piano-like tone: decaying, slightly stretched partials held
+    for `samples` and then released (read-only float32)"""
+    f0 = 440.0 * 2 ** ((pitch - 69) / 12)
+    k = np.arange(1, PIANO_PARTIALS + 1)
+    freqs = k * f0 * np.sqrt(1 + PIANO_INHARMONICITY * k ** 2)
+    k, freqs = k[freqs < sample_rate / 2], freqs[freqs < sample_rate / 2]
+    release = int(PIANO_RELEASE_SECONDS * sample_rate)
+    held = min(samples, int(PIANO_MAX_SECONDS * sample_rate))
+    t = np.arange(held + release) / sample_rate
+    # Upper partials are quieter and die away sooner
+    partials = (0.6 ** (k - 1))[:, None] * _decay(t, 1.2 / k[:, None]) * np.sin(2 * np.pi * freqs[:, None] * t)
+    tone = partials.sum(axis=0)
+    attack = min(int(0.005 * sample_rate), held)
+    tone[:attack] *= np.linspace(0.0, 1.0, attack)
+    tone[held:] *= np.linspace(1.0, 0.0, release)
+    tone = (tone / np.abs(tone).max()).astype(np.float32)
+    tone.setflags(write=False)
+    return tone
+
+def _voices(track, samples_per_tick, sample_rate):
+    """(onset sample, gain, waveform) for each note of a track"""
+    onsets = np.rint(track.start * samples_per_tick).astype(np.int64)
+    lengths = np.rint((track.end - track.start) * samples_per_tick).astype(np.int64)
+    if track.is_drum:
+        gains = track.velocity / 127 * DRUM_GAIN
+        waves = [drum_sample(DRUM_NAMES_BY_PITCH.get(pitch, "tom"), sample_rate) for pitch in track.pitch.tolist()]
+    else:
+        gains = track.velocity / 127 * PIANO_GAIN
+        waves = [piano_tone(pitch, length, sample_rate)
+                 for pitch, length in zip(track.pitch.tolist(), lengths.tolist())]
+    return zip(onsets.tolist(), gains.tolist(), waves)
+
+def render_tracks(tracks, bpm, length_ticks, ppq=MIDI_PPQ, sample_rate=PREVIEW_SAMPLE_RATE, loop=True):
+    """Mix note-event tracks to mono float32 PCM by overlap-add.
+
+    Every note adds its cached waveform (one vectorized slice per note,
+    never a per-sample loop). With loop=True the buffer is exactly
+    `length_ticks` long and tails that ring past the end wrap around to the
+    start, so it loops seamlessly; otherwise they are kept.
+    """
+    samples_per_tick = sample_rate * 60.0 / (bpm * ppq)
+    length = int(round(length_ticks * samples_per_tick))
+    voices = [voice for track in tracks for voice in _voices(track, samples_per_tick, sample_rate)]
+    end = max([length] + [onset + len(wave) for onset, _, wave in voices])
+    out = np.zeros(end, dtype=np.float32)
+    for onset, gain, wave in voices:
+        out[onset:onset + len(wave)] += gain * wave
+    if loop:
+        for start in range(length, end, length):
+            tail = out[start:start + length]
+            out[:len(tail)] += tail
+        out = out[:length]
+    peak = np.abs(out).max() if len(out) else 0.0
+    if peak > HEADROOM:
+        out *= HEADROOM / peak
+    return out
+
+def render_preview(parsed_data, bars=DEFAULT_BARS, sample_rate=PREVIEW_SAMPLE_RATE, loop=True):
+    """The loop make_music_midi would write, as float32 PCM"""
+    structure = normalize_structure(parsed_data)
+    return render_tracks(structure_tracks(structure, bars=bars), structure.bpm,
+                         bars * BEATS_PER_BAR * MIDI_PPQ, sample_rate=sample_rate, loop=loop)
+
+def to_wav_bytes(samples, sample_rate=PREVIEW_SAMPLE_RATE):
+    """16-bit mono WAV file bytes"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+_previews = OrderedDict()  # (structure key, sample rate) -> WAV bytes, least recently used first
+_previews_lock = threading.Lock()
+
+def preview_wav(parsed_data, bars=DEFAULT_BARS, sample_rate=PREVIEW_SAMPLE_RATE):
+    """WAV bytes of the looped preview, kept in a small in-memory LRU so UI
+    reruns don't render it again"""
+    key = (structure_key(parsed_data, bars=bars), sample_rate)
+    with _previews_lock:
+        if key in _previews:
+            _previews.move_to_end(key)
+            return _previews[key]
+    data = to_wav_bytes(render_preview(parsed_data, bars, sample_rate), sample_rate)
+    with _previews_lock:
+        _previews[key] = data
+        while len(_previews) > PREVIEW_CACHE_ENTRIES:
+            _previews.popitem(last=False)
+    return data
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from config import (
+    PROMPT_CACHE_PATH,
+    PROMPT_CACHE_TTL,
+    PROMPT_CACHE_MAX_ENTRIES,
+    PROMPT_CACHE_MEMORY_ENTRIES,
+    PROMPT_CACHE_TOUCH_INTERVAL,
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s#.\-]")
+_WHITESPACE = re.compile(r"\s+")
+_BPM = re.compile(r"(\d+)\s*(?:bpm|beats per minute)\b")
+
+def normalize_prompt(prompt):
+    """Canonical form of a prompt so trivially different wordings share a key"""
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _BPM.sub(r"\1 bpm", text)
+    text = _WHITESPACE.sub(" ", text).strip(" .")
+    return text
+
+def make_cache_key(prompt, model, system_prompt, temperature):
+    """Hash of everything that influences the completion"""
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    material = "\x1f".join([normalize_prompt(prompt), model, system_hash, repr(float(temperature))])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class PromptCache:
+    """Two-tier (memory + SQLite) cache of parsed GPT responses with TTL and LRU eviction"""
+
+    def __init__(self, path=PROMPT_CACHE_PATH, ttl=PROMPT_CACHE_TTL,
+                 max_entries=PROMPT_CACHE_MAX_ENTRIES, memory_entries=PROMPT_CACHE_MEMORY_ENTRIES,
+                 touch_interval=PROMPT_CACHE_TOUCH_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_interval = touch_interval
+        self._memory = OrderedDict()  # key -> (json text, created)
+        # Memory hits not yet written to the disk tier's `accessed` column
+        self._touched = {}  # key -> time of the latest hit
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def _remember(self, key, value, created):
+        """Put an entry in the memory tier, evicting the oldest if full"""
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self, now):
+        """Write pending memory-hit access times, so disk LRU eviction sees them"""
+        if self._touched:
+            self._db.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._db.commit()
+            self._touched.clear()
+        self._last_flush = now
+
+    def get(self, key):
+        """Return the cached structure for `key`, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    # Batched: one disk write per touch_interval, not per hit
+                    self._touched[key] = now
+                    if now - self._last_flush >= self.touch_interval:
+                        self._flush_touches(now)
+                    return json.loads(value)
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            if now - created > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, value, created)
+            self.disk_hits += 1
+            return json.loads(value)
+
+    def put(self, key, structure):
+        """Store a parsed structure and trim the cache to its size limit"""
+        now = time.time()
+        value = json.dumps(structure, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, value, now)
+            self._touched.pop(key, None)
+            self._flush_touches(now)  # before trimming, so recent memory hits survive
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_prompt_cache():
+    """Process-wide cache instance, opened on first use"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PromptCache()
+        return _default_cache
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from config import (
+    MIDI_BACKEND,
+    MIDI_PPQ,
+    DEFAULT_BARS,
+    PROGRESSION_BARS,
+    CHORD_VOICE_LEADING,
+    STEP_GRID_RESOLUTION,
+    RENDER_CACHE_DIR,
+    RENDER_CACHE_MAX_ENTRIES,
+    RENDER_CACHE_MAX_BYTES,
+    RENDER_CACHE_MEMORY_BYTES,
+)
+from music_schema import normalize_structure
+
+RENDER_VERSION = 4  # bump when the renderer's output changes for the same structure
+
+def structure_key(parsed_data, backend=None, ppq=MIDI_PPQ, bars=DEFAULT_BARS):
+    """Canonical hash of everything that affects the rendered MIDI bytes.
+
+    The structure is normalized first, so equivalent dicts ("2.0" vs "2",
+    "am" vs "Am", key order) share a key; genre is only a label and is left out.
+    """
+    structure = normalize_structure(parsed_data).to_dict()
+    structure.pop("genre", None)
+    material = json.dumps(
+        {"structure": structure, "backend": backend or MIDI_BACKEND, "ppq": ppq, "bars": bars,
+         "progression_bars": PROGRESSION_BARS, "voice_leading": CHORD_VOICE_LEADING, "grid": STEP_GRID_RESOLUTION, "version": RENDER_VERSION},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """Rendered MIDI bytes keyed on structure_key: an in-memory LRU in front
+    of files named by the key, with entry and byte caps on both tiers"""
+
+    def __init__(self, root=RENDER_CACHE_DIR, max_entries=RENDER_CACHE_MAX_ENTRIES,
+                 max_bytes=RENDER_CACHE_MAX_BYTES, memory_bytes=RENDER_CACHE_MEMORY_BYTES):
+        self.root = root  # None keeps everything in memory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_size = 0
+        self._index = OrderedDict()  # key -> size on disk, least recently used first
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if root is not None:
+            self._load_index()
+
+    def path(self, key):
+        """File path for a key, fanned out by its first two hex digits"""
+        return os.path.join(self.root, key[:2], f"{key}.mid")
+
+    def _load_index(self):
+        """Rebuild the LRU index from the files on disk, oldest access first"""
+        entries = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".mid"):
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._disk_size += size
+        self._evict_disk()
+
+    def _remember(self, key, data):
+        """Put bytes in the memory tier, evicting the oldest over the byte cap"""
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        if len(data) > self.memory_bytes:
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict_disk(self):
+        while self._index and (len(self._index) > self.max_entries or self._disk_size > self.max_bytes):
+            key, size = self._index.popitem(last=False)
+            self._disk_size -= size
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key):
+        """Return cached MIDI bytes for `key`, or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._index:
+                    self._index.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                path = self.path(key)
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)  # mtime doubles as last access across restarts
+            except FileNotFoundError:
+                self._disk_size -= self._index.pop(key)
+                self.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self._remember(key, data)
+            self.disk_hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store rendered bytes and trim both tiers to their caps"""
+        with self._lock:
+            self._remember(key, data)
+            if self.root is None or key in self._index:
+                return
+            path = self.path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Temp file + rename: readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._index[key] = len(data)
+            self._disk_size += len(data)
+            self._evict_disk()
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            while self._index:
+                key, _ = self._index.popitem()
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+            self._disk_size = 0
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index) if self.root is not None else len(self._memory)
+
+    def stats(self):
+        """Hit/miss counters and sizes for this process"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+        }
+
+_default_caches = {}  # persistent -> RenderCache
+_default_cache_lock = threading.Lock()
+
+def get_render_cache(persistent=False):
+    """Process-wide render cache, opened on first use.
+
+    Memory-only by default, so renders that never touch the filesystem
+    (web, service, batch workers) stay off the disk; persistent=True is the
+    cache backed by files under RENDER_CACHE_DIR.
+    """
+    with _default_cache_lock:
+        if persistent not in _default_caches:
+            _default_caches[persistent] = RenderCache() if persistent else RenderCache(root=None)
+        return _default_caches[persistent]
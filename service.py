@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP API (ASGI) for the music assistant.
+
+    POST /transcribe   WAV body                  -> {"text": ...}
+    POST /parse        {"prompt": ...}           -> {"structure": {...}, "source": ...}
+    POST /render       structure JSON [?bars=N]  -> audio/midi bytes
+    POST /generate     {"prompt": ...} or WAV    -> audio/midi bytes
+    GET  /health, GET /metrics
+
+Transcription and rendering run on a fixed pool of worker threads sharing
+one Whisper model pool; GPT calls go through the pooled async OpenAI client
+on the event loop. Every job takes a slot in a bounded queue, and once it
+is full requests are answered with 503 and Retry-After instead of piling up.
+
+Usage: python service.py [--port 8000] [--workers 4] [--queue-size 32]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import openai
+import scipy.io.wavfile
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from config import (
+    DEFAULT_BARS,
+    OPENAI_CONNECT_TIMEOUT,
+    OPENAI_PREWARM_CONNECTION,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_QUEUE_SIZE,
+    SERVICE_RETRY_AFTER,
+    SERVICE_MAX_AUDIO_BYTES,
+    SERVICE_PRELOAD_WHISPER,
+    get_openai_key,
+)
+from gpt_parser import parse_prompts_async
+from instrumentation import prometheus_text
+from midi_generator import make_music_midi
+from music_schema import normalize_structure
+from openai_client import get_async_client, close_async_clients
+from render_cache import structure_key
+
+MAX_BARS = 256
+_UNSAFE_NAME = re.compile(r"[^a-z0-9-]+")
+
+class ServiceError(Exception):
+    """Turned into a JSON error response with this status"""
+
+    def __init__(self, status, detail, headers=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers
+
+class QueueFull(ServiceError):
+    def __init__(self, retry_after):
+        super().__init__(503, "server busy, retry later", {"Retry-After": str(retry_after)})
+
+class JobQueue:
+    """Bounded admission in front of a thread pool.
+
+    A request holds a slot for its whole lifetime (queued or running), so at
+    most `max_pending` jobs are in the server at once; the rest are rejected
+    right away. Slots are only taken and released on the event loop thread.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, max_pending=SERVICE_QUEUE_SIZE,
+                 retry_after=SERVICE_RETRY_AFTER):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._executor = None
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="service-job")
+        return self
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise QueueFull(self.retry_after)
+        self.pending += 1
+        self.accepted += 1
+        try:
+            yield self
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking function on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def stats(self):
+        return {"workers": self.workers, "pending": self.pending, "max_pending": self.max_pending,
+                "accepted": self.accepted, "rejected": self.rejected}
+
+def _load_transcriber():
+    # Imported on first use: faster-whisper is slow to import and sounddevice
+    # needs PortAudio, which a headless server may not have
+    try:
+        import whisper_transcriber
+    except (ImportError, OSError) as e:
+        raise ServiceError(503, f"transcription unavailable: {e}")
+    return whisper_transcriber
+
+def _preload_whisper(state):
+    try:
+        _load_transcriber().warm_up()
+        state.whisper = "ready"
+    except ServiceError as e:
+        state.whisper = e.detail
+    except Exception as e:
+        state.whisper = f"failed to load model: {e}"
+
+def _transcribe_job(body):
+    transcriber = _load_transcriber()
+    try:
+        samplerate, audio = scipy.io.wavfile.read(io.BytesIO(body))
+    except ValueError as e:
+        raise ServiceError(400, f"expected a WAV file: {e}")
+    return transcriber.transcribe_array(audio, samplerate)
+
+def _render_job(structure, bars, cache):
+    structure = normalize_structure(structure)
+    data = make_music_midi(structure, filename=None, cache=cache, bars=bars)
+    return structure, structure_key(structure, bars=bars), data
+
+def _midi_response(structure, key, data):
+    name = _UNSAFE_NAME.sub("", structure.genre) or "music"
+    return Response(data, media_type="audio/midi", headers={
+        "Content-Disposition": f'attachment; filename="{name}_beat_{key[:8]}.mid"',
+        "X-Structure-Key": key,
+        "X-BPM": str(structure.bpm),
+    })
+
+async def _read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        raise ServiceError(400, "request body must be JSON")
+    if not isinstance(data, dict):
+        raise ServiceError(400, "request body must be a JSON object")
+    return data
+
+async def _read_prompt(request):
+    prompt = (await _read_json(request)).get("prompt")
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ServiceError(400, "missing 'prompt'")
+    return prompt
+
+async def _read_audio(request):
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > SERVICE_MAX_AUDIO_BYTES:
+        raise ServiceError(413, "audio too large")
+    body = await request.body()
+    if len(body) > SERVICE_MAX_AUDIO_BYTES:
+        raise ServiceError(413, "audio too large")
+    if not body:
+        raise ServiceError(400, "empty audio body")
+    return body
+
+def _is_audio(request):
+    content_type = request.headers.get("content-type", "")
+    return content_type.startswith("audio/") or content_type.startswith("application/octet-stream")
+
+def _bars(request):
+    value = request.query_params.get("bars")
+    if value is None:
+        return DEFAULT_BARS
+    if not value.isdigit() or not 1 <= int(value) <= MAX_BARS:
+        raise ServiceError(400, f"bars must be an integer from 1 to {MAX_BARS}")
+    return int(value)
+
+async def _parse(state, prompt):
+    """(structure dict, "local" | "api"); local hits never need an API key"""
+    # One prompt per request: the shared client's connection pool is the limit.
+    # The fast path and cache are tried first, so no key is looked up for them
+    stats = {}
+    [(structure, source)] = await parse_prompts_async(
+        [prompt], requests_per_second=None, api_key=get_openai_key(ask=False) or "",
+        cache=state.prompt_cache, stats=stats, with_sources=True,
+    )
+    if source in ("fast_path", "cache"):
+        return structure, "local"
+    if source is None:
+        raise ServiceError(503, "OpenAI API key not configured")
+    if source == "api_error":
+        # The structure is a random default, not an answer: report the upstream failure
+        error = stats["errors"][0]
+        if isinstance(error, openai.RateLimitError) or getattr(error, "status_code", None) in (503, 529):
+            raise ServiceError(503, "OpenAI is rate limiting or overloaded, retry later",
+                               {"Retry-After": str(SERVICE_RETRY_AFTER)})
+        raise ServiceError(502, f"OpenAI request failed: {type(error).__name__}")
+    if source == "malformed":
+        raise ServiceError(502, "OpenAI returned a response that isn't valid JSON")
+    return structure, "api"
+
+async def transcribe_endpoint(request):
+    state = request.app.state
+    body = await _read_audio(request)
+    async with state.jobs.slot():
+        text = await state.jobs.run(_transcribe_job, body)
+    return JSONResponse({"text": text})
+
+async def parse_endpoint(request):
+    state = request.app.state
+    prompt = await _read_prompt(request)
+    async with state.jobs.slot():
+        structure, source = await _parse(state, prompt)
+    return JSONResponse({"structure": structure, "source": source})
+
+async def render_endpoint(request):
+    state = request.app.state
+    bars = _bars(request)
+    data = await _read_json(request)
+    async with state.jobs.slot():
+        result = await state.jobs.run(_render_job, data, bars, state.render_cache)
+    return _midi_response(*result)
+
+async def generate_endpoint(request):
+    state = request.app.state
+    bars = _bars(request)
+    if _is_audio(request):
+        body, prompt = await _read_audio(request), None
+    else:
+        body, prompt = None, await _read_prompt(request)
+    async with state.jobs.slot():
+        if prompt is None:
+            prompt = await state.jobs.run(_transcribe_job, body)
+            if not prompt.strip():
+                raise ServiceError(422, "no speech detected")
+        structure, _ = await _parse(state, prompt)
+        result = await state.jobs.run(_render_job, structure, bars, state.render_cache)
+    return _midi_response(*result)
+
+async def health_endpoint(request):
+    state = request.app.state
+    return JSONResponse({"status": "ok", "whisper": state.whisper, "jobs": state.jobs.stats()})
+
+async def metrics_endpoint(request):
+    stats = request.app.state.jobs.stats()
+    lines = [
+        "# HELP music_assistant_service_jobs_pending Jobs queued or running.",
+        "# TYPE music_assistant_service_jobs_pending gauge",
+        f"music_assistant_service_jobs_pending {stats['pending']}",
+        "# HELP music_assistant_service_jobs_rejected_total Requests answered 503 because the queue was full.",
+        "# TYPE music_assistant_service_jobs_rejected_total counter",
+        f"music_assistant_service_jobs_rejected_total {stats['rejected']}",
+    ]
+    return PlainTextResponse(prometheus_text() + "\n".join(lines) + "\n",
+                             media_type="text/plain; version=0.0.4")
+
+async def _service_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status, headers=exc.headers)
+
+async def _warm_openai():
+    api_key = get_openai_key(ask=False)
+    if not api_key or not OPENAI_PREWARM_CONNECTION:
+        return
+    client = get_async_client(api_key).with_options(timeout=OPENAI_CONNECT_TIMEOUT, max_retries=0)
+    try:
+        await client.models.list()
+    except openai.OpenAIError:
+        pass  # the connection is what matters; errors surface on the real call
+
+def create_app(workers=SERVICE_WORKERS, queue_size=SERVICE_QUEUE_SIZE, prompt_cache=None,
+               render_cache=None, preload_whisper=SERVICE_PRELOAD_WHISPER):
+    """ASGI app; the caches default to the shared ones (the prompt cache on
+    disk, the render cache in memory)"""
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        state = app.state
+        state.jobs.start()
+        if preload_whisper:
+            state.whisper = "loading"
+            threading.Thread(target=_preload_whisper, args=(state,), name="whisper-preload",
+                             daemon=True).start()
+        warm = asyncio.create_task(_warm_openai())
+        try:
+            yield
+        finally:
+            warm.cancel()
+            await close_async_clients()
+            state.jobs.shutdown()
+
+    app = Starlette(
+        routes=[
+            Route("/transcribe", transcribe_endpoint, methods=["POST"]),
+            Route("/parse", parse_endpoint, methods=["POST"]),
+            Route("/render", render_endpoint, methods=["POST"]),
+            Route("/generate", generate_endpoint, methods=["POST"]),
+            Route("/health", health_endpoint),
+            Route("/metrics", metrics_endpoint),
+        ],
+        exception_handlers={ServiceError: _service_error},
+        lifespan=lifespan,
+    )
+    app.state.jobs = JobQueue(workers, queue_size)
+    app.state.prompt_cache = prompt_cache
+    app.state.render_cache = render_cache
+    app.state.whisper = "not loaded"
+    return app
+
+def main(argv=None):
+    import uvicorn  # only needed to serve, not to build the app
+
+    parser = argparse.ArgumentParser(description="Serve the music assistant over HTTP")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="job threads")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE,
+                        help="jobs admitted before answering 503")
+    parser.add_argument("--no-preload", action="store_true", help="load Whisper on the first request")
+    args = parser.parse_args(argv)
+
+    app = create_app(args.workers, args.queue_size, preload_whisper=not args.no_preload)
+    print(f"🎵 Music assistant API on http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
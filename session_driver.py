@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Scripted multi-session driver for streamlit_app.py.
+
+Starts the app with `streamlit run` (headless) and connects N simulated
+browser sessions over Streamlit's websocket protocol. Each session enters
+an API key, submits a text prompt and reruns until the MIDI download
+appears; prompts are answered by a local MockOpenAIServer with simulated
+latency. Reported per mode:
+
+  blocked   how long the script run that handled the click took (the
+            session's UI is frozen meanwhile)
+  to MIDI   from the click until the download button is shown
+  wall      until every session had its MIDI
+
+"inline" runs generation inside the click handler, as the app used to
+(STREAMLIT_BACKGROUND_JOBS=0); "jobs" uses the background executor.
+Needs the `websockets` package.
+
+Usage: python session_driver.py --sessions 16 --latency 0.5 [--mode jobs]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+import websockets
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from mock_openai_server import MockOpenAIServer
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+MODES = ("inline", "jobs")
+
+class Session:
+    """One simulated browser tab"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.auto_rerun = None  # (interval, fragment id) requested by st.fragment(run_every=...)
+
+    async def rerun(self, widgets=(), fragment_id=""):
+        """Run the script (or one fragment) with these widget states; returns its elements"""
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.widget_states.widgets.extend(widgets)
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+            message.rerun_script.is_auto_rerun = True
+        await self.ws.send(message.SerializeToString())
+        elements = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.ws.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                elements.append(forward.delta.new_element)
+            elif kind == "auto_rerun":
+                self.auto_rerun = (forward.auto_rerun.interval, forward.auto_rerun.fragment_id)
+            elif kind == "stop_auto_rerun":
+                self.auto_rerun = None
+            elif kind == "script_finished":
+                return elements
+
+def _find(elements, kind, label=None):
+    for element in elements:
+        if element.WhichOneof("type") == kind:
+            widget = getattr(element, kind)
+            if label is None or widget.label == label:
+                return widget
+    return None
+
+def _failed(elements):
+    return any(element.WhichOneof("type") == "alert" and element.alert.format == Alert.ERROR
+               for element in elements)
+
+def _state(widget_id, **value):
+    state = WidgetState(id=widget_id)
+    for name, data in value.items():
+        setattr(state, name, data)
+    return state
+
+async def _drive(url, index, nonce, poll_interval):
+    ws_url = url.replace("http", "ws", 1) + "/_stcore/stream"
+    async with websockets.connect(ws_url, subprotocols=["streamlit"], origin=url, max_size=None) as ws:
+        session = Session(ws)
+        elements = await session.rerun()
+        key = _state(_find(elements, "text_input").id, string_value="mock-key")
+        elements = await session.rerun([key])
+        prompt = _state(_find(elements, "text_area").id,
+                        string_value=f"a moody groove for session {index} of run {nonce}")
+        button = _find(elements, "button", "🎵 Generate from Text")
+
+        start = time.perf_counter()
+        elements = await session.rerun([key, prompt, _state(button.id, trigger_value=True)])
+        blocked = time.perf_counter() - start
+        while not _find(elements, "download_button") and not _failed(elements):
+            # Like the browser: rerun just the polling fragment on its timer
+            interval, fragment_id = session.auto_rerun or (poll_interval, "")
+            await asyncio.sleep(interval)
+            elements = await session.rerun([key, prompt], fragment_id)
+        return {"blocked": blocked, "to_midi": time.perf_counter() - start, "finished": time.perf_counter(),
+                "ok": _find(elements, "download_button") is not None}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start_app(mode, llm_url, workdir):
+    port = _free_port()
+    env = dict(os.environ, STREAMLIT_BACKGROUND_JOBS="1" if mode == "jobs" else "0",
+               OPENAI_BASE_URL=llm_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.address", "127.0.0.1", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/_stcore/health").text == "ok":
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("streamlit did not start")
+
+def run_mode(mode, sessions=8, latency=0.5, poll_interval=0.5):
+    """Drive `sessions` concurrent sessions against a fresh app; seconds"""
+    nonce = os.urandom(4).hex()  # prompts must miss the prompt cache
+    with MockOpenAIServer(latency=latency) as mock, tempfile.TemporaryDirectory() as workdir:
+        # The temp working directory keeps the app's caches and output out of the project
+        process, url = _start_app(mode, mock.url, workdir)
+        try:
+            async def drive_all():
+                # One warm-up session so imports and cached resources aren't timed
+                await _drive(url, -1, nonce, poll_interval)
+                start = time.perf_counter()
+                results = await asyncio.gather(*(_drive(url, i, nonce, poll_interval) for i in range(sessions)))
+                return results, max(r["finished"] for r in results) - start
+            results, wall = asyncio.run(drive_all())
+        finally:
+            process.terminate()
+            process.wait()
+
+    blocked = np.array([r["blocked"] for r in results])
+    to_midi = np.array([r["to_midi"] for r in results])
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "ok": sum(r["ok"] for r in results),
+        "wall": wall,
+        "blocked_p50": float(np.median(blocked)), "blocked_max": float(blocked.max()),
+        "to_midi_p50": float(np.median(to_midi)), "to_midi_max": float(to_midi.max()),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure concurrent Streamlit sessions")
+    parser.add_argument("--mode", choices=MODES + ("compare",), default="compare")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock LLM seconds per request")
+    args = parser.parse_args(argv)
+
+    print(f"🧪 {args.sessions} concurrent sessions, mock LLM latency {args.latency}s")
+    for mode in MODES if args.mode == "compare" else (args.mode,):
+        result = run_mode(mode, args.sessions, args.latency)
+        print(f"{mode:>7}: {result['ok']}/{result['sessions']} sessions got MIDI in {result['wall']:.2f}s | "
+              f"blocked p50 {result['blocked_p50'] * 1000:.0f} ms, max {result['blocked_max'] * 1000:.0f} ms | "
+              f"to MIDI p50 {result['to_midi_p50']:.2f}s, max {result['to_midi_max']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import numpy as np
+
+DEFAULT_PPQ = 480  # ticks per quarter note
+DRUM_CHANNEL = 9  # General MIDI percussion
+
+class NoteEvents:
+    """Array-backed notes for one track; times are in ticks"""
+
+    def __init__(self, pitch=(), velocity=(), start=(), end=(), channel=0, program=0, name=""):
+        self.pitch = np.asarray(pitch, dtype=np.int64)
+        self.velocity = np.asarray(velocity, dtype=np.int64)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.channel = channel
+        self.program = program
+        self.name = name
+
+    def __len__(self):
+        return len(self.pitch)
+
+    @property
+    def is_drum(self):
+        return self.channel == DRUM_CHANNEL
+
+    def extend(self, other):
+        """New NoteEvents with `other`'s notes appended"""
+        return NoteEvents(
+            np.concatenate((self.pitch, other.pitch)),
+            np.concatenate((self.velocity, other.velocity)),
+            np.concatenate((self.start, other.start)),
+            np.concatenate((self.end, other.end)),
+            self.channel, self.program, self.name,
+        )
+
+    def shift(self, ticks):
+        """New NoteEvents moved later by `ticks`"""
+        return NoteEvents(self.pitch, self.velocity, self.start + ticks, self.end + ticks,
+                          self.channel, self.program, self.name)
+
+    def tile(self, span, length, offset=0):
+        """Repeat these notes every `span` ticks to fill `length` ticks.
+
+        One vectorized broadcast instead of re-creating notes per repetition;
+        copies that would start at or past `length` are dropped and notes are
+        cut off at the end.
+        """
+        repeats = -(-length // span)  # ceil
+        shifts = np.arange(repeats, dtype=np.int64)[:, None] * span
+        start = (self.start[None, :] + shifts).ravel()
+        end = np.minimum((self.end[None, :] + shifts).ravel(), length)
+        keep = start < length
+        return NoteEvents(
+            np.tile(self.pitch, repeats)[keep], np.tile(self.velocity, repeats)[keep],
+            start[keep] + offset, end[keep] + offset,
+            self.channel, self.program, self.name,
+        )
+
+def _vlq_lengths(values):
+    """Bytes needed for each value as a MIDI variable-length quantity"""
+    return 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)
+
+def _vlq_bytes(value):
+    """Variable-length quantity for a single (scalar) value"""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+def _meta(delta, kind, data):
+    return _vlq_bytes(delta) + bytes((0xFF, kind)) + _vlq_bytes(len(data)) + data
+
+def _chunk(kind, data):
+    return kind + len(data).to_bytes(4, "big") + data
+
+def encode_note_events(events):
+    """Note on/off messages of one track as MTrk body bytes (no header, no end)"""
+    n = len(events)
+    if n == 0:
+        return b""
+
+    # Interleave on/off events and sort by time; offs sort before ons on the
+    # same tick so a repeated note isn't cut off by its predecessor. Notes
+    # last at least a tick, or a zero-length note's off would precede its on
+    times = np.concatenate((events.start, np.maximum(events.end, events.start + 1)))
+    is_on = np.concatenate((np.ones(n, dtype=np.int64), np.zeros(n, dtype=np.int64)))
+    pitch = np.concatenate((events.pitch, events.pitch))
+    velocity = np.concatenate((events.velocity, np.zeros(n, dtype=np.int64)))
+    order = np.lexsort((is_on, times))
+    times, is_on, pitch, velocity = times[order], is_on[order], pitch[order], velocity[order]
+
+    deltas = np.diff(times, prepend=0)
+    lengths = _vlq_lengths(deltas)
+    sizes = lengths + 3
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    out = np.zeros(int(sizes.sum()), dtype=np.uint8)
+
+    # Variable-length deltas, written one byte position at a time for all events
+    for k in range(4):
+        mask = lengths > k
+        if not mask.any():
+            break
+        byte = (deltas[mask] >> (7 * k)) & 0x7F
+        if k:
+            byte |= 0x80
+        out[offsets[mask] + lengths[mask] - 1 - k] = byte
+
+    status_at = offsets + lengths
+    out[status_at] = np.where(is_on == 1, 0x90, 0x80) | events.channel
+    out[status_at + 1] = np.clip(pitch, 0, 127)
+    out[status_at + 2] = np.clip(velocity, 0, 127)
+    return out.tobytes()
+
+def encode_track(events):
+    """Complete MTrk chunk: name, program change, notes, end of track"""
+    body = b""
+    if events.name:
+        body += _meta(0, 0x03, events.name.encode("utf-8"))
+    if not events.is_drum:
+        body += bytes((0x00, 0xC0 | events.channel, events.program & 0x7F))
+    body += encode_note_events(events)
+    body += _meta(0, 0x2F, b"")
+    return _chunk(b"MTrk", body)
+
+def encode_smf(tracks, bpm, ppq=DEFAULT_PPQ):
+    """Standard MIDI File (type 1) bytes: a tempo track plus one track per NoteEvents"""
+    tempo = int(round(60_000_000 / bpm))
+    conductor = (
+        _meta(0, 0x58, bytes((4, 2, 24, 8)))  # 4/4
+        + _meta(0, 0x51, tempo.to_bytes(3, "big"))
+        + _meta(0, 0x2F, b"")
+    )
+    header = _chunk(b"MThd", (1).to_bytes(2, "big") + (len(tracks) + 1).to_bytes(2, "big") + ppq.to_bytes(2, "big"))
+    return header + _chunk(b"MTrk", conductor) + b"".join(encode_track(track) for track in tracks)
@@ -0,0 +1,145 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+from config import STEP_GRID_RESOLUTION, MIDI_PPQ
+from music_schema import DRUM_NAMES
+from smf_writer import NoteEvents, DRUM_CHANNEL
+
+# Steps per beat (quarter note) for each grid resolution
+RESOLUTIONS = {
+    "16th": 4,
+    "32nd": 8,
+    "8th-triplet": 3,
+    "16th-triplet": 6,
+}
+
+BEATS_PER_BAR = 4
+
+# Drum note mapping (General MIDI drum map), rows of the step matrix in this order
+DRUM_MAP = {
+    "kick": 36,      # Bass Drum 1
+    "snare": 38,     # Acoustic Snare
+    "hats": 42,      # Closed Hi-Hat
+    "crash": 49,     # Crash Cymbal 1
+    "tom": 45,       # Low Tom
+    "clap": 39       # Hand Clap
+}
+INSTRUMENTS = DRUM_NAMES
+DRUM_PITCHES = np.array([DRUM_MAP[name] for name in INSTRUMENTS], dtype=np.int64)
+DEFAULT_VELOCITIES = {"kick": 100}
+DEFAULT_VELOCITY = 80
+
+def steps_per_beat(resolution):
+    """Accepts a RESOLUTIONS name or a plain steps-per-beat number"""
+    if isinstance(resolution, int):
+        return resolution
+    try:
+        return RESOLUTIONS[resolution]
+    except KeyError:
+        raise ValueError(f"Unknown grid resolution {resolution!r}; expected one of {sorted(RESOLUTIONS)}")
+
+@lru_cache(maxsize=1024)
+def parse_position(position):
+    """Beat position string to an offset in beats from the start of the bar.
+
+    "2" is beat two (1.0). A single digit 1-4 after the dot counts 16ths
+    within the beat ("2.3" = 1.5), matching the patterns GPT is prompted
+    with; anything else is a decimal fraction of the beat ("1.5" = 0.5,
+    "4.75" = 3.75). Returns None for unparseable positions.
+    """
+    beat, _, sub = position.strip().partition(".")
+    if not beat.isdigit() or (sub and not sub.isdigit()):
+        return None
+    offset = int(beat) - 1
+    if offset < 0:
+        return None
+    if len(sub) == 1 and sub in "1234":
+        return offset + (int(sub) - 1) / 4
+    return offset + (float("0." + sub) if sub else 0.0)
+
+@lru_cache(maxsize=4096)
+def parse_positions(hits, resolution=STEP_GRID_RESOLUTION, beats=BEATS_PER_BAR):
+    """Comma-separated positions to sorted, unique step indices on the grid"""
+    per_beat = steps_per_beat(resolution)
+    total = per_beat * beats
+    steps = set()
+    for position in hits.split(","):
+        offset = parse_position(position)
+        if offset is None:
+            continue
+        step = int(round(offset * per_beat))
+        if step < total:
+            steps.add(step)
+    return tuple(sorted(steps))
+
+class StepPattern:
+    """A drum pattern as an instrument x step velocity matrix (0 = no hit).
+
+    Compact and hashable, so patterns can be compared, diffed and rendered
+    to note events in bulk.
+    """
+
+    def __init__(self, matrix, resolution=STEP_GRID_RESOLUTION):
+        self.matrix = np.asarray(matrix, dtype=np.uint8)
+        self.resolution = resolution
+        self.steps_per_beat = steps_per_beat(resolution)
+
+    @classmethod
+    def from_pattern(cls, pattern, resolution=STEP_GRID_RESOLUTION, beats=BEATS_PER_BAR, velocities=None):
+        """Build from a {drum name: "positions"} dict; unknown drums are ignored"""
+        velocities = velocities or DEFAULT_VELOCITIES
+        matrix = np.zeros((len(INSTRUMENTS), steps_per_beat(resolution) * beats), dtype=np.uint8)
+        for row, name in enumerate(INSTRUMENTS):
+            hits = pattern.get(name)
+            if hits:
+                steps = parse_positions(hits, resolution, beats)
+                matrix[row, list(steps)] = velocities.get(name, DEFAULT_VELOCITY)
+        return cls(matrix, resolution)
+
+    @property
+    def steps(self):
+        return self.matrix.shape[1]
+
+    @property
+    def hits(self):
+        """Boolean matrix of where notes are"""
+        return self.matrix > 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.matrix))
+
+    def __eq__(self, other):
+        return (isinstance(other, StepPattern) and self.steps_per_beat == other.steps_per_beat
+                and np.array_equal(self.matrix, other.matrix))
+
+    def __hash__(self):
+        return hash((self.steps_per_beat, self.matrix.shape, self.matrix.tobytes()))
+
+    def key(self):
+        """Stable hex digest of the grid (for caching across processes)"""
+        header = f"{self.steps_per_beat}:{self.matrix.shape[0]}x{self.matrix.shape[1]}:".encode("ascii")
+        return hashlib.sha256(header + self.matrix.tobytes()).hexdigest()
+
+    def diff(self, other):
+        """(added, removed) boolean matrices going from self to other"""
+        if self.matrix.shape != other.matrix.shape or self.steps_per_beat != other.steps_per_beat:
+            raise ValueError("Can only diff patterns on the same grid")
+        return other.hits & ~self.hits, self.hits & ~other.hits
+
+    def to_pattern(self):
+        """Back to a {drum name: "positions"} dict, with positions as decimal beats"""
+        pattern = {}
+        for row, name in enumerate(INSTRUMENTS):
+            steps = np.flatnonzero(self.matrix[row])
+            if len(steps):
+                beats = 1 + steps / self.steps_per_beat
+                pattern[name] = ",".join(f"{beat:g}" for beat in np.round(beats, 4))
+        return pattern
+
+    def to_events(self, ppq=MIDI_PPQ, note_ticks=None, name="Drums"):
+        """All hits as drum-channel NoteEvents, in one vectorized pass"""
+        rows, steps = np.nonzero(self.matrix)
+        starts = (steps * ppq) // self.steps_per_beat
+        note_ticks = note_ticks or ppq // 8
+        return NoteEvents(DRUM_PITCHES[rows], self.matrix[rows, steps], starts, starts + note_ticks,
+                          channel=DRUM_CHANNEL, name=name)
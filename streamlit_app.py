@@ -1,9 +1,13 @@
 import streamlit as st
 import os
-import json
-from whisper_transcriber import record_audio, transcribe
-from gpt_parser import parse_prompt_to_structure
-from midi_generator import make_drum_midi
+import uuid
+from generation_jobs import JobManager
+from midi_store import get_midi_store
+from openai_client import get_client
+from preview_synth import preview_wav, warm_up as warm_up_preview
+from prompt_cache import get_prompt_cache
+from render_cache import get_render_cache
+from config import MIDI_STORE_ENABLED, PREVIEW_ENABLED, STREAMLIT_BACKGROUND_JOBS, STREAMLIT_POLL_INTERVAL
 
 st.set_page_config(
     page_title="AI Music Assistant",
@@ -11,9 +15,95 @@ st.set_page_config(
     layout="wide"
 )
 
+STATUS_LABELS = {
+    "queued": "⏳ Queued",
+    "recording": "🎙️ Listening... speak your music request!",
+    "parsing": "🧠 Processing with AI...",
+    "rendering": "🥁 Generating MIDI...",
+    "done": "✅ Done",
+    "error": "❌ Failed",
+}
+
+# Shared by every session in the server process, created on first use
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+@st.cache_resource
+def get_openai_client(api_key):
+    return get_client(api_key)
+
+@st.cache_resource
+def load_shared_resources():
+    """Open the caches and start loading Whisper in the background"""
+    get_prompt_cache()
+    get_render_cache()
+    store = get_midi_store() if MIDI_STORE_ENABLED else None
+    if PREVIEW_ENABLED:
+        warm_up_preview()
+    try:
+        from whisper_transcriber import warm_up
+        warm_up(background=True)
+    except (ImportError, OSError):
+        pass  # no audio stack: text input still works
+    return store
+
+def session_id():
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def submit_job(api_key, prompt=None):
+    """Queue a generation job for this session (prompt=None records voice)"""
+    kwargs = dict(prompt=prompt, client=get_openai_client(api_key), store=load_shared_resources())
+    if STREAMLIT_BACKGROUND_JOBS:
+        return get_job_manager().submit(session_id(), **kwargs)
+    with st.spinner(STATUS_LABELS["recording" if prompt is None else "parsing"]):
+        return get_job_manager().submit(session_id(), wait=True, **kwargs)
+
+def show_job(job):
+    """Progress of one job: transcript, parsed fields, then the download"""
+    job = job.snapshot()
+    st.markdown(f"**{STATUS_LABELS[job['status']]}**")
+    if job["transcript"]:
+        st.write(f"Transcribed: '{job['transcript']}'" if job["voice"] else f"Request: '{job['transcript']}'")
+    if job["structure"] or job["parsed"]:
+        st.json(job["structure"] or job["parsed"])
+    if job["error"]:
+        st.error(f"Error: {job['error']}")
+    if job["midi"] is not None:
+        st.success(f"✅ MIDI generated ({len(job['midi'])} bytes)")
+        st.download_button(
+            label="📥 Download MIDI",
+            data=job["midi"],
+            file_name=f"{job['structure'].get('genre', 'music')}_beat_{job['key'][:8]}.mid",
+            mime="audio/midi",
+            key=f"download_{job['id']}",
+            on_click="ignore",
+        )
+        if PREVIEW_ENABLED:
+            # Rendered once per structure, then served from the preview cache
+            st.audio(preview_wav(job["structure"]), format="audio/wav", loop=True)
+
+def show_jobs():
+    """This session's recent jobs; refreshes itself while any is running"""
+    jobs = get_job_manager().jobs_for(session_id())[:3]
+    running = any(not job.done for job in jobs)
+
+    @st.fragment(run_every=STREAMLIT_POLL_INTERVAL if running else None)
+    def progress():
+        for job in jobs:
+            with st.container(border=True):
+                show_job(job)
+        if running and all(job.done for job in jobs):
+            st.rerun()  # everything finished: redraw once without polling
+
+    progress()
+
 def main():
     st.title("🎵 AI Music Assistant")
     st.markdown("---")
+    load_shared_resources()
     
     # Sidebar for API key
     with st.sidebar:
@@ -32,41 +122,7 @@ def main():
     with col1:
         st.header("🎤 Voice Input")
         if st.button("🎙️ Record Voice Command", type="primary"):
-            if not api_key:
-                st.error("Please set your OpenAI API key first")
-                return
-            
-            with st.spinner("Recording... Speak your music request!"):
-                try:
-                    filename = record_audio(duration=5)
-                    text = transcribe(filename)
-                    st.success(f"Transcribed: '{text}'")
-                    
-                    # Process with AI
-                    with st.spinner("Processing with AI..."):
-                        parsed = parse_prompt_to_structure(text)
-                        st.json(parsed)
-                    
-                    # Generate MIDI
-                    with st.spinner("Generating MIDI..."):
-                        midi_file = make_drum_midi(
-                            parsed["pattern"], 
-                            bpm=parsed.get("bpm", 90),
-                            filename=f"midi_output/{parsed['genre']}_beat.mid"
-                        )
-                        st.success(f"✅ MIDI generated: {midi_file}")
-                        
-                        # Provide download link
-                        with open(midi_file, "rb") as f:
-                            st.download_button(
-                                label="📥 Download MIDI",
-                                data=f.read(),
-                                file_name=os.path.basename(midi_file),
-                                mime="audio/midi"
-                            )
-                            
-                except Exception as e:
-                    st.error(f"Error: {e}")
+            submit_job(api_key)
     
     with col2:
         st.header("📝 Text Input")
@@ -77,38 +133,12 @@ def main():
         )
         
         if st.button("🎵 Generate from Text", type="secondary"):
-            if not api_key:
-                st.error("Please set your OpenAI API key first")
-                return
-            
             if not text_input.strip():
                 st.error("Please enter a music request")
-                return
-            
-            try:
-                with st.spinner("Processing with AI..."):
-                    parsed = parse_prompt_to_structure(text_input)
-                    st.json(parsed)
-                
-                with st.spinner("Generating MIDI..."):
-                    midi_file = make_drum_midi(
-                        parsed["pattern"], 
-                        bpm=parsed.get("bpm", 90),
-                        filename=f"midi_output/{parsed['genre']}_beat.mid"
-                    )
-                    st.success(f"✅ MIDI generated: {midi_file}")
-                    
-                    # Provide download link
-                    with open(midi_file, "rb") as f:
-                        st.download_button(
-                            label="📥 Download MIDI",
-                            data=f.read(),
-                            file_name=os.path.basename(midi_file),
-                            mime="audio/midi"
-                        )
-                        
-            except Exception as e:
-                st.error(f"Error: {e}")
+            else:
+                submit_job(api_key, text_input)
+    
+    show_jobs()
     
     # Examples section
     st.markdown("---")
@@ -130,7 +160,7 @@ def main():
     1. **Voice/Text Input**: Describe the music you want
     2. **AI Processing**: GPT converts your request to structured music data
     3. **MIDI Generation**: Creates a drum pattern based on your request
-    4. **Download**: Get the MIDI file to use in your DAW
+    4. **Preview & Download**: Listen in the browser, then get the MIDI file for your DAW
     
     ### 🎛️ Next Steps:
     - Import the MIDI file into Ableton Live, FL Studio, or any DAW
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test multi-bar rendering and the arrangement engine
+"""
+
+import io
+import pretty_midi
+from arrangement import Arrangement, Section, Progression
+from midi_generator import render_midi_bytes
+from smf_writer import NoteEvents
+from step_grid import StepPattern
+
+STRUCTURE = {
+    "genre": "lo-fi",
+    "bpm": 80,
+    "music_type": "mixed",
+    "pattern": {"kick": "1,3", "snare": "2,4"},
+    "chords": ["Am", "F", "C", "G"],
+    "melody": None
+}
+
+def test_tile():
+    events = NoteEvents([36, 38], [100, 80], [0, 960], [60, 1020])
+    tiled = events.tile(1920, 1920 * 3, offset=100)
+    assert tiled.start.tolist() == [100, 1060, 2020, 2980, 3940, 4900]
+    # A span longer than the target is cut off
+    cut = NoteEvents([60], [70], [0], [4000]).tile(7680, 1920)
+    assert cut.end.tolist() == [1920]
+
+def test_chords_last_a_bar_each():
+    """Four chords over the default four-bar loop, at the real tempo"""
+    midi = pretty_midi.PrettyMIDI(io.BytesIO(render_midi_bytes(dict(STRUCTURE, music_type="chords"))))
+    starts = sorted({round(n.start, 3) for n in midi.instruments[0].notes})
+    assert starts == [0.0, 3.0, 6.0, 9.0]  # one bar = 4 beats = 3s at 80 BPM
+
+def test_sections_share_rendered_loops():
+    arrangement = Arrangement.from_structure(STRUCTURE, form=(("intro", 4), ("verse", 8), ("chorus", 4)))
+    assert arrangement.total_bars == 16
+    assert arrangement.duration_seconds == 48.0
+    assert arrangement.sections[0].drums is arrangement.sections[2].drums
+    drums, piano = arrangement.tracks()
+    assert drums.is_drum and len(drums) == 4 * 16
+    assert len(piano) == 3 * 4 * 4  # 4 triads per 4-bar progression
+    assert drums.start.max() < arrangement.total_ticks
+
+def test_sections_with_different_parts():
+    verse = StepPattern.from_pattern({"kick": "1,3"})
+    chorus = StepPattern.from_pattern({"kick": "1,2,3,4", "snare": "2,4"})
+    keys = Progression(chords=["Am", "G"], bars=2)
+    arrangement = Arrangement([
+        Section("verse", 2, drums=verse),
+        Section("chorus", 2, drums=chorus, progression=keys),
+    ], bpm=120)
+    midi = pretty_midi.PrettyMIDI(io.BytesIO(arrangement.render()))
+    drums = next(inst for inst in midi.instruments if inst.is_drum)
+    piano = next(inst for inst in midi.instruments if not inst.is_drum)
+    assert len(drums.notes) == 2 * 2 + 6 * 2
+    assert min(n.start for n in piano.notes) == 4.0  # chorus starts after 2 bars (8 beats at 120)
+
+def test_long_arrangement_matches_repeated_bars():
+    """128 bars of tiling equal 128 separately placed copies of the bar"""
+    grid = StepPattern.from_pattern(STRUCTURE["pattern"])
+    song = Arrangement([Section("loop", 128, drums=grid)], bpm=90)
+    drums = song.tracks()[0]
+    bar = grid.to_events()
+    assert len(drums) == 128 * len(bar)
+    assert sorted(drums.start.tolist()) == sorted(int(s) + b * 1920 for b in range(128) for s in bar.start)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the batch render CLI offline (pre-parsed structures and fast-path prompts)
+"""
+
+import json
+import os
+import types
+import pytest
+import batch_render
+import config
+import gpt_parser
+from batch_render import run_batch, read_items, completed_ids, main
+from prompt_cache import PromptCache
+
+@pytest.fixture(autouse=True)
+def isolated_prompt_cache(monkeypatch):
+    """Prompt lookups go to a throwaway cache, not .cache/prompt_cache.sqlite3"""
+    cache = PromptCache(":memory:")
+    monkeypatch.setattr(gpt_parser, "get_prompt_cache", lambda: cache)
+
+def _write_input(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            if i % 2:
+                f.write(json.dumps({"id": f"s{i}", "structure": {
+                    "bpm": 80 + i, "music_type": "drums", "pattern": {"kick": "1,3", "snare": "2,4"}}}) + "\n")
+            else:
+                f.write(json.dumps({"id": f"p{i}", "prompt": f"trap beat at {100 + i} bpm"}) + "\n")
+        f.write("not json\n")
+
+def _manifest(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_read_items_streams(tmp_path):
+    path = tmp_path / "in.jsonl"
+    _write_input(path, 3)
+    items = read_items(str(path))
+    assert isinstance(items, types.GeneratorType)
+    first = next(items)
+    assert first[:2] == (1, "p0")
+    assert list(items)[-1][2]["error"].startswith("invalid JSON")
+
+def test_batch_render_and_resume(tmp_path):
+    input_path = tmp_path / "in.jsonl"
+    out_dir = tmp_path / "out"
+    _write_input(input_path, 20)
+
+    totals = run_batch(str(input_path), str(out_dir), workers=2, chunk_size=3)
+    assert totals["ok"] == 20 and totals["errors"] == 1 and totals["skipped"] == 0
+
+    rows = _manifest(out_dir / "manifest.jsonl")
+    assert len(rows) == 21
+    ok = [row for row in rows if row["status"] == "ok"]
+    assert all(os.path.exists(row["path"]) and row["bytes"] > 0 for row in ok)
+    assert all(row["render_ms"] >= 0 and "parse_ms" in row for row in ok)
+    assert len({row["digest"] for row in ok}) == 20  # every tempo is a different file
+    assert completed_ids(str(out_dir / "manifest.jsonl")) == {row["id"] for row in ok}
+
+    # A second run only retries what failed
+    totals = run_batch(str(input_path), str(out_dir), workers=2, chunk_size=3)
+    assert totals["skipped"] == 20 and totals["ok"] == 0 and totals["errors"] == 1
+    assert len(_manifest(out_dir / "manifest.jsonl")) == 22
+
+def test_cli_exit_code(tmp_path):
+    input_path = tmp_path / "in.jsonl"
+    input_path.write_text(json.dumps({"structure": {"bpm": 90}}) + "\n")
+    assert main([str(input_path), "--out-dir", str(tmp_path / "out"), "--workers", "1"]) == 0
+
+def test_gpt_fallbacks_are_errors(monkeypatch):
+    """An API outage must not fill the batch with random loops marked ok"""
+    fallback = {"bpm": 140, "music_type": "drums", "pattern": {"kick": "1,3"}}
+    monkeypatch.setattr(batch_render, "parse_prompts", lambda prompts, **kwargs: [
+        (fallback, "api_error"), (fallback, "malformed"), (None, None), (fallback, "api")])
+    chunk = [(i, f"p{i}", {"prompt": f"something moody {i}"}) for i in range(4)]
+    resolved = batch_render.parse_chunk(chunk, api_key="test-key")
+    assert [row[3] for row in resolved] == [
+        "GPT fallback (api_error)", "GPT fallback (malformed)", "could not parse prompt", None]
+    assert [row[2] is None for row in resolved] == [True, True, True, False]
+
+def test_bad_prompts_and_missing_key_are_error_rows(tmp_path, monkeypatch):
+    """Without a key nothing asks for one; non-string prompts don't abort the batch"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "")
+    monkeypatch.setattr("builtins.input", lambda *args: pytest.fail("asked for an API key"))
+    input_path = tmp_path / "in.jsonl"
+    input_path.write_text("\n".join(json.dumps(item) for item in (
+        {"id": "number", "prompt": 123}, {"id": "null", "prompt": None},
+        {"id": "moody", "prompt": "something moody for a rainy scene"},
+        {"id": "trap", "prompt": "trap beat at 150 bpm"},
+    )) + "\n")
+    totals = run_batch(str(input_path), str(tmp_path / "out"), workers=1)
+    assert totals["ok"] == 1 and totals["errors"] == 3
+    errors = {row["id"]: row.get("error") for row in _manifest(tmp_path / "out" / "manifest.jsonl")}
+    assert errors == {"number": "prompt must be a string", "null": "prompt must be a string",
+                      "moody": "needs GPT, but no OpenAI API key is set", "trap": None}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test batch transcription with a stand-in model (no weights, no microphone)
+"""
+
+import json
+import multiprocessing
+import os
+import types
+import numpy as np
+import pytest
+import scipy.io.wavfile
+import whisper_transcriber
+from batch_transcribe import iter_audio_paths, transcribe_many, run_batch
+
+class FakeWhisperModel:
+    """Stand-in model that 'transcribes' a clip as its length in samples"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def transcribe(self, audio, **options):
+        segment = type("Segment", (), {"text": f" {len(audio)} samples"})()
+        return iter([segment]), None
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    monkeypatch.setattr(whisper_transcriber, "WhisperModel", FakeWhisperModel)
+    whisper_transcriber.clear_model_pool()
+    yield
+    whisper_transcriber.clear_model_pool()
+
+def _clips(directory, count):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        scipy.io.wavfile.write(os.path.join(directory, f"clip{i:02d}.wav"), 8000, np.zeros(8000 * (i + 1) // 2, np.int16))
+    with open(os.path.join(directory, "notes.txt"), "w") as f:
+        f.write("not audio")
+    return sorted(os.path.join(directory, f"clip{i:02d}.wav") for i in range(count))
+
+def test_iter_audio_paths_streams(tmp_path):
+    paths = _clips(str(tmp_path / "a"), 3)
+    found = iter_audio_paths([str(tmp_path), str(tmp_path / "extra.mp3")])
+    assert isinstance(found, types.GeneratorType)
+    assert list(found) == paths + [str(tmp_path / "extra.mp3")]
+
+def test_transcribe_in_process(tmp_path, fake_model):
+    paths = _clips(str(tmp_path), 3)
+    rows = sorted(transcribe_many(paths + [str(tmp_path / "missing.wav")], workers=0, readers=2),
+                  key=lambda row: row["index"])
+    assert [row["status"] for row in rows] == ["ok", "ok", "ok", "error"]
+    assert rows[1]["text"] == "16000 samples"  # one second, resampled from 8 kHz to 16 kHz
+    assert rows[1]["audio_seconds"] == 1.0 and rows[1]["rtf"] >= 0
+    assert "FileNotFoundError" in rows[3]["error"]
+
+def test_in_flight_is_bounded(tmp_path, fake_model):
+    paths = _clips(str(tmp_path), 2)
+    consumed = []
+
+    def backlog():
+        for i in range(1000):
+            consumed.append(i)
+            yield paths[i % 2]
+
+    rows = transcribe_many(backlog(), workers=0, readers=2, max_in_flight=4)
+    next(rows)
+    assert len(consumed) <= 5  # the in-flight window plus the one that just finished
+    rows.close()
+
+def test_worker_processes_hold_models(tmp_path, fake_model):
+    paths = _clips(str(tmp_path), 6)
+    # fork so the workers inherit the stand-in model (the default is spawn)
+    rows = list(transcribe_many(paths, workers=2, readers=2, mp_context=multiprocessing.get_context("fork")))
+    assert sorted(row["index"] for row in rows) == list(range(6))
+    assert all(row["status"] == "ok" for row in rows)
+    assert os.getpid() not in {row["worker"] for row in rows}
+
+def test_run_batch_resumes(tmp_path, fake_model):
+    _clips(str(tmp_path / "in"), 4)
+    output = str(tmp_path / "out" / "transcripts.jsonl")
+    totals = run_batch([str(tmp_path / "in")], output, workers=0)
+    assert totals["ok"] == 4 and totals["errors"] == 0 and totals["audio_seconds"] == 5.0
+    totals = run_batch([str(tmp_path / "in")], output, workers=0)
+    assert totals["ok"] == 0 and totals["skipped"] == 4
+    with open(output) as f:
+        assert len([json.loads(line) for line in f]) == 4
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark harness: calibration, skipping, baselines and regressions
+"""
+
+import json
+import bench_suite
+
+def test_measure_calibrates():
+    calls = []
+    stats = bench_suite.measure(lambda: calls.append(1), min_time=0.005, repeats=3)
+    assert stats["number"] > 1 and stats["repeats"] == 3
+    assert len(calls) >= 1 + stats["number"] * 3  # warm-up + every timed batch
+    assert stats["min"] <= stats["median"]
+
+def test_run_suite_subset():
+    results = bench_suite.run_suite("parse.chords", min_time=0.001, repeats=2)
+    assert set(results) == {"parse.chords.uncached", "parse.chords.cached_lookup"}
+    assert all(stats["median"] > 0 for stats in results.values())
+
+def test_skip_is_reported():
+    @bench_suite.benchmark("test.always_skips")
+    def setup():
+        raise bench_suite.Skip("not here")
+    try:
+        assert bench_suite.run_suite("test.always_skips") == {"test.always_skips": {"skipped": "not here"}}
+    finally:
+        del bench_suite.BENCHMARKS["test.always_skips"]
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}, "gpt.mock_stream": {"median": 1.0}}}
+    results = {"a": {"median": 1.3}, "b": {"median": 1.1}, "gpt.mock_stream": {"median": 1.3},
+               "new": {"median": 9.0}, "c": {"skipped": "x"}}
+    assert bench_suite.compare(results, baseline, threshold=0.25) == [("a", 1.3)]
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    bench_suite.save_baseline(path, {"a": {"median": 1.0}, "s": {"skipped": "x"}})
+    bench_suite.save_baseline(path, {"b": {"median": 2.0}}, bench_suite.load_baseline(path))
+    saved = json.loads(open(path).read())
+    assert set(saved["results"]) == {"a", "b"}
+    assert saved["machine"] == bench_suite.machine_info()
+    assert bench_suite.main(["-k", "parse.chords.cached", "--quick", "--baseline", path]) == 0
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the chord-symbol parser, voicing tables and voice leading
+"""
+
+import numpy as np
+import pytest
+from chords import parse_chord, chord_pitches, voicing_table, voice_lead
+from midi_generator import get_chord_notes, piano_events
+
+def test_existing_table_unchanged():
+    """The chords the old lookup table knew keep their voicings"""
+    assert get_chord_notes("C") == [60, 64, 67]
+    assert get_chord_notes("Am") == [57, 60, 64]
+    assert get_chord_notes("F") == [53, 57, 60]
+    assert get_chord_notes("G7") == [55, 59, 62, 65]
+    assert get_chord_notes("Dm7") == [50, 53, 57, 60]
+    assert get_chord_notes("Cmaj7") == [60, 64, 67, 71]
+
+@pytest.mark.parametrize("symbol, intervals", [
+    ("Ebmaj9", (0, 4, 7, 11, 14)),
+    ("F#m7b5", (0, 3, 6, 10)),
+    ("Bø7", (0, 3, 6, 10)),
+    ("Cdim7", (0, 3, 6, 9)),
+    ("G7#9", (0, 4, 7, 10, 15)),
+    ("D7(b9)", (0, 4, 7, 10, 13)),
+    ("C6/9", (0, 4, 7, 9, 14)),
+    ("Cadd9", (0, 4, 7, 14)),
+    ("G7sus4", (0, 5, 7, 10)),
+    ("CmMaj7", (0, 3, 7, 11)),
+    ("Cmmaj7", (0, 3, 7, 11)),
+    ("CmM7", (0, 3, 7, 11)),
+    ("Cm(maj7)", (0, 3, 7, 11)),
+    ("AmM9", (0, 3, 7, 11, 14)),
+    ("A5", (0, 7)),
+])
+def test_qualities(symbol, intervals):
+    assert parse_chord(symbol).intervals == intervals
+
+def test_roots_and_slash_bass():
+    assert parse_chord("Ebmaj9").root == 3
+    assert parse_chord("F#m7b5").root == 6
+    assert chord_pitches("C/E").tolist() == [52, 60, 64, 67]
+    assert parse_chord("Am/G").bass == 7
+
+def test_unknown_chords():
+    for symbol in ("H7", "Cxyz", "C7#10", ""):
+        with pytest.raises(ValueError):
+            parse_chord(symbol)
+    assert get_chord_notes("H7") == [60, 64, 67]  # falls back to C major
+
+def test_voicing_table_covers_all_roots():
+    table = voicing_table((0, 4, 7))
+    assert table.shape == (12, 3)
+    assert np.all(np.diff(table, axis=1) > 0)
+    assert not table.flags.writeable
+
+def test_voice_leading_moves_less():
+    progression = ["Dm7", "G7", "Cmaj7", "Fmaj7", "Bm7b5", "E7", "Am7"]
+    close = [chord_pitches(symbol) for symbol in progression]
+    led = voice_lead(progression)
+
+    def movement(voicings):
+        return sum(np.abs(np.sort(b)[:, None] - np.sort(a)[None, :]).min(axis=1).sum()
+                   for a, b in zip(voicings, voicings[1:]))
+
+    assert movement(led) < movement(close)
+    for symbol, voicing in zip(progression, led):
+        assert sorted(p % 12 for p in voicing) == sorted(p % 12 for p in chord_pitches(symbol))
+
+def test_jazz_chords_render():
+    events = piano_events(chords=["Ebmaj9", "F#m7b5"], bars=1)
+    assert len(events) == 9
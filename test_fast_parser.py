@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the local rule-based prompt parser
+"""
+
+from fast_parser import local_parse, try_fast_parse, fast_path_stats, reset_fast_path_stats
+
+def test_simple_prompts_parse_locally():
+    """Genre + BPM prompts are answered without the LLM"""
+    print("⚡ Testing fast-path parsing")
+    cases = [
+        ("Make a trap beat at 140 BPM", "trap", 140, "drums"),
+        ("house at 128 bpm", "house", 128, "drums"),
+        ("Make a boom bap beat at 90 BPM", "hip-hop", 90, "drums"),
+        ("Create jazz chords", "jazz", 120, "chords"),
+        ("Create a classical melody", "classical", 90, "melody"),
+        ("A techno rhythm @ 132", "techno", 132, "drums"),
+    ]
+    for prompt, genre, bpm, music_type in cases:
+        structure = try_fast_parse(prompt)
+        assert structure is not None, prompt
+        assert (structure["genre"], structure["bpm"], structure["music_type"]) == (genre, bpm, music_type)
+        assert "pattern" in structure
+        print(f"✅ '{prompt}' -> {genre} @ {bpm} ({music_type})")
+
+def test_chord_names_are_extracted():
+    """Chord symbols in the prompt become the progression"""
+    structure = try_fast_parse("lofi chords Dm7 G7 Cmaj7 please")
+    assert structure["chords"] == ["Dm7", "G7", "Cmaj7"]
+    # "A" at the start of a sentence is not a chord
+    assert try_fast_parse("A trap beat")["chords"] is None
+    assert try_fast_parse("A trap beat in C and G")["chords"] == ["C", "G"]
+    assert try_fast_parse("lofi chords A D E")["chords"] == ["A", "D", "E"]
+    print("✅ Chord names extracted")
+
+def test_unclear_prompts_fall_through():
+    """Prompts with details the rules can't capture go to the LLM"""
+    assert try_fast_parse("play something nice") is None
+    assert try_fast_parse("trap beat with heavy 808s and a dark melody in F minor") is None
+    assert local_parse("trap at 400 bpm")[0] is None
+    # A single word the rules ignore would change the result
+    assert try_fast_parse("slow trap beat") is None
+    assert try_fast_parse("trap beat in 3/4") is None
+    assert try_fast_parse("trap beat in 4/4") is not None
+    # Numbers the BPM rule can't use, and conflicting tempos
+    assert try_fast_parse("trap beat at 5") is None
+    assert try_fast_parse("trap beat at 1000 bpm") is None
+    assert try_fast_parse("trap at 90 bpm, 140 bpm") is None
+    print("✅ Low-confidence prompts fall through")
+
+def test_stats():
+    """Hit rate and latency percentiles are reported"""
+    reset_fast_path_stats()
+    try_fast_parse("house at 124 bpm")
+    try_fast_parse("something else entirely")
+    stats = fast_path_stats()
+    assert stats["attempts"] == 2 and stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["p50_us"] > 0
+    print(f"✅ Stats: {stats}")
+
+if __name__ == "__main__":
+    test_simple_prompts_parse_locally()
+    test_chord_names_are_extracted()
+    test_unclear_prompts_fall_through()
+    test_stats()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test background generation jobs (fast-path prompts and the mock LLM, no microphone)
+"""
+
+import time
+import midi_generator
+from generation_jobs import Job, JobManager, run_generation
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from openai_client import get_client
+from prompt_cache import PromptCache
+
+def _wait(manager, timeout=30):
+    deadline = time.monotonic() + timeout
+    while manager.active() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_text_job_runs_in_background():
+    manager = JobManager(workers=2)
+    try:
+        job = manager.submit("session-a", "trap beat at 150 bpm")
+        _wait(manager)
+    finally:
+        manager.shutdown()
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "done" and snapshot["error"] is None
+    assert snapshot["midi"].startswith(b"MThd")
+    assert snapshot["parsed"]["bpm"] == 150  # fields are reported as they are parsed
+    assert len(snapshot["key"]) == 64
+
+def test_streamed_fields_from_mock_llm():
+    with MockOpenAIServer() as mock:
+        manager = JobManager(workers=2)
+        try:
+            job = manager.submit("session-a", "something moody for a rainy scene",
+                                 client=get_client("test-key", mock.url), cache=PromptCache(":memory:"))
+            _wait(manager)
+        finally:
+            manager.shutdown()
+    assert job.status == "done"
+    assert job.parsed["pattern"] == DEFAULT_STRUCTURE["pattern"]
+    assert job.structure["genre"] == "hip-hop"
+
+def test_drums_are_ready_before_the_stream_ends():
+    """A drums-only loop is on the job while chords/melody are still streaming"""
+    job = Job("session-a", "something moody for a rainy scene")
+    ready = {}
+    set_field = job.set_field
+
+    def record(key, value):
+        ready[key] = job.midi is not None
+        set_field(key, value)
+
+    job.set_field = record
+    with MockOpenAIServer(token_delay=0.001) as mock:
+        run_generation(job, client=get_client("test-key", mock.url), cache=PromptCache(":memory:"))
+    assert job.status == "done"
+    assert ready["chords"] and ready["melody"]
+    assert job.midi.startswith(b"MThd")
+
+def test_failures_are_reported_on_the_job(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("renderer exploded")
+    monkeypatch.setattr(midi_generator, "make_music_midi", broken)
+    manager = JobManager(workers=1)
+    job = manager.submit("session-a", "house beat", wait=True)
+    assert job.status == "error" and job.error == "renderer exploded"
+    assert job.done and job.finished is not None
+
+def test_sessions_and_eviction():
+    manager = JobManager(workers=1, max_jobs=2)
+    first = manager.submit("session-a", "trap beat", wait=True)
+    second = manager.submit("session-b", "house beat", wait=True)
+    third = manager.submit("session-a", "techno beat", wait=True)
+    assert manager.get(first.id) is None  # oldest finished job dropped
+    assert manager.jobs_for("session-a") == [third]
+    assert manager.jobs_for("session-b") == [second]
+    manager.shutdown()
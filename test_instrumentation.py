@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test spans, percentiles and the Prometheus / Chrome trace exports
+"""
+
+import json
+import time
+import urllib.request
+import pytest
+import instrumentation
+from midi_generator import make_music_midi
+from render_cache import RenderCache
+
+@pytest.fixture
+def metrics():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_disabled_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    with instrumentation.span("idle"):
+        pass
+    make_music_midi({"bpm": 90}, filename=None, cache=RenderCache(root=None))
+    assert instrumentation.snapshot() == {}
+    assert instrumentation.chrome_trace()["traceEvents"] == []
+
+def test_disabled_overhead_is_negligible():
+    instrumentation.disable()
+
+    @instrumentation.timed()
+    def noop():
+        return None
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        noop()
+    assert (time.perf_counter() - start) / 100_000 < 5e-6
+
+def test_percentiles(metrics):
+    for ms in range(1, 101):
+        metrics.observe("stage", ms / 1000)
+    stats = metrics.snapshot()["stage"]
+    assert stats["count"] == 100
+    assert stats["p50"] == pytest.approx(0.0505)
+    assert stats["p95"] == pytest.approx(0.09505)
+    assert stats["p99"] == pytest.approx(0.09901)
+
+def test_wired_into_make_music_midi(metrics):
+    for bpm in (90, 100, 110):
+        make_music_midi({"bpm": bpm}, filename=None, cache=RenderCache(root=None))
+    assert metrics.snapshot()["make_music_midi"]["count"] == 3
+
+def test_prometheus_text(metrics):
+    with metrics.span("parse_prompt_to_structure"):
+        pass
+    text = metrics.prometheus_text()
+    assert "# TYPE music_assistant_stage_seconds summary" in text
+    assert 'music_assistant_stage_seconds{stage="parse_prompt_to_structure",quantile="0.99"}' in text
+    assert 'music_assistant_stage_seconds_count{stage="parse_prompt_to_structure"} 1' in text
+
+def test_chrome_trace_export(metrics, tmp_path):
+    with metrics.span("outer", prompt="trap"):
+        with metrics.span("inner"):
+            time.sleep(0.001)
+    with pytest.raises(ValueError):
+        with metrics.span("failing"):
+            raise ValueError("x")
+    prom_file, trace_file = metrics.export(str(tmp_path))
+    trace = json.loads(open(trace_file).read())
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert set(events) == {"outer", "inner", "failing"}
+    assert all(event["ph"] == "X" for event in events.values())
+    assert events["outer"]["args"] == {"prompt": "trap"}
+    assert events["failing"]["args"] == {"error": "ValueError"}
+    assert events["outer"]["ts"] <= events["inner"]["ts"]
+    assert events["outer"]["dur"] >= events["inner"]["dur"] >= 1000
+    assert "outer" in open(prom_file).read()
+
+def test_metrics_endpoint(metrics):
+    metrics.observe("render", 0.01)
+    server = metrics.serve_metrics(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+        assert 'stage="render"' in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test in-memory MIDI rendering and the content-addressed MIDI store
+"""
+
+import io
+import os
+import threading
+from midi_generator import make_music_midi, render_midi_bytes
+from midi_store import MidiStore, midi_digest
+from render_cache import RenderCache
+
+STRUCTURE = {
+    "genre": "trap",
+    "bpm": 140,
+    "music_type": "drums",
+    "pattern": {"kick": "1,2.3", "snare": "2,4", "hats": "1,1.3,2,2.3,3,3.3,4,4.3"}
+}
+
+def test_render_without_filesystem(tmp_path, monkeypatch):
+    """filename=None returns bytes and creates no files"""
+    monkeypatch.chdir(tmp_path)
+    data = make_music_midi(STRUCTURE, filename=None, cache=RenderCache(root=None))
+    assert isinstance(data, bytes) and data.startswith(b"MThd")
+    assert data == render_midi_bytes(STRUCTURE)
+    assert os.listdir(tmp_path) == []
+
+def test_render_into_file_object():
+    buffer = io.BytesIO()
+    assert make_music_midi(STRUCTURE, filename=buffer) is buffer
+    assert buffer.getvalue() == render_midi_bytes(STRUCTURE)
+
+def test_store_is_content_addressed(tmp_path):
+    store = MidiStore(str(tmp_path))
+    data = make_music_midi(STRUCTURE, filename=None, store=store)
+    digest = midi_digest(data)
+    assert digest in store
+    assert store.get(digest) == data
+    assert store.put(data) == digest
+    assert store.get("0" * 64) is None
+
+    other = make_music_midi(dict(STRUCTURE, bpm=90), filename=None, store=store)
+    assert midi_digest(other) != digest
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2
+
+def test_concurrent_puts(tmp_path):
+    """Many writers of the same render end up with one intact file"""
+    store = MidiStore(str(tmp_path))
+    data = render_midi_bytes(STRUCTURE)
+    threads = [threading.Thread(target=store.put, args=(data,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert files == [f"{midi_digest(data)}.mid"]
+    assert store.get(midi_digest(data)) == data
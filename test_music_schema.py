@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test validation and normalization of parsed music structures
+"""
+
+from music_schema import (
+    MusicStructure, normalize_structure, normalize_chord, normalize_positions, RESPONSE_FORMAT
+)
+from gpt_parser import _api_error_fallback, _malformed_response_fallback
+
+def test_coercion():
+    """Loose GPT output is coerced into a typed MusicStructure"""
+    print("🧪 Testing structure normalization")
+    structure = normalize_structure({
+        "genre": "Hip Hop",
+        "bpm": "300 bpm",
+        "pattern": {"Kick": "1, 1.3, 9, x", "hi-hat": ["1.2", 2.2], "cowbell": "1"},
+        "chords": ["am", "F♯m7b5", "Ebmaj9", "not a chord"],
+        "melody": ["c4", "A#5", "Z9"],
+    })
+    assert isinstance(structure, MusicStructure)
+    assert structure.genre == "hip-hop"
+    assert structure.bpm == 220
+    assert structure.pattern == {"kick": "1,1.3", "hats": "1.2,2.2"}
+    assert structure.chords == ["Am", "F#m7b5", "Ebmaj9"]
+    assert structure.melody == ["C4", "A#5"]
+    assert structure.music_type == "mixed"
+    print(f"✅ {structure}")
+
+def test_missing_fields_get_defaults():
+    """Missing genre no longer crashes app.get_filename"""
+    structure = normalize_structure({"pattern": {"kick": "1,3"}})
+    assert structure.genre == "hip-hop"
+    assert structure.bpm == 90
+    assert structure.music_type == "drums"
+    assert normalize_structure(None).pattern  # drums get a default pattern
+    print("✅ Defaults filled in")
+
+def test_genre_is_safe_in_file_names():
+    """A genre can't carry path separators into midi_output/"""
+    assert normalize_structure({"genre": "../../etc/passwd"}).genre == "etcpasswd"
+    assert normalize_structure({"genre": "/"}).genre == "hip-hop"
+    assert normalize_structure({"genre": "Lo Fi"}).genre == "lo-fi"
+
+def test_helpers():
+    assert normalize_positions("1.0, 2.1 ,3.3") == "1,2,3.3"
+    assert normalize_chord("Cmaj7/G") == "Cmaj7/G"
+    assert normalize_chord("Hm") is None
+    assert RESPONSE_FORMAT["json_schema"]["strict"] is True
+    print("✅ Position and chord helpers")
+
+def test_fallbacks_are_valid():
+    """The fallback structures evaluate (no `null` NameError) and validate"""
+    for fallback in (_api_error_fallback(), _malformed_response_fallback("not json")):
+        assert normalize_structure(fallback).to_dict() == fallback
+        assert "genre" in fallback and "music_type" in fallback
+    print("✅ Fallback structures are valid")
+
+if __name__ == "__main__":
+    test_coercion()
+    test_missing_fields_get_defaults()
+    test_helpers()
+    test_fallbacks_are_valid()
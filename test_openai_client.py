@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test that the shared OpenAI client reuses HTTP connections
+"""
+
+import asyncio
+import openai_client
+from gpt_parser import parse_prompt_to_structure
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from prompt_cache import PromptCache
+
+REQUESTS = 10
+
+def test_connection_reuse():
+    """N sequential requests through the shared client open one TCP connection"""
+    print("🔌 Testing connection reuse")
+    with MockOpenAIServer() as server:
+        client = openai_client.get_client("test-key", base_url=server.url)
+        assert openai_client.get_client("test-key", base_url=server.url) is client
+
+        before = openai_client.connection_stats()
+        for i in range(REQUESTS):
+            parsed = parse_prompt_to_structure(f"beat number {i}", client=client, cache=PromptCache(":memory:"))
+            assert parsed == DEFAULT_STRUCTURE
+        after = openai_client.connection_stats()
+
+        print(f"Server saw {server.connections} connection(s) for {server.requests} requests")
+        assert server.requests == REQUESTS
+        assert server.connections == 1
+        assert after["requests"] - before["requests"] == REQUESTS
+        assert after["connections"] - before["connections"] == 1
+        print(f"✅ Client stats: {after}")
+
+def test_async_connection_reuse():
+    """The async twin shares one pool per event loop"""
+    async def run(url):
+        client = openai_client.get_async_client("test-key", base_url=url)
+        assert openai_client.get_async_client("test-key", base_url=url) is client
+        for _ in range(REQUESTS):
+            await client.chat.completions.create(model="mock", messages=[{"role": "user", "content": "hi"}])
+        await openai_client.close_async_clients()
+
+    with MockOpenAIServer() as server:
+        asyncio.run(run(server.url))
+        assert server.connections == 1
+        print("✅ Async client reused its connection")
+
+def test_warm_connection():
+    """Prewarming opens the connection the first completion then reuses"""
+    with MockOpenAIServer() as server:
+        client = openai_client.warm_connection("warm-key", base_url=server.url)
+        assert server.connections == 1
+        parse_prompt_to_structure("beat number 0", client=client, cache=PromptCache(":memory:"))
+        assert server.connections == 1 and server.requests == 2
+        print("✅ Prewarmed connection was reused")
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_async_connection_reuse()
+    test_warm_connection()
+    openai_client.close_clients()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test concurrent prompt parsing against the local mock server
+"""
+
+import json
+import openai
+from gpt_parser import parse_prompts
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from prompt_cache import PromptCache
+
+def echo_responder(request_body):
+    """Put the prompt in the genre field so result order can be checked"""
+    structure = dict(DEFAULT_STRUCTURE, genre=request_body["messages"][-1]["content"])
+    return json.dumps(structure)
+
+def _async_client(url):
+    """A fresh AsyncOpenAI client for the server (each asyncio.run has its own loop)"""
+    return openai.AsyncOpenAI(api_key="test-key", base_url=url)
+
+def test_results_in_input_order():
+    """Concurrent results come back in the order the prompts were given"""
+    print("🧪 Testing parse_prompts_async ordering")
+    prompts = [f"prompt-{i}" for i in range(20)]
+    with MockOpenAIServer(responder=echo_responder, latency=0.01) as server:
+        results = parse_prompts(
+            prompts, concurrency=8, requests_per_second=None,
+            cache=PromptCache(":memory:"), client=_async_client(server.url)
+        )
+    assert [r["genre"] for r in results] == prompts
+    print("✅ Results are in input order")
+
+def test_retries_on_rate_limit():
+    """429s are retried with backoff until every prompt succeeds"""
+    print("🧪 Testing retry on rate limits")
+    prompts = [f"prompt-{i}" for i in range(12)]
+    stats = {}
+    with MockOpenAIServer(responder=echo_responder, rate_limit=5) as server:
+        results = parse_prompts(
+            prompts, concurrency=12, requests_per_second=None, max_retries=10,
+            cache=PromptCache(":memory:"), client=_async_client(server.url), stats=stats
+        )
+        rejected = server.rejected
+    assert [r["genre"] for r in results] == prompts
+    assert stats["failures"] == 0
+    assert stats["retries"] == rejected > 0
+    print(f"✅ {rejected} rate-limited requests were retried: {stats}")
+
+def test_fallbacks_are_reported():
+    """Random fallback structures are flagged so callers don't mistake them for answers"""
+    prompts = ["good", "bad", "trap beat at 150 bpm"]
+    stats = {}
+    responder = lambda body: "not json" if "bad" in json.dumps(body) else echo_responder(body)
+    with MockOpenAIServer(responder=responder) as server:
+        results = parse_prompts(
+            prompts, requests_per_second=None, cache=PromptCache(":memory:"),
+            client=_async_client(server.url), with_sources=True,
+        )
+    assert [source for _, source in results] == ["api", "malformed", "fast_path"]
+    assert results[0][0]["genre"] == "good"
+
+    with MockOpenAIServer(rate_limit=1) as server:
+        results = parse_prompts(
+            ["one", "two", "three"], requests_per_second=None, max_retries=0,
+            cache=PromptCache(":memory:"), client=_async_client(server.url), stats=stats, with_sources=True,
+        )
+    failed = [index for index, (_, source) in enumerate(results) if source == "api_error"]
+    assert failed and set(stats["errors"]) == set(failed)
+    assert all(type(stats["errors"][index]).__name__ == "RateLimitError" for index in failed)
+
+if __name__ == "__main__":
+    test_results_in_input_order()
+    test_retries_on_rate_limit()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the staged pipeline: queue hand-off, prefetch overlap, errors and timings
+"""
+
+import time
+import pytest
+from pipeline import Pipeline
+
+def _sleep_then(seconds, fn):
+    def stage(item):
+        time.sleep(seconds)
+        return fn(item)
+    return stage
+
+def test_stages_hand_off_in_order():
+    pipeline = Pipeline([("double", lambda x: x * 2), ("inc", lambda x: x + 1)]).start()
+    for i in range(5):
+        pipeline.submit(i)
+    pipeline.close()
+    assert list(pipeline.results()) == [1, 3, 5, 7, 9]
+
+def test_prefetch_overlaps_stages():
+    """Warm-up work runs during the first stage instead of after it"""
+    pipeline = Pipeline(
+        stages=[("record", _sleep_then(0.2, str)), ("parse", lambda text: (text, pipeline.prefetched("client")))],
+        prefetch={"model": lambda: time.sleep(0.15), "client": lambda: (time.sleep(0.15), "client")[1]},
+    )
+    start = time.perf_counter()
+    assert pipeline.run(7) == ("7", "client")
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.4  # sequential would be 0.5s
+    assert set(pipeline.timings) == {"record", "parse", "model", "client"}
+    report = pipeline.timing_report()
+    assert report[-1].startswith("total") and "overlapped" in report[-1]
+
+def test_successive_items_overlap():
+    """While item 2 is in stage A, item 1 is already in stage B"""
+    pipeline = Pipeline([("a", _sleep_then(0.1, str)), ("b", _sleep_then(0.1, str))]).start()
+    start = time.perf_counter()
+    for i in range(4):
+        pipeline.submit(i)
+    pipeline.close()
+    assert list(pipeline.results()) == ["0", "1", "2", "3"]
+    assert time.perf_counter() - start < 0.7  # sequential would be 0.8s
+
+def test_stage_error_surfaces():
+    def boom(item):
+        raise ValueError("bad item")
+    calls = []
+    pipeline = Pipeline([("boom", boom), ("after", calls.append)])
+    with pytest.raises(ValueError, match="bad item"):
+        pipeline.run(1)
+    assert calls == []  # later stages skip the failed item
+
+def test_prefetch_error_raised_by_waiter():
+    def fail():
+        raise RuntimeError("no model")
+    pipeline = Pipeline([("use", lambda item: pipeline.prefetched("model"))], prefetch={"model": fail})
+    with pytest.raises(RuntimeError, match="no model"):
+        pipeline.run(None)
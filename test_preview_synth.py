@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the audio preview renderer (one-shots, piano tones, overlap-add mixing, WAV output)
+"""
+
+import io
+import wave
+import numpy as np
+import preview_synth
+from preview_synth import drum_sample, piano_tone, render_preview, render_tracks, preview_wav, to_wav_bytes
+from smf_writer import NoteEvents, DRUM_CHANNEL
+from step_grid import DRUM_MAP
+
+STRUCTURE = {
+    "genre": "lo-fi",
+    "bpm": 90,
+    "music_type": "mixed",
+    "pattern": {"kick": "1,3", "snare": "2,4", "hats": "1,1.3,2,2.3,3,3.3,4,4.3"},
+    "chords": ["Am", "F", "C", "G"],
+    "melody": ["A4", "C5", "E5", "F5"]
+}
+
+def test_one_shots_are_cached_and_read_only():
+    for name in DRUM_MAP:
+        sample = drum_sample(name, 22050)
+        assert sample is drum_sample(name, 22050)
+        assert sample.dtype == np.float32 and not sample.flags.writeable
+        assert np.isclose(np.abs(sample).max(), 1.0)
+
+def test_piano_tone_length_and_pitch():
+    tone = piano_tone(69, 22050, 22050)  # A4 for one second
+    assert len(tone) == 22050 + int(preview_synth.PIANO_RELEASE_SECONDS * 22050)
+    spectrum = np.abs(np.fft.rfft(tone))
+    assert abs(np.argmax(spectrum) * 22050 / len(tone) - 440) < 5  # fundamental is strongest
+
+def test_loop_length_and_levels():
+    audio = render_preview(STRUCTURE, bars=4, sample_rate=22050)
+    assert len(audio) == round(4 * 4 * 60 / 90 * 22050)  # exactly four bars
+    assert 0.1 < np.abs(audio).max() <= preview_synth.HEADROOM + 1e-6
+
+def test_hits_land_on_their_ticks():
+    # One kick on beat 2 of a one-bar loop at 120 BPM (0.5 s per beat)
+    kick = NoteEvents([DRUM_MAP["kick"]], [127], [480], [540], channel=DRUM_CHANNEL)
+    audio = render_tracks([kick], bpm=120, length_ticks=4 * 480, sample_rate=8000)
+    assert np.all(audio[:4000] == 0) and np.abs(audio[4000:4100]).max() > 0
+
+def test_tails_wrap_around_the_loop():
+    crash = NoteEvents([DRUM_MAP["crash"]], [100], [3 * 480], [3 * 480 + 60], channel=DRUM_CHANNEL)
+    looped = render_tracks([crash], bpm=120, length_ticks=4 * 480, sample_rate=8000)
+    open_ended = render_tracks([crash], bpm=120, length_ticks=4 * 480, sample_rate=8000, loop=False)
+    assert len(looped) == 16000 and len(open_ended) > 16000
+    assert np.abs(looped[:1000]).max() > 0  # the crash rings into the next repetition
+    assert np.allclose(looped[:len(open_ended) - 16000], open_ended[16000:])
+
+def test_wav_bytes_and_cache():
+    data = preview_wav(STRUCTURE, bars=2)
+    assert data is preview_wav(dict(STRUCTURE, genre="jazz"), bars=2)  # genre doesn't change the sound
+    with wave.open(io.BytesIO(data)) as wav:
+        assert wav.getnchannels() == 1 and wav.getsampwidth() == 2
+        assert wav.getnframes() == round(2 * 4 * 60 / 90 * wav.getframerate())
+    assert to_wav_bytes(np.zeros(10, dtype=np.float32))[:4] == b"RIFF"
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the GPT response cache offline with a stubbed OpenAI client
+"""
+
+import json
+import time
+from gpt_parser import parse_prompt_to_structure
+from prompt_cache import PromptCache, normalize_prompt, make_cache_key
+
+TRAP_RESPONSE = {
+    "genre": "trap",
+    "bpm": 140,
+    "music_type": "drums",
+    "pattern": {"kick": "1,3", "snare": "2,4", "hats": "1.2,1.4,2.2,2.4"},
+    "chords": None,
+    "melody": None
+}
+
+class StubClient:
+    """Mimics client.chat.completions.create and counts calls"""
+
+    def __init__(self, payload):
+        self.calls = 0
+        self.payload = payload
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = type("Message", (), {"content": json.dumps(self.payload)})()
+        choice = type("Choice", (), {"message": message})()
+        return type("Response", (), {"choices": [choice]})()
+
+def test_normalize_prompt():
+    """Case, punctuation and spacing variations normalize to the same text"""
+    assert normalize_prompt("Make a TRAP beat at 140BPM!") == "make a trap beat at 140 bpm"
+    assert normalize_prompt("  make a trap beat   at 140 bpm. ") == "make a trap beat at 140 bpm"
+    assert make_cache_key("a", "m", "s", 0.7) != make_cache_key("a", "m", "s", 0.2)
+    print("✅ Prompt normalization")
+
+def test_cached_parse():
+    """The second, differently-worded request is served without an API call"""
+    print("🧪 Testing cached parsing")
+    cache = PromptCache(path=":memory:")
+    client = StubClient(TRAP_RESPONSE)
+
+    # Extra descriptors keep these prompts off the local fast path
+    first = parse_prompt_to_structure("Make a dark trap beat with heavy 808s at 140 bpm", client=client, cache=cache)
+    second = parse_prompt_to_structure("make a dark trap beat with heavy 808s at 140BPM!", client=client, cache=cache)
+    assert first == second == TRAP_RESPONSE
+    assert client.calls == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+    print(f"✅ Cache stats: {cache.stats()}")
+
+def test_ttl_and_eviction():
+    """Entries expire after the TTL and the disk tier keeps only max_entries"""
+    cache = PromptCache(path=":memory:", ttl=0.05, max_entries=2, memory_entries=1)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}  # disk hit, a is now most recent
+    cache.put("c", {"n": 3})  # evicts b
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    print("✅ TTL expiry and LRU eviction")
+
+def test_memory_hits_count_for_disk_eviction():
+    """An entry kept hot in the memory tier isn't the one evicted from disk"""
+    cache = PromptCache(path=":memory:", max_entries=2, memory_entries=2)
+    cache.put("hot", {"n": 1})
+    time.sleep(0.01)
+    cache.put("cold", {"n": 2})
+    time.sleep(0.01)
+    assert cache.get("hot") == {"n": 1}  # memory hit
+    cache.put("new", {"n": 3})  # evicts cold, not hot
+    cache._memory.clear()
+    assert cache.get("hot") == {"n": 1}
+    assert cache.get("cold") is None
+    print("✅ Memory hits refresh the disk tier's LRU order")
+
+if __name__ == "__main__":
+    test_normalize_prompt()
+    test_cached_parse()
+    test_ttl_and_eviction()
+    test_memory_hits_count_for_disk_eviction()
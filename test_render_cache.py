@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the render cache: canonical keys, LRU tiers, size caps and reuse
+"""
+
+import os
+from midi_generator import make_music_midi, render_midi_bytes
+from render_cache import RenderCache, structure_key, get_render_cache
+
+STRUCTURE = {
+    "genre": "hip-hop",
+    "bpm": 90,
+    "music_type": "drums",
+    "pattern": {"kick": "1,1.3,3", "snare": "2,4", "hats": "1.2,1.4,2.2,2.4"}
+}
+
+def _variant(bpm):
+    return dict(STRUCTURE, bpm=bpm)
+
+def test_structure_key_is_canonical():
+    """Equivalent structures share a key; musical changes don't"""
+    reordered = {
+        "bpm": "90 bpm",
+        "pattern": {"hats": "1.2, 1.4, 2.2, 2.4", "snare": "2.0,4", "kick": "1,1.3,3"},
+        "music_type": "drums",
+        "genre": "boom bap",
+    }
+    assert structure_key(reordered) == structure_key(STRUCTURE)
+    assert structure_key(_variant(91)) != structure_key(STRUCTURE)
+    assert structure_key(STRUCTURE, backend="pretty_midi") != structure_key(STRUCTURE, backend="smf")
+
+def test_repeat_renders_hit_memory(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    first = make_music_midi(STRUCTURE, filename=None, cache=cache)
+    second = make_music_midi(STRUCTURE, filename=None, cache=cache)
+    assert first == second == render_midi_bytes(STRUCTURE)
+    assert cache.stats()["misses"] == 1 and cache.stats()["memory_hits"] == 1
+    assert os.path.exists(cache.path(structure_key(STRUCTURE)))
+
+def test_disk_tier_survives_restart(tmp_path):
+    make_music_midi(STRUCTURE, filename=None, cache=RenderCache(str(tmp_path)))
+    reopened = RenderCache(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.get(structure_key(STRUCTURE)) == render_midi_bytes(STRUCTURE)
+    assert reopened.stats()["disk_hits"] == 1
+
+def test_entry_cap_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), max_entries=2)
+    keys = []
+    for bpm in (90, 100):
+        make_music_midi(_variant(bpm), filename=None, cache=cache)
+        keys.append(structure_key(_variant(bpm)))
+    cache.get(keys[0])  # 90 is now the most recently used
+    make_music_midi(_variant(110), filename=None, cache=cache)
+    assert len(cache) == 2
+    assert not os.path.exists(cache.path(keys[1]))
+    assert os.path.exists(cache.path(keys[0]))
+
+def test_byte_caps(tmp_path):
+    size = len(render_midi_bytes(STRUCTURE))
+    cache = RenderCache(str(tmp_path), max_bytes=size * 3, memory_bytes=size * 2)
+    for bpm in range(90, 100):
+        make_music_midi(_variant(bpm), filename=None, cache=cache)
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= size * 3 and len(cache) == 3
+    assert stats["memory_bytes"] <= size * 2
+
+def test_memory_only_cache():
+    cache = RenderCache(root=None)
+    make_music_midi(STRUCTURE, filename=None, cache=cache)
+    assert cache.get(structure_key(STRUCTURE)) == render_midi_bytes(STRUCTURE)
+    cache.clear()
+    assert len(cache) == 0
+
+def test_shared_cache_stays_off_disk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert get_render_cache().root is None
+    make_music_midi(STRUCTURE, filename=None)
+    assert os.listdir(tmp_path) == []  # nothing under .cache/
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the HTTP service in-process (Starlette TestClient, mock LLM, no Whisper)
+"""
+
+import asyncio
+import pytest
+from starlette.testclient import TestClient
+import service
+from fast_parser import fast_path_stats, reset_fast_path_stats
+from mock_openai_server import MockOpenAIServer
+from prompt_cache import PromptCache
+from render_cache import RenderCache
+from service import create_app, JobQueue, QueueFull
+
+STRUCTURE = {"bpm": 100, "music_type": "drums", "pattern": {"kick": "1,3", "snare": "2,4"}}
+
+def _client(**kwargs):
+    kwargs.setdefault("prompt_cache", PromptCache(":memory:"))
+    kwargs.setdefault("render_cache", RenderCache(root=None))
+    return TestClient(create_app(preload_whisper=False, **kwargs))
+
+def test_render_returns_midi_bytes():
+    with _client() as client:
+        response = client.post("/render?bars=2", json=STRUCTURE)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/midi"
+    assert response.content.startswith(b"MThd")
+    assert response.headers["x-bpm"] == "100"
+    assert response.headers["x-structure-key"][:8] in response.headers["content-disposition"]
+
+def test_bad_requests():
+    with _client() as client:
+        assert client.post("/render?bars=0", json=STRUCTURE).status_code == 400
+        assert client.post("/render", content=b"not json").status_code == 400
+        assert client.post("/parse", json={"text": "trap beat"}).status_code == 400
+        assert client.post("/transcribe", content=b"").status_code == 400
+
+def test_parse_locally_without_api_key(monkeypatch):
+    monkeypatch.setattr(service, "get_openai_key", lambda ask=False: "")
+    with _client() as client:
+        response = client.post("/parse", json={"prompt": "trap beat at 150 bpm"})
+        assert response.status_code == 200
+        assert response.json()["source"] == "local"
+        assert response.json()["structure"]["bpm"] == 150
+
+        # Only the API could answer this one
+        response = client.post("/parse", json={"prompt": "something moody for a rainy scene"})
+        assert response.status_code == 503
+
+def test_generate_through_mock_llm(monkeypatch):
+    with MockOpenAIServer() as mock:
+        monkeypatch.setenv("OPENAI_BASE_URL", mock.url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        with _client() as client:
+            reset_fast_path_stats()
+            parsed = client.post("/parse", json={"prompt": "something moody for a rainy scene"})
+            assert fast_path_stats()["attempts"] == 1  # the local lookup isn't repeated on a miss
+            generated = client.post("/generate", json={"prompt": "a slow groove for the credits"})
+    assert parsed.json()["source"] == "api"
+    assert parsed.json()["structure"]["genre"] == "hip-hop"
+    assert generated.status_code == 200
+    assert generated.content.startswith(b"MThd")
+
+def test_parse_reports_gpt_failures(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    with MockOpenAIServer(responder=lambda body: "not json") as mock:
+        monkeypatch.setenv("OPENAI_BASE_URL", mock.url)
+        with _client() as client:
+            response = client.post("/parse", json={"prompt": "something moody for a rainy scene"})
+    assert response.status_code == 502
+
+    class Overloaded(Exception):
+        status_code = 529
+
+    async def failing_parse(prompts, stats=None, **kwargs):
+        stats["errors"] = {0: Overloaded()}
+        return [(STRUCTURE, "api_error")]
+
+    monkeypatch.setattr(service, "parse_prompts_async", failing_parse)
+    with _client() as client:
+        response = client.post("/parse", json={"prompt": "something moody for a rainy scene"})
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+
+def test_full_queue_answers_503():
+    with _client(queue_size=0) as client:
+        response = client.post("/render", json=STRUCTURE)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/health").json()["jobs"]["rejected"] == 1
+        assert "music_assistant_service_jobs_rejected_total 1" in client.get("/metrics").text
+
+def test_job_queue_slots():
+    async def run():
+        jobs = JobQueue(workers=1, max_pending=1).start()
+        try:
+            async with jobs.slot():
+                assert await jobs.run(sum, [1, 2]) == 3
+                with pytest.raises(QueueFull):
+                    async with jobs.slot():
+                        pass
+            async with jobs.slot():
+                pass
+        finally:
+            jobs.shutdown()
+        return jobs.stats()
+
+    stats = asyncio.run(run())
+    assert stats["accepted"] == 2 and stats["rejected"] == 1 and stats["pending"] == 0
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the direct Standard MIDI File writer against mido/pretty_midi readers
+"""
+
+import io
+import mido
+import pretty_midi
+from midi_generator import make_music_midi, encode_midi, drum_events, piano_events
+from smf_writer import NoteEvents, encode_smf, _vlq_bytes, DEFAULT_PPQ
+
+STRUCTURE = {
+    "genre": "lo-fi",
+    "bpm": 85,
+    "music_type": "mixed",
+    "pattern": {"kick": "1,2.3,3", "snare": "2,4", "hats": "1.3,2.3,3.3,4.3"},
+    "chords": ["Am", "F", "C", "G"],
+    "melody": ["A4", "C5", "E5", "F5"]
+}
+
+def _notes(midi):
+    return sorted(
+        (inst.is_drum, n.pitch, n.velocity, round(n.start, 4), round(n.end, 4))
+        for inst in midi.instruments for n in inst.notes
+    )
+
+def test_vlq():
+    """Variable-length quantities from the SMF spec examples"""
+    assert _vlq_bytes(0) == b"\x00"
+    assert _vlq_bytes(0x7F) == b"\x7f"
+    assert _vlq_bytes(0x80) == b"\x81\x00"
+    assert _vlq_bytes(0x2000) == b"\xc0\x00"
+    assert _vlq_bytes(0x0FFFFFFF) == b"\xff\xff\xff\x7f"
+
+def test_large_deltas_round_trip():
+    """Vectorized VLQ encoding handles 1-4 byte deltas"""
+    starts = [0, 100, 20000, 3000000]
+    events = NoteEvents([60, 62, 64, 65], [90] * 4, starts, [s + 10 for s in starts])
+    midi = mido.MidiFile(file=io.BytesIO(encode_smf([events], 120)))
+    assert midi.type == 1 and midi.ticks_per_beat == DEFAULT_PPQ
+    ons, now = [], 0
+    for msg in midi.tracks[1]:
+        now += msg.time
+        if msg.type == "note_on" and msg.velocity:
+            ons.append((now, msg.note))
+    assert ons == list(zip(starts, [60, 62, 64, 65]))
+
+def test_repeated_note_not_cut_off():
+    """A note ending on the tick the same pitch restarts keeps both notes"""
+    events = NoteEvents([60, 60], [90, 90], [0, 480], [480, 960])
+    midi = pretty_midi.PrettyMIDI(io.BytesIO(encode_smf([events], 120)))
+    assert [(n.start, n.end) for n in midi.instruments[0].notes] == [(0.0, 0.5), (0.5, 1.0)]
+
+def test_zero_length_note_is_kept():
+    """A note with end == start still sounds (for a tick) instead of hanging"""
+    events = NoteEvents([60, 62], [90, 90], [0, 480], [0, 960])
+    midi = mido.MidiFile(file=io.BytesIO(encode_smf([events], 120)))
+    messages = [(msg.type if msg.velocity else "note_off", msg.note)
+                for msg in midi.tracks[1] if msg.type in ("note_on", "note_off")]
+    assert messages == [("note_on", 60), ("note_off", 60), ("note_on", 62), ("note_off", 62)]
+
+def test_matches_pretty_midi_backend():
+    """Both backends produce the same notes, tempo and drum flags"""
+    tracks = [drum_events(STRUCTURE["pattern"]), piano_events(STRUCTURE["chords"], STRUCTURE["melody"])]
+    smf = pretty_midi.PrettyMIDI(io.BytesIO(encode_midi(tracks, 85, backend="smf")))
+    legacy = pretty_midi.PrettyMIDI(io.BytesIO(encode_midi(tracks, 85, backend="pretty_midi")))
+    assert abs(smf.get_tempo_changes()[1][0] - 85) < 0.01
+    # pretty_midi quantizes to its own resolution; allow a tick of rounding
+    for a, b in zip(_notes(smf), _notes(legacy)):
+        assert a[:3] == b[:3]
+        assert abs(a[3] - b[3]) < 0.01 and abs(a[4] - b[4]) < 0.01
+    assert len(_notes(smf)) == len(_notes(legacy))
+
+def test_positions_are_beats(tmp_path):
+    """'2' is the second beat: at 120 BPM that is 0.5 seconds in"""
+    filename = make_music_midi({"bpm": 120, "music_type": "drums", "pattern": {"snare": "2,4"}},
+                               str(tmp_path / "snare.mid"), bars=1)
+    midi = pretty_midi.PrettyMIDI(filename)
+    assert [n.start for n in midi.instruments[0].notes] == [0.5, 1.5]
+    assert midi.instruments[0].is_drum
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_vlq()
+    test_large_deltas_round_trip()
+    test_repeated_note_not_cut_off()
+    test_matches_pretty_midi_backend()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_positions_are_beats(Path(tmp))
+    print("✅ SMF writer tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the startup budget: text mode must not load the speech stack or the OpenAI SDK
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from config import STARTUP_BUDGET_SECONDS
+from import_profile import parse_importtime, profile_stages
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ("openai", "httpx", "faster_whisper", "ctranslate2", "sounddevice", "scipy", "numpy", "pretty_midi")
+
+def _loaded_after(code, cwd):
+    """Which HEAVY modules are in sys.modules after running `code` in a fresh interpreter"""
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=HERE)
+    result = subprocess.run([sys.executable, "-c", check], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().rpartition("\n")[2].split(",") if name]
+
+def _time_to_prompt(cwd, prompt=b"Enter your music request"):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, "app.py")], cwd=cwd,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    timer = threading.Timer(30, process.kill)
+    timer.start()
+    try:
+        process.stdin.write(b"2\n")  # text mode
+        process.stdin.flush()
+        output = b""
+        while prompt not in output:
+            chunk = process.stdout.read1(4096)
+            assert chunk, f"app exited before prompting: {output!r}"
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+
+def test_text_mode_starts_within_budget(tmp_path):
+    # Best of three, so a busy machine doesn't fail the test
+    elapsed = min(_time_to_prompt(tmp_path) for _ in range(3))
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"time to first prompt {elapsed:.3f}s"
+
+def test_app_import_is_light(tmp_path):
+    assert _loaded_after("import app", tmp_path) == []
+
+def test_fast_path_does_not_load_openai(tmp_path):
+    loaded = _loaded_after("from gpt_parser import parse_prompt_to_structure\n"
+                           "assert parse_prompt_to_structure('trap beat at 150 bpm')['bpm'] == 150", tmp_path)
+    assert "openai" not in loaded and "faster_whisper" not in loaded
+
+def test_parse_importtime():
+    entries = parse_importtime([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   json.decoder",
+        "import time:       300 |        420 | json",
+    ])
+    assert entries == [("json.decoder", 120, 120, 1), ("json", 300, 420, 0)]
+
+def test_profile_charges_first_stage():
+    report = profile_stages([("first", ("colorsys",)), ("second", ("colorsys", "no_such_module_xyz"))])
+    assert [stage["stage"] for stage in report] == ["first", "second"]
+    assert [entry[0] for entry in report[0]["modules"]] == ["colorsys"]
+    assert "colorsys" not in [entry[0] for entry in report[1]["modules"]]
+    assert "ModuleNotFoundError" in report[1]["error"]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the step-grid drum pattern engine
+"""
+
+import numpy as np
+import pytest
+from step_grid import StepPattern, parse_position, parse_positions, DRUM_MAP, INSTRUMENTS
+
+def test_parse_position():
+    """16th indices, decimal beats and junk"""
+    assert parse_position("1") == 0.0
+    assert parse_position("2.3") == 1.5   # third 16th of beat 2
+    assert parse_position("4.4") == 3.75
+    assert parse_position("1.5") == 0.5   # decimal: half a beat
+    assert parse_position("4.8") == pytest.approx(3.8)
+    assert parse_position("3.25") == 2.25
+    assert parse_position("x") is None and parse_position("0") is None and parse_position("1.a") is None
+
+def test_positions_snap_to_resolution():
+    """Positions GPT produces off the 16th grid are snapped, not dropped"""
+    assert parse_positions("1,1.5,2,2.5") == (0, 2, 4, 6)
+    assert parse_positions("1.2,1.4,1.6,1.8") == (1, 2, 3)  # 1.6 snaps onto 1.3
+    assert parse_positions("1,1.3,2", "32nd") == (0, 4, 8)
+    assert parse_positions("1,1.33,1.67,2", "8th-triplet") == (0, 1, 2, 3)
+    assert parse_positions("4.99") == ()  # would snap past the end of the bar
+
+def test_matrix_and_events():
+    grid = StepPattern.from_pattern({"kick": "1,3", "snare": "2,4", "hats": "1.3,2.3", "cowbell": "1"})
+    assert grid.matrix.shape == (len(INSTRUMENTS), 16)
+    assert len(grid) == 6
+    events = grid.to_events(ppq=480)
+    assert events.is_drum
+    notes = sorted(zip(events.start.tolist(), events.pitch.tolist(), events.velocity.tolist()))
+    assert notes[:3] == [(0, DRUM_MAP["kick"], 100), (240, DRUM_MAP["hats"], 80), (480, DRUM_MAP["snare"], 80)]
+    assert np.all(events.end - events.start == 60)
+
+def test_triplet_ticks():
+    grid = StepPattern.from_pattern({"hats": "1,1.33,1.67"}, "8th-triplet")
+    assert sorted(grid.to_events(ppq=480).start.tolist()) == [0, 160, 320]
+
+def test_hash_equality_and_diff():
+    a = StepPattern.from_pattern({"kick": "1,3", "snare": "2,4"})
+    b = StepPattern.from_pattern({"snare": "2.0,4", "kick": "1, 3"})
+    c = StepPattern.from_pattern({"kick": "1,2.3,3", "snare": "2"})
+    assert a == b and hash(a) == hash(b) and a.key() == b.key()
+    assert a != c and a.key() != c.key()
+    added, removed = a.diff(c)
+    assert added.sum() == 1 and added[INSTRUMENTS.index("kick"), 6]
+    assert removed.sum() == 1 and removed[INSTRUMENTS.index("snare"), 12]
+
+def test_round_trip_to_pattern():
+    grid = StepPattern.from_pattern({"kick": "1,1.5,3", "hats": "1.2,4.4"})
+    assert grid.to_pattern() == {"kick": "1,1.5,3", "hats": "1.25,4.75"}
+    assert StepPattern.from_pattern(grid.to_pattern()) == grid
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test streamed JSON decoding and early MIDI rendering against the mock server
+"""
+
+import json
+import os
+import tempfile
+import openai
+from gpt_parser import stream_prompt_to_structure
+from json_stream import IncrementalJSONObject
+from midi_generator import StreamingMidiRenderer
+from mock_openai_server import MockOpenAIServer, DEFAULT_STRUCTURE
+from prompt_cache import PromptCache
+
+def test_incremental_decoder():
+    """Fields are reported once complete, however the text is split"""
+    text = "```json\n" + json.dumps(DEFAULT_STRUCTURE) + "\n```"
+    for step in (1, 3, 7):
+        decoder = IncrementalJSONObject()
+        seen = []
+        for i in range(0, len(text), step):
+            seen += [key for key, _ in decoder.feed(text[i:i + step])]
+        assert decoder.done
+        assert decoder.fields == DEFAULT_STRUCTURE
+        assert seen == list(DEFAULT_STRUCTURE)
+    print("✅ Incremental decoder handles arbitrary chunking")
+
+def test_drums_render_before_stream_ends():
+    """A drums-only MIDI file is written before chords/melody have streamed in"""
+    print("🧪 Testing early MIDI start")
+    with tempfile.TemporaryDirectory() as tmp, MockOpenAIServer(token_delay=0.001) as server:
+        filename = os.path.join(tmp, "stream.mid")
+        renderer = StreamingMidiRenderer(filename)
+        order = []
+
+        def on_field(key, value):
+            order.append((key, renderer.written is not None))
+            renderer.on_field(key, value)
+
+        client = openai.OpenAI(api_key="test-key", base_url=server.url)
+        parsed = stream_prompt_to_structure("give me a beat", on_field=on_field,
+                                            client=client, cache=PromptCache(":memory:"))
+        assert parsed == DEFAULT_STRUCTURE
+        # The file already existed when "chords" arrived
+        assert dict(order)["chords"] is True
+        assert renderer.finish(parsed) == filename
+        assert os.path.exists(filename)
+    print("✅ Drum track rendered while the response was still streaming")
+
+if __name__ == "__main__":
+    test_incremental_decoder()
+    test_drums_render_before_stream_ends()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory transcription path without a microphone or model weights
+"""
+
+import numpy as np
+import whisper_transcriber
+
+class FakeWhisperModel:
+    """Stand-in model that remembers the buffer it was asked to decode"""
+
+    def __init__(self, *args, **kwargs):
+        self.audio = None
+
+    def transcribe(self, audio, **options):
+        self.audio = audio
+        segment = type("Segment", (), {"text": " make a trap beat"})()
+        return iter([segment]), None
+
+def test_to_whisper_audio():
+    """Buffers are downmixed, converted to float32 and resampled to 16 kHz"""
+    print("🧪 Testing audio conversion")
+
+    stereo = np.zeros((44100, 2), dtype=np.float32)
+    audio = whisper_transcriber.to_whisper_audio(stereo, 44100)
+    assert audio.dtype == np.float32
+    assert audio.shape == (16000,)
+    print("✅ 1 s of 44.1 kHz stereo -> 16000 mono samples")
+
+    pcm = np.full(16000, 16384, dtype=np.int16)
+    audio = whisper_transcriber.to_whisper_audio(pcm, 16000)
+    assert audio.dtype == np.float32
+    assert abs(audio[0] - 0.5) < 1e-3
+    print("✅ int16 PCM is scaled to [-1, 1]")
+
+    pcm = np.array([[0, 128], [128, 128], [255, 255]], dtype=np.uint8)
+    audio = whisper_transcriber.to_whisper_audio(pcm, 16000)
+    assert np.allclose(audio, [-0.5, 0.0, 127 / 128])
+    print("✅ unsigned 8-bit PCM is centred on 128")
+
+def test_transcribe_array():
+    """transcribe_array hands the model a 16 kHz buffer instead of a filename"""
+    print("🧪 Testing transcribe_array")
+
+    original_model = whisper_transcriber.WhisperModel
+    whisper_transcriber.WhisperModel = FakeWhisperModel
+    whisper_transcriber.clear_model_pool()
+    try:
+        tone = np.sin(np.linspace(0, 2 * np.pi * 440, 44100 * 2)).astype(np.float32)
+        text = whisper_transcriber.transcribe_array(tone, 44100)
+        assert text == "make a trap beat"
+        model = whisper_transcriber.get_model()
+        assert isinstance(model.audio, np.ndarray)
+        assert model.audio.shape == (32000,)
+        print(f"✅ Transcribed: '{text}'")
+    finally:
+        whisper_transcriber.WhisperModel = original_model
+        whisper_transcriber.clear_model_pool()
+
+if __name__ == "__main__":
+    test_to_whisper_audio()
+    test_transcribe_array()
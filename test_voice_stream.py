@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test streaming transcription and endpointing with synthetic audio
+"""
+
+import numpy as np
+import whisper_transcriber
+from voice_stream import StreamingTranscriber, RingBuffer
+
+SAMPLE_RATE = 16000
+
+class ChunkCountingModel:
+    """Stand-in model that reports how long each decoded chunk was"""
+
+    def __init__(self, *args, **kwargs):
+        self.chunks = []
+
+    def transcribe(self, audio, initial_prompt=None, **options):
+        self.chunks.append(len(audio) / SAMPLE_RATE)
+        segment = type("Segment", (), {"text": f" phrase{len(self.chunks)}"})()
+        return iter([segment]), None
+
+def synthetic_speech():
+    """Two 'phrases' of tone separated by a short pause, then a long silence"""
+    rng = np.random.default_rng(0)
+
+    def silence(seconds):
+        return (0.001 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+    def tone(seconds):
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        return (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+
+    audio = np.concatenate([silence(0.5), tone(1.5), silence(0.5), tone(1.0), silence(6.0)])
+    return [audio[i:i + 480] for i in range(0, len(audio), 480)]
+
+def test_ring_buffer_wraps():
+    """Reads across the wrap-around point return samples in order"""
+    ring = RingBuffer(10)
+    ring.write(np.arange(8))
+    ring.write(np.arange(8, 14))
+    assert ring.read(6, 14).tolist() == list(range(6, 14))
+    assert ring.read(0, 4).tolist() == []  # overwritten
+    print("✅ Ring buffer wraps correctly")
+
+def test_streaming_endpointing():
+    """Capture stops after trailing silence and phrases are decoded as they finish"""
+    print("🧪 Testing streaming transcription")
+
+    original_model = whisper_transcriber.WhisperModel
+    whisper_transcriber.WhisperModel = ChunkCountingModel
+    whisper_transcriber.clear_model_pool()
+    try:
+        transcriber = StreamingTranscriber()
+        results = list(transcriber.stream(source=synthetic_speech()))
+        model = whisper_transcriber.get_model()
+    finally:
+        whisper_transcriber.WhisperModel = original_model
+        whisper_transcriber.clear_model_pool()
+
+    partials = [text for text, final in results if not final]
+    final_text, is_final = results[-1]
+    print(f"Partials: {partials}")
+    print(f"Final: '{final_text}'")
+
+    assert is_final
+    assert partials == ["phrase1", "phrase1 phrase2"]
+    assert final_text == "phrase1 phrase2"
+    assert len(model.chunks) == 2
+    # Capture ends ~0.8 s after speech, well before the 6 s of trailing silence
+    assert 4.0 < transcriber.consumed / SAMPLE_RATE < 5.0
+    print("✅ Endpointer stopped capture after trailing silence")
+
+if __name__ == "__main__":
+    test_ring_buffer_wraps()
+    test_streaming_endpointing()
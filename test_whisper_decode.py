@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the Whisper decode profile and the decode sweep without model weights
+"""
+
+import numpy as np
+import scipy.io.wavfile
+import whisper_transcriber
+from bench_whisper_decode import word_errors, load_clips, sweep, pick
+
+class FakeWhisperModel:
+    """Stand-in model that records how it was built and decoded"""
+    built = []
+    decoded = []
+
+    def __init__(self, model_size, **kwargs):
+        FakeWhisperModel.built.append(dict(kwargs, model_size=model_size))
+
+    def transcribe(self, audio, **options):
+        FakeWhisperModel.decoded.append(options)
+        segment = type("Segment", (), {"text": " Make a trap beat."})()
+        return iter([segment]), None
+
+def test_decode_options():
+    options = whisper_transcriber.decode_options()
+    assert options["language"] == "en"
+    assert options["without_timestamps"] is True
+    assert options["condition_on_previous_text"] is False
+    assert whisper_transcriber.decode_options(beam_size=1)["beam_size"] == 1
+
+def test_transcribe_array_uses_profile(monkeypatch):
+    monkeypatch.setattr(whisper_transcriber, "WhisperModel", FakeWhisperModel)
+    whisper_transcriber.clear_model_pool()
+    FakeWhisperModel.decoded.clear()
+    try:
+        assert whisper_transcriber.transcribe_array(np.zeros(16000, dtype=np.float32)) == "Make a trap beat."
+    finally:
+        whisper_transcriber.clear_model_pool()
+    assert FakeWhisperModel.decoded[-1] == whisper_transcriber.decode_options()
+    assert "num_workers" in FakeWhisperModel.built[-1]
+
+def test_word_errors():
+    assert word_errors("Make a trap beat at 140 BPM.", "make a trap beat at 140 bpm") == (0, 7)
+    assert word_errors("make a trap beat", "make the trap beat") == (1, 4)  # substitution
+    assert word_errors("make a trap beat", "make trap beat") == (1, 4)  # deletion
+    assert word_errors("make a beat", "make a trap beat now") == (2, 3)  # insertions
+
+def test_sweep_reports_rtf_and_wer(tmp_path, monkeypatch):
+    for name, text in (("a", "make a trap beat"), ("b", "make a house beat")):
+        scipy.io.wavfile.write(tmp_path / f"{name}.wav", 44100, np.zeros(44100, dtype=np.int16))
+        (tmp_path / f"{name}.txt").write_text(text)
+    (tmp_path / "orphan.wav").write_bytes(b"")  # no reference: skipped
+    clips = load_clips(str(tmp_path))
+    assert [name for name, _, _ in clips] == ["a", "b"] and len(clips[0][1]) == 16000
+
+    monkeypatch.setattr(whisper_transcriber, "WhisperModel", FakeWhisperModel)
+    FakeWhisperModel.decoded.clear()
+    results = sweep(clips, "tiny", compute_types=("int8",), threads=(1, 2), workers=(1,), beams=(1, 5))
+    assert len(results) == 4
+    assert all(result["wer"] == 1 / 8 and result["rtf"] > 0 for result in results)
+    assert {options["beam_size"] for options in FakeWhisperModel.decoded} == {1, 5}
+    assert pick([dict(results[0], rtf=0.5, wer=0.3), dict(results[1], rtf=0.2, wer=0.1),
+                 dict(results[2], rtf=0.1, wer=0.2)])["rtf"] == 0.2
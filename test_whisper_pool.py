@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the Whisper model pool without loading real model weights
+"""
+
+import whisper_transcriber
+
+class FakeWhisperModel:
+    """Stand-in for WhisperModel that only records how it was built"""
+    loads = 0
+
+    def __init__(self, model_size, device="auto", compute_type="default", cpu_threads=0, num_workers=1):
+        FakeWhisperModel.loads += 1
+        self.model_size = model_size
+
+    def transcribe(self, audio, **options):
+        return iter([]), None
+
+def test_model_pool():
+    """Models are loaded once, reused, and evicted least-recently-used first"""
+    print("🧪 Testing Whisper model pool")
+    print("=" * 30)
+
+    original_model = whisper_transcriber.WhisperModel
+    original_limit = whisper_transcriber.WHISPER_MAX_RESIDENT_MODELS
+    whisper_transcriber.WhisperModel = FakeWhisperModel
+    whisper_transcriber.WHISPER_MAX_RESIDENT_MODELS = 2
+    whisper_transcriber.clear_model_pool()
+    FakeWhisperModel.loads = 0
+
+    try:
+        tiny = whisper_transcriber.get_model("tiny")
+        assert whisper_transcriber.get_model("tiny") is tiny
+        assert FakeWhisperModel.loads == 1
+        print("✅ Repeated requests reuse the resident model")
+
+        whisper_transcriber.get_model("base")
+        whisper_transcriber.get_model("tiny")  # tiny is now most recently used
+        whisper_transcriber.get_model("small")  # evicts base
+        assert FakeWhisperModel.loads == 3
+        assert whisper_transcriber.get_model("tiny") is tiny
+        whisper_transcriber.get_model("base")
+        assert FakeWhisperModel.loads == 4
+        print("✅ Least recently used model is evicted")
+
+        whisper_transcriber.clear_model_pool()
+        whisper_transcriber.warm_up("tiny")
+        assert FakeWhisperModel.loads == 5
+        whisper_transcriber.get_model("tiny")
+        assert FakeWhisperModel.loads == 5
+        whisper_transcriber.warm_up("tiny", num_workers=2)
+        whisper_transcriber.get_model("tiny", num_workers=2)
+        assert FakeWhisperModel.loads == 6
+        print("✅ Warm-up preloads the model")
+    finally:
+        whisper_transcriber.WhisperModel = original_model
+        whisper_transcriber.WHISPER_MAX_RESIDENT_MODELS = original_limit
+        whisper_transcriber.clear_model_pool()
+
+if __name__ == "__main__":
+    test_model_pool()
@@ -0,0 +1,219 @@
+import threading
+import time
+import numpy as np
+from whisper_transcriber import get_model, decode_options, WHISPER_SAMPLE_RATE
+
+class RingBuffer:
+    """Fixed-size float32 audio buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=np.float32)
+        self.total = 0  # samples written since start
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def write(self, block):
+        """Append samples (called from the audio callback, so no allocation)"""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        n = len(block)
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+        with self._cond:
+            start = self.total % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[start:start + first] = block[:first]
+            self.data[:n - first] = block[first:]
+            self.total += n
+            self._cond.notify_all()
+
+    def close(self):
+        """Mark the end of input and wake up any reader"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def wait_for(self, position, timeout=0.5):
+        """Block until `position` samples exist; False if input ended first"""
+        with self._cond:
+            while self.total < position and not self.closed:
+                if not self._cond.wait(timeout):
+                    break
+            return self.total >= position
+
+    def read(self, start, end):
+        """Copy samples [start, end); samples older than the capacity are gone"""
+        with self._cond:
+            start = max(start, self.total - self.capacity, 0)
+            end = min(end, self.total)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            i, j = start % self.capacity, end % self.capacity
+            if i < j:
+                return self.data[i:j].copy()
+            return np.concatenate((self.data[i:], self.data[:j]))
+
+class EnergyEndpointer:
+    """Frame-energy voice activity detector with an adaptive noise floor"""
+
+    def __init__(self, samplerate=WHISPER_SAMPLE_RATE, frame_ms=30, margin_db=12.0,
+                 floor_db=-55.0, min_speech_ms=120, pause_ms=300, silence_ms=800):
+        self.frame_size = int(samplerate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.silence_frames = max(self.pause_frames, silence_ms // frame_ms)
+        self.noise_db = None
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+
+    def process(self, frame):
+        """Classify one frame; returns "start", "pause", "end" or None"""
+        energy = float(np.dot(frame, frame)) / max(len(frame), 1)
+        level_db = 10.0 * np.log10(energy + 1e-12)
+        if self.noise_db is None:
+            self.noise_db = level_db
+
+        voiced = level_db > max(self.noise_db + self.margin_db, self.floor_db)
+        if not voiced:
+            # Track the background level slowly so speech doesn't raise it
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level_db
+
+        if voiced:
+            self.speech_run += 1
+            self.silence_run = 0
+            if not self.in_speech and self.speech_run >= self.min_speech_frames:
+                self.in_speech = True
+                return "start"
+            return None
+
+        self.speech_run = 0
+        if not self.in_speech:
+            return None
+        self.silence_run += 1
+        if self.silence_run == self.pause_frames:
+            return "pause"
+        if self.silence_run >= self.silence_frames:
+            self.in_speech = False
+            return "end"
+        return None
+
+class StreamingTranscriber:
+    """Record until the speaker stops, decoding finished phrases as they come"""
+
+    def __init__(self, samplerate=WHISPER_SAMPLE_RATE, max_seconds=30, max_chunk_seconds=8,
+                 no_speech_timeout=8, silence_ms=800, pause_ms=300, preroll_ms=200):
+        self.samplerate = samplerate
+        self.max_samples = int(max_seconds * samplerate)
+        self.max_chunk = int(max_chunk_seconds * samplerate)
+        self.no_speech_timeout = int(no_speech_timeout * samplerate)
+        self.preroll = int(preroll_ms * samplerate / 1000)
+        self.endpointer = EnergyEndpointer(samplerate, pause_ms=pause_ms, silence_ms=silence_ms)
+        self.ring = RingBuffer(self.max_samples + samplerate)
+        self.speech_ended_at = None  # wall clock when the last voiced frame was captured
+        self.finished_at = None
+        self.consumed = 0  # samples examined by the endpointer
+
+    @property
+    def latency(self):
+        """Seconds from end of speech to the final transcript"""
+        if self.speech_ended_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.speech_ended_at
+
+    def _decode(self, model, start, end, previous_text):
+        """Transcribe one completed chunk of the ring buffer"""
+        audio = self.ring.read(start, end)
+        if len(audio) == 0:
+            return ""
+        segments, _ = model.transcribe(audio, **decode_options(initial_prompt=previous_text or None))
+        return "".join(seg.text for seg in segments).strip()
+
+    def _feed(self, source, stop, realtime):
+        """Push blocks from an iterable source into the ring buffer"""
+        for block in source:
+            if stop.is_set():
+                break
+            self.ring.write(block)
+            if realtime:
+                time.sleep(len(block) / self.samplerate)
+        self.ring.close()
+
+    def stream(self, source=None, realtime=False):
+        """Yield (transcript_so_far, is_final) tuples until end of speech"""
+        model = get_model()
+        stop = threading.Event()
+
+        if source is None:
+            import sounddevice as sd  # needs PortAudio; file and array sources don't
+
+            def callback(indata, frames, time_info, status):
+                self.ring.write(indata[:, 0])
+
+            input_stream = sd.InputStream(
+                samplerate=self.samplerate, channels=1, dtype="float32",
+                blocksize=self.endpointer.frame_size, callback=callback,
+            )
+            input_stream.start()
+            print("Recording... Speak now! (stops when you stop talking)")
+        else:
+            input_stream = None
+            feeder = threading.Thread(target=self._feed, args=(source, stop, realtime), daemon=True)
+            feeder.start()
+
+        frame = self.endpointer.frame_size
+        position = 0
+        chunk_start = None
+        texts = []
+        try:
+            while position < self.max_samples:
+                if not self.ring.wait_for(position + frame):
+                    if self.ring.closed:
+                        break
+                    continue
+                event = self.endpointer.process(self.ring.read(position, position + frame))
+                position += frame
+                self.consumed = position
+
+                if event == "start":
+                    chunk_start = max(0, position - self.endpointer.speech_run * frame - self.preroll)
+                elif chunk_start is None and self.endpointer.in_speech and self.endpointer.speech_run:
+                    # Speech resumed after a decoded pause
+                    chunk_start = max(0, position - frame - self.preroll)
+
+                if event == "end":
+                    last_voiced = position - self.endpointer.silence_frames * frame
+                    self.speech_ended_at = time.time() - (self.ring.total - last_voiced) / self.samplerate
+                    break
+
+                if chunk_start is not None and (event == "pause" or position - chunk_start >= self.max_chunk):
+                    # A phrase is complete: decode it while the user keeps talking
+                    text = self._decode(model, chunk_start, position, " ".join(texts))
+                    if text:
+                        texts.append(text)
+                        yield " ".join(texts), False
+                    chunk_start = None if event == "pause" else position
+                elif chunk_start is None and not texts and position >= self.no_speech_timeout:
+                    break
+        finally:
+            stop.set()
+            if input_stream is not None:
+                input_stream.stop()
+                input_stream.close()
+
+        if chunk_start is not None:
+            text = self._decode(model, chunk_start, position, " ".join(texts))
+            if text:
+                texts.append(text)
+        if self.speech_ended_at is None:
+            self.speech_ended_at = time.time()
+        self.finished_at = time.time()
+        yield " ".join(texts), True
+
+def stream_transcribe(source=None, realtime=False, **kwargs):
+    """Record with voice-activity endpointing and yield partial transcripts"""
+    transcriber = StreamingTranscriber(**kwargs)
+    yield from transcriber.stream(source=source, realtime=realtime)
@@ -1,26 +1,169 @@
-import sounddevice as sd
+import threading
+from collections import OrderedDict
+from math import gcd
 import numpy as np
 import scipy.io.wavfile
+import scipy.signal
 from faster_whisper import WhisperModel
+from config import (
+    WHISPER_MODEL_SIZE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_DEVICE,
+    WHISPER_CPU_THREADS,
+    WHISPER_NUM_WORKERS,
+    WHISPER_MAX_RESIDENT_MODELS,
+    WHISPER_BEAM_SIZE,
+    WHISPER_LANGUAGE,
+    WHISPER_WITHOUT_TIMESTAMPS,
+    WHISPER_CONDITION_ON_PREVIOUS_TEXT,
+    DEFAULT_SAMPLE_RATE,
+)
+from instrumentation import timed
+
+# Whisper decodes 16 kHz mono float32; anything else gets resampled first
+WHISPER_SAMPLE_RATE = 16000
+
+# Loaded models keyed by (model_size, compute_type, device, cpu_threads,
+# num_workers), most recently used last
+_model_pool = OrderedDict()
+_model_pool_lock = threading.Lock()
+_model_load_locks = {}
+
+def _model_key(model_size=None, compute_type=None, device=None, cpu_threads=None, num_workers=None):
+    """Fill in config defaults for a model pool key"""
+    return (
+        model_size or WHISPER_MODEL_SIZE,
+        compute_type or WHISPER_COMPUTE_TYPE,
+        device or WHISPER_DEVICE,
+        WHISPER_CPU_THREADS if cpu_threads is None else cpu_threads,
+        num_workers or WHISPER_NUM_WORKERS,
+    )
+
+def get_model(model_size=None, compute_type=None, device=None, cpu_threads=None, num_workers=None):
+    """Return a resident WhisperModel, loading it on first use"""
+    key = _model_key(model_size, compute_type, device, cpu_threads, num_workers)
+
+    with _model_pool_lock:
+        if key in _model_pool:
+            _model_pool.move_to_end(key)
+            return _model_pool[key]
+        load_lock = _model_load_locks.setdefault(key, threading.Lock())
+
+    # Load outside the pool lock so other models stay available meanwhile;
+    # the per-key lock makes concurrent callers share a single load
+    with load_lock:
+        with _model_pool_lock:
+            if key in _model_pool:
+                _model_pool.move_to_end(key)
+                return _model_pool[key]
+
+        size, compute, dev, threads, workers = key
+        print(f"Loading Whisper model '{size}' ({compute}, {dev})...")
+        model = WhisperModel(size, device=dev, compute_type=compute, cpu_threads=threads, num_workers=workers)
+
+        with _model_pool_lock:
+            _model_pool[key] = model
+            while len(_model_pool) > max(1, WHISPER_MAX_RESIDENT_MODELS):
+                evicted_key, _ = _model_pool.popitem(last=False)
+                _model_load_locks.pop(evicted_key, None)
+                print(f"Evicted Whisper model '{evicted_key[0]}' from pool")
+        return model
+
+def decode_options(**overrides):
+    """Keyword arguments for WhisperModel.transcribe: the configured decode
+    profile, with any `overrides` applied"""
+    options = {
+        "beam_size": WHISPER_BEAM_SIZE,
+        "language": WHISPER_LANGUAGE,
+        "without_timestamps": WHISPER_WITHOUT_TIMESTAMPS,
+        "condition_on_previous_text": WHISPER_CONDITION_ON_PREVIOUS_TEXT,
+    }
+    options.update(overrides)
+    return options
+
+def clear_model_pool():
+    """Drop all resident models (next request reloads from disk)"""
+    with _model_pool_lock:
+        _model_pool.clear()
+        _model_load_locks.clear()
+
+def warm_up(model_size=None, compute_type=None, device=None, cpu_threads=None, num_workers=None, background=False):
+    """Load a model and run one silent decode so the first real request is fast"""
+    def _warm():
+        model = get_model(model_size, compute_type, device, cpu_threads, num_workers)
+        # One second of silence at Whisper's native 16 kHz initialises the
+        # decoder buffers without producing any text
+        segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), **decode_options())
+        list(segments)
+
+    if background:
+        thread = threading.Thread(target=_warm, name="whisper-warm-up", daemon=True)
+        thread.start()
+        return thread
+    _warm()
+    return None
+
+@timed()
+def capture_audio(duration=5, samplerate=DEFAULT_SAMPLE_RATE):
+    """Record audio from microphone into a mono float32 array"""
+    import sounddevice as sd  # needs PortAudio; transcription alone doesn't
 
-def record_audio(filename="input.wav", duration=5, samplerate=44100):
-    """Record audio from microphone and save to file"""
     print("Recording... Speak now!")
-    audio = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1)
+    audio = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype="float32")
     sd.wait()
+    return audio[:, 0]
+
+def to_whisper_audio(audio, samplerate):
+    """Downmix to mono, convert to float32 and resample to 16 kHz"""
+    audio = np.asarray(audio)
+    # PCM integers -> [-1, 1], before downmixing turns them into floats
+    if audio.dtype == np.uint8:
+        # 8-bit WAV is unsigned with silence at 128
+        audio = (audio.astype(np.float32) - 128) / 128
+    elif audio.dtype.kind in "iu":
+        audio = audio / float(np.iinfo(audio.dtype).max)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    audio = audio.astype(np.float32, copy=False)
+
+    if samplerate != WHISPER_SAMPLE_RATE:
+        # Polyphase resampling, e.g. 44.1 kHz -> 16 kHz is up 160 / down 441
+        divisor = gcd(int(samplerate), WHISPER_SAMPLE_RATE)
+        audio = scipy.signal.resample_poly(
+            audio, WHISPER_SAMPLE_RATE // divisor, int(samplerate) // divisor
+        ).astype(np.float32, copy=False)
+    return audio
+
+@timed()
+def record_audio(filename="input.wav", duration=5, samplerate=DEFAULT_SAMPLE_RATE):
+    """Record audio from microphone and save to file"""
+    audio = capture_audio(duration=duration, samplerate=samplerate)
     scipy.io.wavfile.write(filename, samplerate, audio)
     print(f"Recording saved to {filename}")
     return filename
 
+@timed()
 def transcribe(filename="input.wav"):
     """Transcribe audio file to text using Whisper"""
     print("Transcribing audio...")
-    model = WhisperModel("base")
-    segments, _ = model.transcribe(filename)
+    model = get_model()
+    segments, _ = model.transcribe(filename, **decode_options())
+    text = "".join([seg.text for seg in segments])
+    return text.strip()
+
+@timed()
+def transcribe_array(audio, samplerate=WHISPER_SAMPLE_RATE):
+    """Transcribe an in-memory audio buffer to text using Whisper"""
+    print("Transcribing audio...")
+    model = get_model()
+    segments, _ = model.transcribe(to_whisper_audio(audio, samplerate), **decode_options())
     text = "".join([seg.text for seg in segments])
     return text.strip()
 
-def record_and_transcribe(duration=5):
-    """Record audio and immediately transcribe it"""
-    filename = record_audio(duration=duration)
-    return transcribe(filename) 
\ No newline at end of file
+def record_and_transcribe(duration=5, samplerate=DEFAULT_SAMPLE_RATE, save_to=None):
+    """Record audio and transcribe it in memory, optionally keeping a WAV copy"""
+    audio = capture_audio(duration=duration, samplerate=samplerate)
+    if save_to:
+        scipy.io.wavfile.write(save_to, samplerate, audio)
+        print(f"Recording saved to {save_to}")
+    return transcribe_array(audio, samplerate)